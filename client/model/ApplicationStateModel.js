@@ -641,21 +641,29 @@ define(
                         return currentRow.configurationPath === update.configuration_path;
                     });
                     if (row) {
-                        row.applicationStatus(update.application_status);
-                        row.lastUpdate(update.last_update);
-                        row.startStopTime(update.start_stop_time);
-                        row.applicationHost(update.application_host);
-                        row.errorState(update.error_state);
-                        row.mode(update.local_mode);
+                        // delta updates only carry the fields that changed
+                        var set = function(observable, field) {
+                            if (field in update) {
+                                observable(update[field]);
+                            }
+                        };
+                        set(row.applicationStatus, 'application_status');
+                        set(row.lastUpdate, 'last_update');
+                        set(row.startStopTime, 'start_stop_time');
+                        set(row.applicationHost, 'application_host');
+                        set(row.errorState, 'error_state');
+                        set(row.mode, 'local_mode');
                         row.mtime = Date.now();
-                        row.loginUser(update.login_user);
-                        row.readOnly(update.read_only);
-                        row.lastCommand(update.last_command);
-                        row.pdDisabled(update.pd_disabled);
-                        row.grayed(update.grayed);
-                        row.platform(update.platform);
-                        row.restartCount(update.restart_count);
-                        row.loadTimes = update.load_times
+                        set(row.loginUser, 'login_user');
+                        set(row.readOnly, 'read_only');
+                        set(row.lastCommand, 'last_command');
+                        set(row.pdDisabled, 'pd_disabled');
+                        set(row.grayed, 'grayed');
+                        set(row.platform, 'platform');
+                        set(row.restartCount, 'restart_count');
+                        if ('load_times' in update) {
+                            row.loadTimes = update.load_times;
+                        }
                     }
                     else {
                         // add new item to array
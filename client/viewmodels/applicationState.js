@@ -23,8 +23,11 @@ define(
         var callbackInstance = {};
         var callbackObj = function() {
             this.callback = function() {
-                self.navbar.connection.onmessage = function (evt) {
-                    var message = JSON.parse(evt.data);
+                var handleMessage = function (message) {
+                    message = self.navbar.decode(message);
+                    if (!self.navbar.acceptSequence(message)) {
+                        return;
+                    }
 
                     if ('update_type' in message) {
 
@@ -48,6 +51,15 @@ define(
                         else if (message.update_type === 'application_dependency') {
                             self.appStateModel.handleApplicationDependencyUpdate(message);
                         }
+                        else if (message.update_type === 'subscribed') {
+                            // the updates we missed are gone, reload everything
+                            if (message.resync) {
+                                self.appStateModel.loadApplicationStates();
+                                self.appStateModel.loadApplicationDependencies();
+                                self.mode.getGlobalMode();
+                                self.mode.getTimingEstimate();
+                            }
+                        }
                         else {
                             console.log('unknown type in message: ' + message.update_type);
                         }
@@ -56,6 +68,20 @@ define(
                         console.log('no type in message');
                     }
                 };
+
+                self.navbar.connection.onmessage = function (evt) {
+                    var message = JSON.parse(evt.data);
+
+                    // the server sends all updates of a tick in one frame
+                    if (message.update_type === 'batch') {
+                        $.each(message.messages, function () {
+                            handleMessage(this);
+                        });
+                    }
+                    else {
+                        handleMessage(message);
+                    }
+                };
             };
         };
 
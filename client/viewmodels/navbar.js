@@ -17,23 +17,41 @@
         var self = this;
         self.connection = {};
 
-        // Create the websocket right away so we know if we lose connection to server on any page
-        $(document).ready(function() {
-            self.connection = new WebSocket('ws://' + document.location.host + '/zoom/ws');
+        // Last delta protocol epoch and sequence numbers seen, so we can
+        // catch up on what we missed after a reconnect.
+        var subscription = {
+            epoch: null,
+            seq: null,
+            seen: {}
+        };
+
+        var connect = function(onmessage) {
+            var connection = new WebSocket('ws://' + document.location.host + '/zoom/ws');
+            connection.onmessage = onmessage;
 
-            self.connection.onopen = function() {
+            connection.onopen = function() {
                 console.log('websocket connected');
+                document.getElementById("applicationHost").style.backgroundColor = '';
+                connection.send(JSON.stringify({
+                    'command': 'subscribe',
+                    'protocol': 'delta',
+                    'epoch': subscription.epoch,
+                    'since': subscription.seq,
+                    'encoding': 'compact'
+                }));
             };
 
-            self.connection.onclose = function(evt) {
-                console.log('websocket closed');
+            connection.onclose = function(evt) {
+                console.log('websocket closed, reconnecting');
                 document.getElementById("applicationHost").style.backgroundColor = '#FF7BFE';
-                swal('Uh oh...', 'You will need to refresh the page to receive updates.', 'error');
+                setTimeout(function() { connect(connection.onmessage); }, 2000);
             };
-        });
 
+            self.connection = connection;
+            navbar.connection = connection;
+        };
 
-        return {
+        var navbar = {
             router: router,
             login: login,
             admin: admin,
@@ -42,6 +60,43 @@
             tools: tools,
             exlink: exlink,
             connection: self.connection,
+            // Returns false for a delta message that was already handled.
+            acceptSequence: function(message) {
+                if (message.update_type === 'subscribed') {
+                    subscription.epoch = message.epoch;
+                    return true;
+                }
+                if (!('seq' in message)) { return true; }
+                if (subscription.seen[message.seq]) { return false; }
+
+                subscription.seen[message.seq] = true;
+                if (subscription.seq === null || message.seq > subscription.seq) {
+                    subscription.seq = message.seq;
+                }
+                delete subscription.seen[message.seq - 5000];
+                return true;
+            },
+            // Expands the item groups of a compact message back into objects.
+            decode: function(message) {
+                if (message.encoding !== 'compact') { return message; }
+
+                $.each(['application_states', 'application_dependencies'], function(i, field) {
+                    if (!(field in message)) { return; }
+                    var items = [];
+                    $.each(message[field], function(j, group) {
+                        $.each(group.rows, function(k, row) {
+                            var item = {};
+                            for (var f = 0; f < group.fields.length; f++) {
+                                item[group.fields[f]] = row[f];
+                            }
+                            items.push(item);
+                        });
+                    });
+                    message[field] = items;
+                });
+                delete message.encoding;
+                return message;
+            },
             isFAQ: function(title) {return title.search('FAQ') !== -1;},
             activate: function() {
                 router.map([
@@ -55,4 +110,11 @@
                 return router.activate();
             }
         };
+
+        // Create the websocket right away so we know if we lose connection to server on any page
+        $(document).ready(function() {
+            connect(null);
+        });
+
+        return navbar;
     });
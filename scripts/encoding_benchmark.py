@@ -0,0 +1,103 @@
+"""
+Bytes on the wire and encode time of application state updates, per
+encoding. The deflate columns are what permessage-deflate would send;
+the Tornado the server runs on (3.1) cannot negotiate it.
+
+    cd server; python ../scripts/encoding_benchmark.py [apps ...]
+"""
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'server'))
+
+from zoom.common.types import ApplicationStatus, MessageEncoding
+from zoom.www.entities.application_state import ApplicationState
+from zoom.www.messages.application_states import ApplicationStatesMessage
+from zoom.www.messages.change_log import ChangeLog
+from zoom.www.messages.compact_encoding import compact_json
+
+ROUNDS = 5
+# share of the applications that change between two updates
+CHANGED = 0.01
+
+
+def deflated(data):
+    # raw deflate, as used by permessage-deflate
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return len(compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH))
+
+
+def application_states(count):
+    states = dict()
+    for i in xrange(count):
+        path = '/spot/software/state/application/group{0}/app{1}'\
+            .format(i % 50, i)
+        state = ApplicationState(
+            application_name='app{0}'.format(i),
+            configuration_path=path,
+            application_status=random.choice([ApplicationStatus.RUNNING,
+                                              ApplicationStatus.STOPPED]),
+            application_host='host{0}.example.com'.format(i % 200),
+            last_update=time.time(),
+            start_stop_time=time.time(),
+            error_state='ok',
+            local_mode='auto',
+            login_user='Zoom',
+            last_command='Start',
+            read_only=False,
+            grayed=False,
+            pd_disabled=False,
+            platform=0,
+            restart_count=0)
+        states[path] = state.to_dictionary()
+    return states
+
+
+def timed(function, *args):
+    start = time.time()
+    for _ in xrange(ROUNDS):
+        result = function(*args)
+    return result, (time.time() - start) / ROUNDS * 1000
+
+
+def row(name, data, millis):
+    print '  {0:<14} {1:>10} {2:>12} {3:>10.1f}'\
+        .format(name, len(data), deflated(data), millis)
+
+
+def benchmark(count):
+    message = ApplicationStatesMessage()
+    message.set_environment('Staging')
+    message.update(application_states(count))
+
+    print '{0} applications'.format(count)
+    print '  {0:<14} {1:>10} {2:>12} {3:>10}'\
+        .format('update', 'bytes', 'deflated', 'encode ms')
+
+    full, millis = timed(message.to_json)
+    row('full json', full, millis)
+    packed, millis = timed(message.to_json, MessageEncoding.COMPACT)
+    row('full compact', packed, millis)
+
+    log = ChangeLog()
+    log.record(message)
+    for state in random.sample(message.application_states.values(),
+                               max(int(count * CHANGED), 1)):
+        state['application_status'] = 'starting'
+        state['last_update'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    start = time.time()
+    delta = log.record(message)
+    row('delta json', delta, (time.time() - start) * 1000)
+    packed, millis = timed(compact_json, delta)
+    row('delta compact', packed, millis)
+    print
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    for apps in [int(a) for a in sys.argv[1:]] or [1000, 5000, 10000]:
+        benchmark(apps)
@@ -0,0 +1,122 @@
+"""
+Requests per second of GET /api/v1/application/states for a cache of fake
+application states, when the cache changes before every request (so it is
+encoded for each one, as before snapshots), when it does not change, and
+when the client already has it and polls with If-None-Match.
+
+    cd server; python ../scripts/snapshot_load_test.py [apps] [seconds]
+"""
+import os
+import sys
+import threading
+import time
+
+import requests
+import tornado.web
+from tornado.httpserver import HTTPServer
+from tornado.ioloop import IOLoop
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'server'))
+
+from zoom.www.cache.snapshot import Snapshot
+from zoom.www.handlers.application_state_handler \
+    import ApplicationStateHandler
+from zoom.www.messages.application_states import ApplicationStatesMessage
+
+PORT = 8891
+CLIENTS = 8
+
+
+class ConfigurationStub(object):
+    application_state_path = '/spot/software/state/application'
+
+
+class DataStoreStub(object):
+    def __init__(self, apps):
+        self.message = ApplicationStatesMessage()
+        self.message.set_environment('Staging')
+        for i in xrange(apps):
+            path = '/spot/software/state/application/group{0}/app{1}'\
+                .format(i % 50, i)
+            self.message.update({path: {
+                'configuration_path': path,
+                'application_name': 'app{0}'.format(i),
+                'application_status': 'running',
+                'application_host': 'host{0}.example.com'.format(i % 200),
+                'error_state': 'ok',
+                'local_mode': 'auto',
+                'login_user': 'Zoom',
+                'last_command': 'Start',
+                'last_update': '2015-01-01 00:00:01',
+                'start_stop_time': '2015-01-01 00:00:01',
+                'read_only': False,
+                'grayed': False,
+                'pd_disabled': False,
+                'platform': 0,
+                'restart_count': 0,
+                'delete': False
+            }})
+        self.snapshot = Snapshot(self.message.to_json)
+        self.version = 0
+        self.changing = False
+
+    def get_application_state_snapshot(self):
+        if self.changing:
+            self.version += 1
+        return self.snapshot, self.version
+
+    def load_application_state_cache(self):
+        return self.message
+
+
+def hammer(seconds, headers, counts):
+    session = requests.Session()
+    session.headers.update(headers)
+    url = 'http://127.0.0.1:{0}/api/v1/application/states'.format(PORT)
+    end = time.time() + seconds
+    count = 0
+    while time.time() < end:
+        session.get(url).content
+        count += 1
+    counts.append(count)
+
+
+def measure(name, seconds, headers=None):
+    counts = list()
+    threads = [threading.Thread(target=hammer,
+                                args=(seconds, headers or {}, counts))
+               for _ in xrange(CLIENTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print '  {0:<24} {1:>10.1f} req/s'.format(name, sum(counts) / seconds)
+
+
+def main(apps, seconds):
+    data_store = DataStoreStub(apps)
+    application = tornado.web.Application(
+        [(r'/api/v1/application/states(?P<path>.*)',
+          ApplicationStateHandler)], gzip=True)
+    application.data_store = data_store
+    application.configuration = ConfigurationStub()
+    HTTPServer(application).listen(PORT, '127.0.0.1')
+    server = threading.Thread(target=IOLoop.instance().start)
+    server.daemon = True
+    server.start()
+
+    gzip = {'Accept-Encoding': 'gzip'}
+    print '{0} applications, {1} clients'.format(apps, CLIENTS)
+    data_store.changing = True
+    measure('encoded every request', seconds, gzip)
+    data_store.changing = False
+    measure('snapshot', seconds, gzip)
+    etag = data_store.snapshot.etag(data_store.version)
+    gzip['If-None-Match'] = etag
+    measure('snapshot, 304', seconds, gzip)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 5)
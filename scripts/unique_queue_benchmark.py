@@ -0,0 +1,93 @@
+"""
+Time spent by UniqueQueue when it gets deep, as in a restart storm: add
+distinct tasks, try to add each of them again, cancel everything but
+register/unregister, and drain what is left the way the WorkManager does.
+Compared with the deque scanned by Task.__eq__ it replaced.
+
+    cd server; python ../scripts/unique_queue_benchmark.py [depth ...]
+"""
+import logging
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'server'))
+
+from zoom.agent.entities.unique_queue import UniqueQueue
+from zoom.agent.task.task import Task
+
+NAMES = ('stop', 'unregister', 'start', 'register', 'react')
+DONT_REMOVE = ('register', 'unregister')
+
+
+class DequeQueue(deque):
+    """
+    The queue before the index.
+    """
+    def append_unique(self, task, sender='', first=False):
+        if task in self:
+            return False
+        if first:
+            self.appendleft(task)
+        else:
+            self.append(task)
+        return True
+
+    def cancel(self):
+        for i in list(self):
+            if i.name not in DONT_REMOVE:
+                self.remove(i)
+
+
+class IndexedQueue(UniqueQueue):
+    def cancel(self):
+        self.clear(keep=DONT_REMOVE)
+
+
+def tasks(depth):
+    return [Task(NAMES[i % len(NAMES)], target='app{0}'.format(i))
+            for i in xrange(depth)]
+
+
+def timed(function, *args):
+    start = time.time()
+    function(*args)
+    return (time.time() - start) * 1000
+
+
+def fill(queue, items):
+    for task in items:
+        queue.append_unique(task)
+
+
+def drain(queue):
+    while queue:
+        queue.remove(queue[0])
+
+
+def run(name, queue, depth):
+    items = tasks(depth)
+    added = timed(fill, queue, items)
+    duplicates = timed(fill, queue, tasks(depth))
+    cancelled = timed(queue.cancel)
+    fill(queue, items)
+    drained = timed(drain, queue)
+    print '  {0:<10} {1:>10.1f} {2:>12.1f} {3:>10.1f} {4:>10.1f}'\
+        .format(name, added, duplicates, cancelled, drained)
+
+
+def main(depths):
+    logging.disable(logging.INFO)
+    for depth in depths:
+        print '{0} tasks (ms)'.format(depth)
+        print '  {0:<10} {1:>10} {2:>12} {3:>10} {4:>10}'\
+            .format('', 'add', 'duplicates', 'cancel', 'drain')
+        run('deque', DequeQueue(), depth)
+        run('indexed', IndexedQueue(), depth)
+        print
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [100, 1000, 5000])
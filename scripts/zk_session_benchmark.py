@@ -0,0 +1,121 @@
+"""
+ZooKeeper sessions held, and time for every component to be connected
+again after the connection drops, with one client per component versus
+components sharing sessions. Needs a running ZooKeeper.
+
+    cd server; python ../scripts/zk_session_benchmark.py localhost:2181 [components] [pool size]
+"""
+import os
+import sys
+import time
+from threading import Event, Lock
+
+from kazoo.client import KazooClient, KazooState
+from kazoo.handlers.threading import SequentialThreadingHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'server'))
+
+from zoom.agent.entities.zk_session import SessionPool
+
+PATH = '/zoom_session_benchmark'
+
+
+class Component(object):
+    """
+    Stands in for an Application: a listener and a watch on one node.
+    """
+    def __init__(self, name, zkclient, counter):
+        self.name = name
+        self.zkclient = zkclient
+        self.zkclient.add_listener(self._listener)
+        self._counter = counter
+
+    def start(self):
+        self.zkclient.start()
+        self.zkclient.ensure_path('{0}/{1}'.format(PATH, self.name))
+        self.zkclient.exists('{0}/{1}'.format(PATH, self.name),
+                             watch=self._watch)
+
+    def _listener(self, state):
+        if state == KazooState.CONNECTED:
+            self._counter.connected()
+
+    def _watch(self, event):
+        pass
+
+
+class Counter(object):
+    def __init__(self, expected):
+        self._expected = expected
+        self._count = 0
+        self._lock = Lock()
+        self.done = Event()
+
+    def reset(self):
+        with self._lock:
+            self._count = 0
+            self.done.clear()
+
+    def connected(self):
+        with self._lock:
+            self._count += 1
+            if self._count >= self._expected:
+                self.done.set()
+
+
+def drop(clients):
+    for client in clients:
+        # close the socket under the client, it reconnects to the same session
+        client._connection._socket.close()
+
+
+def benchmark(name, count, make_clients):
+    counter = Counter(count)
+    components, clients = make_clients(counter)
+
+    start = time.time()
+    for component in components:
+        component.start()
+    connect = time.time() - start
+
+    time.sleep(1)
+    counter.reset()
+    start = time.time()
+    drop(clients)
+    counter.done.wait(120)
+    reconnect = time.time() - start
+
+    print '  {0:<22} {1:>9} {2:>11.2f} {3:>13.2f}'\
+        .format(name, len(clients), connect, reconnect)
+    for client in clients:
+        client.stop()
+        client.close()
+
+
+def main(hosts, count, pool_size):
+    def own_clients(counter):
+        clients = [KazooClient(hosts=hosts, timeout=60.0,
+                               handler=SequentialThreadingHandler())
+                   for _ in xrange(count)]
+        return ([Component('app{0}'.format(i), c, counter)
+                 for i, c in enumerate(clients)], clients)
+
+    def shared(counter):
+        pool = SessionPool(size=pool_size, hosts=hosts)
+        components = [Component('app{0}'.format(i),
+                                pool.view('app{0}'.format(i)), counter)
+                      for i in xrange(count)]
+        return components, [s.client for s in pool.sessions]
+
+    print '{0} components'.format(count)
+    print '  {0:<22} {1:>9} {2:>11} {3:>13}'\
+        .format('', 'sessions', 'connect s', 'reconnect s')
+    benchmark('client per component', count, own_clients)
+    benchmark('shared ({0})'.format(pool_size), count, shared)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else 'localhost:2181',
+         int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+         int(sys.argv[3]) if len(sys.argv) > 3 else 1)
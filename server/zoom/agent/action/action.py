@@ -13,7 +13,7 @@ class Action(object):
                  action_q=None, zkclient=None, proc_client=None, mode=None,
                  system=None, pred_list=None, settings=None, disabled=False,
                  pd_enabled=True, op_action=None, pd_reason=None,
-                 app_state=None):
+                 app_state=None, scheduler=None):
         """
         :param action: The function to run when all the action's predicates are met
         :param xmlpart: The part of XML pertaining to this Action
@@ -27,7 +27,7 @@ class Action(object):
         :type staggertime: int
         :type mode_controlled: bool
         :type action_q: zoom.agent.entities.unique_queue.UniqueQueue
-        :type zkclient: kazoo.client.KazooClient
+        :type zkclient: zoom.agent.entities.zk_session.ComponentSession
         :type proc_client: zoom.agent.client.process_client.ProcessClient
         :type mode: zoom.agent.entities.thread_safe_object.ApplicationMode
         :type system: zoom.common.types.PlatformType
@@ -38,6 +38,8 @@ class Action(object):
         :type op_action: types.FunctionType or None
         :type pd_reason: str or None
         :type app_state: zoom.agent.entities.thread_safe_object.ThreadSafeObject
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler or None
+            Runs the polling predicates.
         """
         self.name = name
         self.disabled = disabled
@@ -56,7 +58,8 @@ class Action(object):
             self._stag_lock = StaggerLock(staggerpath, staggertime,
                                           parent=self.component_name,
                                           acquire_lock=self._acquire_lock,
-                                          app_state=app_state)
+                                          app_state=app_state,
+                                          zkclient=zkclient)
             self._log.info('Using {0}'.format(self._stag_lock))
         else:
             self._stag_lock = None
@@ -64,7 +67,8 @@ class Action(object):
         factory = PredicateFactory(component_name=component_name,
                                    action=self.name, zkclient=zkclient,
                                    proc_client=proc_client, system=system,
-                                   pred_list=pred_list, settings=settings)
+                                   pred_list=pred_list, settings=settings,
+                                   scheduler=scheduler)
         self._predicate = factory.create(xmlpart.find('./Dependency/Predicate'),
                                          callback=self._callback)
 
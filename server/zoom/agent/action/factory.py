@@ -9,10 +9,10 @@ from zoom.common.decorators import catch_exception
 class ActionFactory(object):
     def __init__(self, component=None, zkclient=None, proc_client=None,
                  action_queue=None, mode=None, system=None, pred_list=None,
-                 app_state=None, settings=None):
+                 app_state=None, settings=None, scheduler=None):
         """
         :type component: zoom.agent.entities.application.Application
-        :type zkclient: kazoo.client.KazooClient or None
+        :type zkclient: zoom.agent.entities.zk_session.ComponentSession or None
         :type proc_client: zoom.agent.client.process_client.ProcessClient
         :type action_queue: zoom.agent.entities.unique_queue.UniqueQueue
         :type mode: zoom.agent.entities.thread_safe_object.ApplicationMode
@@ -20,6 +20,7 @@ class ActionFactory(object):
         :type pred_list: list
         :type app_state: zoom.agent.entities.thread_safe_object.ThreadSafeObject
         :type settings: dict
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler or None
         """
         self._zk = zkclient
         self._proc = proc_client
@@ -30,6 +31,7 @@ class ActionFactory(object):
         self._pred_list = pred_list
         self._app_state = app_state
         self._settings = settings
+        self._scheduler = scheduler
         self._log = logging.getLogger('sent.{0}.act.factory'
                                       .format(self._comp.name))
 
@@ -88,7 +90,8 @@ class ActionFactory(object):
                                        pd_enabled=pd_enabled,
                                        pd_reason=pd_reason,
                                        op_action=op_action,
-                                       app_state=self._app_state)
+                                       app_state=self._app_state,
+                                       scheduler=self._scheduler)
                 self._log.info('Registered {0}.'.format(actions[name]))
             else:
                 self._log.error('Invalid action ID or func specified: '
@@ -8,12 +8,10 @@ from time import sleep
 
 import os.path
 import re
-from kazoo.client import KazooClient, KazooState
+from kazoo.client import KazooState
 from kazoo.exceptions import NoNodeError, NodeExistsError
-from kazoo.handlers.threading import SequentialThreadingHandler
 
 from zoom.agent.action.factory import ActionFactory
-from zoom.common.constants import get_zk_conn_string
 from zoom.agent.entities.thread_safe_object import (
     ApplicationMode,
     ThreadSafeObject
@@ -50,7 +48,8 @@ class Application(object):
     Service object to represent an deployed service.
     """
     def __init__(self, config, settings, queue, system, application_type,
-                 cancel_flag):
+                 cancel_flag, zkclient, executor, scheduler,
+                 step_executor=None):
         """
         :type config: dict (xml)
         :type settings: dict
@@ -58,6 +57,14 @@ class Application(object):
         :type system: zoom.common.types.PlatformType
         :type application_type: zoom.common.types.ApplicationType
         :type cancel_flag: zoom.agent.entities.thread_safe_object.ThreadSafeObject
+        :type zkclient: zoom.agent.entities.zk_session.ComponentSession
+            This component's view of the session shared by the agent.
+        :type executor: zoom.agent.entities.executor.Executor
+            Worker threads shared by the agent.
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler
+            Runs the polling predicates of all components.
+        :type step_executor: zoom.agent.entities.executor.Executor or None
+            Runs the blocking work of all components, see WorkManager.
         """
         self.config = config
         self._settings = settings
@@ -102,23 +109,20 @@ class Application(object):
             count_callback=self._update_agent_node_with_app_details)
 
         self._read_only = False
+        self._scheduler = scheduler
 
         self._paths = self._init_paths(self.config, settings, application_type)
 
         # clients
-        self.zkclient = KazooClient(
-            hosts=get_zk_conn_string(),
-            timeout=60.0,
-            handler=SequentialThreadingHandler(),
-            logger=logging.getLogger('kazoo.app.{0}'.format(self.name)))
-
+        self.zkclient = zkclient
         self.zkclient.add_listener(self._zk_listener)
         self._proc_client = self._init_proc_client(self.config,
                                                    application_type,
                                                    cancel_flag)
 
         self._actions = self._init_actions(settings)
-        self._work_manager = self._init_work_manager(self._action_queue)
+        self._work_manager = self._init_work_manager(self._action_queue,
+                                                     executor, step_executor)
 
     def app_details(self):
         return {'name': self.name,
@@ -199,8 +203,8 @@ class Application(object):
     @catch_exception(RuntimeError)
     def uninitialize(self):
         """
-        Gracefully stop this Zookeeper session, then free any resentinels
-        held by the client.
+        Gracefully stop using the Zookeeper session, then free any resentinels
+        held by the client. The session stays open for other components.
         """
         self._log.info('Stopping Zookeeper client')
         self._work_manager.stop()
@@ -316,6 +320,12 @@ class Application(object):
         for i in self._actions.values():
             out += '\n{0}'.format(i.status)
         out += '\n'
+        for name, latency in sorted(self._work_manager.latency.items()):
+            out += ('\nWork {0}: ran {1} times, waited {2:.3f}s on average, '
+                    '{3:.3f}s at most'.format(name, latency['count'],
+                                               latency['average'],
+                                               latency['max']))
+        out += '\n'
         out += '#' * 40 + ' STATUS ' + '#' * 40
         out += '\n'
 
@@ -549,7 +559,8 @@ class Application(object):
                                        system=self._system,
                                        pred_list=self._predicates,
                                        app_state=self._state,
-                                       settings=settings)
+                                       settings=settings,
+                                       scheduler=self._scheduler)
 
         actions = action_factory.create(self.config)
 
@@ -591,8 +602,20 @@ class Application(object):
             self._log.warning('Unhandled read-only configuration')
             self._read_only = False
 
-    def _init_work_manager(self, queue):
+    @property
+    def work_latency(self):
+        """
+        Time from queueing work to starting it, per task name.
+        :rtype: dict
         """
+        manager = getattr(self, '_work_manager', None)
+        return manager.latency if manager is not None else {}
+
+    def _init_work_manager(self, queue, executor, step_executor):
+        """
+        :type queue: zoom.agent.entities.unique_queue.UniqueQueue
+        :type executor: zoom.agent.entities.executor.Executor
+        :type step_executor: zoom.agent.entities.executor.Executor or None
         :rtype: zoom.agent.entities.work_manager.WorkManager
         """
         acceptable_work = dict()
@@ -610,7 +633,8 @@ class Application(object):
                     self._log.debug('Method {0} already assigned to action.'
                                     .format(attribute))
 
-        manager = WorkManager(self.name, queue, acceptable_work)
+        manager = WorkManager(self.name, queue, acceptable_work, executor,
+                              step_executor=step_executor)
         manager.start()
         return manager
 
@@ -15,13 +15,20 @@ class ChildProcess(object):
     Wraps a threading.Thread, providing a Queue for communication between
     the SentinelDaemon and the ChildProcess.
     """
-    def __init__(self, config, system, settings):
+    def __init__(self, config, system, settings, sessions, executor,
+                 scheduler, step_executor=None):
         """
         :type config: xml.etree.ElementTree.Element
         :type system: zoom.common.types.PlatformType
         :type settings: dict
+        :type sessions: zoom.agent.entities.zk_session.SessionPool
+        :type executor: zoom.agent.entities.executor.Executor
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler
+        :type step_executor: zoom.agent.entities.executor.Executor or None
         """
         self._log = logging.getLogger('sent.child')
+        # first come, first served: operators expect the last command they
+        # sent to be the one that sticks
         self._action_queue = UniqueQueue()
         self._cancel_flag = ThreadSafeObject(False)
 
@@ -30,8 +37,29 @@ class ChildProcess(object):
         self._config = config
         self._system = system  # Linux or Windows
         self._settings = settings
+        self._sessions = sessions
+        self._executor = executor
+        self._scheduler = scheduler
+        self._step_executor = step_executor
+        self._app = None
         self._process = self._create_process()
 
+    @property
+    def queue_depth(self):
+        """
+        :rtype: int
+        """
+        return len(self._action_queue)
+
+    @property
+    def latency(self):
+        """
+        :rtype: dict
+        """
+        if self._app is None:
+            return {}
+        return self._app.work_latency
+
     def add_work(self, work, immediate=False):
         """
         :type work: zoom.agent.task.task.Task
@@ -51,10 +79,8 @@ class ChildProcess(object):
         DONT_REMOVE = ('register', 'unregister')
         self._log.info('Setting Cancel Flag and clearing queue.')
         self._cancel_flag.set_value(True)
-        for i in list(self._action_queue):
-            if i.name not in DONT_REMOVE:
-                self._action_queue.remove(i)
-                self._log.info('Removing task {0}'.format(i))
+        for i in self._action_queue.clear(keep=DONT_REMOVE):
+            self._log.info('Removing task {0}'.format(i))
 
     def stop(self):
         """
@@ -80,15 +106,21 @@ class ChildProcess(object):
         :rtype: threading.Thread
         """
         self._log.debug('Starting worker process for %s' % self.name)
-        
+        zkclient = self._sessions.view(self.name)
+
         if self._application_type == ApplicationType.APPLICATION:
             s = Application(self._config, self._settings, self._action_queue,
                             self._system, self._application_type,
-                            self._cancel_flag)
+                            self._cancel_flag, zkclient, self._executor,
+                            self._scheduler,
+                            step_executor=self._step_executor)
         elif self._application_type == ApplicationType.JOB:
             s = Job(self._config, self._settings, self._action_queue,
-                    self._system, self._application_type, self._cancel_flag)
-            
+                    self._system, self._application_type, self._cancel_flag,
+                    zkclient, self._executor, self._scheduler,
+                    step_executor=self._step_executor)
+
+        self._app = s
         t = Thread(target=s.run, name=self.name)
         t.daemon = True
         t.start()
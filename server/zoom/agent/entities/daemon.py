@@ -7,7 +7,6 @@ import sys
 import time
 import pprint
 from multiprocessing import Lock
-from xml.etree import ElementTree
 from xml.etree.ElementTree import ParseError
 
 import tornado.httpserver
@@ -22,7 +21,11 @@ from zoom.common.decorators import (
     run_only_one
 )
 from zoom.agent.util.helpers import verify_attribute
+from zoom.common.sentinel_config import iter_components
 from zoom.agent.entities.child_process import ChildProcess
+from zoom.agent.entities.executor import Executor
+from zoom.agent.entities.scheduler import Scheduler
+from zoom.agent.entities.zk_session import SessionPool
 from zoom.agent.task.zk_task_client import ZKTaskClient
 from zoom.common.constants import (
     get_zk_conn_string,
@@ -49,6 +52,20 @@ class SentinelDaemon(object):
         self.listener_lock = Lock()
         self.version = get_version()
         self.task_client = None
+        # shared by all components, created with the first settings
+        self._sessions = None
+        # runs the work of all components, sized with the first settings
+        self._executor = Executor()
+        self._executor.start()
+        # runs the queued steps of the components, which can block for long
+        self._step_executor = Executor(size=4, name='step', growable=True)
+        self._step_executor.start()
+        # times the polling predicates and runs them on a pool of their own,
+        # so busy components do not delay polls and their timeouts
+        self._poll_executor = Executor(size=4, name='poll')
+        self._poll_executor.start()
+        self._scheduler = Scheduler(executor=self._poll_executor)
+        self._scheduler.start()
 
         self.zkclient = KazooClient(hosts=get_zk_conn_string(),
                                     timeout=60.0,
@@ -72,7 +89,10 @@ class SentinelDaemon(object):
                                                                      self.version,
                                                                      self._tmp_dir,
                                                                      self._hostname,
-                                                                     self.zkclient))
+                                                                     self.zkclient,
+                                                                     self._executor,
+                                                                     self._scheduler,
+                                                                     self._step_executor))
 
         signal.signal(signal.SIGINT, self._handle_sigint)
         signal.signal(signal.SIGTERM, self._handle_sigint)
@@ -90,6 +110,12 @@ class SentinelDaemon(object):
         """Terminate all child processes and exit."""
         self._log.info('Stopping Sentinel')
         self._terminate_children()
+        if self._sessions is not None:
+            self._sessions.stop()
+        self._scheduler.stop()
+        self._poll_executor.stop()
+        self._step_executor.stop()
+        self._executor.stop()
         self._rest_server.stop()
         self._log.info('Stopped Sentinel. Exiting.')
         sys.exit(0)
@@ -156,10 +182,11 @@ class SentinelDaemon(object):
                 return
 
             data, stat = self.zkclient.get(config_path)
-            config = ElementTree.fromstring(data.strip())
+            # parse everything before stopping the running children
+            components = list(iter_components(data.strip(), clear=False))
 
             self._terminate_children()
-            self._spawn_children(config)
+            self._spawn_children(components)
             self._register()
 
         except ParseError as e:
@@ -171,12 +198,23 @@ class SentinelDaemon(object):
         except Exception as e:
             self._log.exception('There were some Exception: {0}'.format(e))
 
-    def _spawn_children(self, config):
+    def _spawn_children(self, components):
         """
         Populate the self.children dictionary
-        :type config: xml.etree.ElementTree.Element
+        :type components: list
+            [xml.etree.ElementTree.Element]
         """
-        for component in config.iter('Component'):
+        if self._sessions is None:
+            size = self._settings.get('zookeeper', {})\
+                .get('session_pool_size', 1)
+            self._sessions = SessionPool(size=size)
+            self._log.info('Components will share {0} ZooKeeper sessions.'
+                           .format(size))
+            self._executor.resize(self._settings.get('worker_threads', 16))
+            self._step_executor.resize(
+                4, max_size=self._settings.get('max_step_threads', 64))
+
+        for component in components:
             try:
                 name = verify_attribute(component, 'id')
                 self._log.info('Spawning %s' % name)
@@ -184,7 +222,11 @@ class SentinelDaemon(object):
                     'config': component,
                     'process': ChildProcess(component,
                                             self._system,
-                                            self._settings)
+                                            self._settings,
+                                            self._sessions,
+                                            self._executor,
+                                            self._scheduler,
+                                            self._step_executor)
                 }
 
             except ValueError as e:
@@ -0,0 +1,158 @@
+import logging
+import time
+from collections import deque
+from threading import Condition, Lock, Thread, current_thread
+
+from zoom.agent.util.histogram import LatencyHistogram
+
+
+class Executor(object):
+    """
+    A bounded number of worker threads shared by all components of an agent.
+    Jobs run in the order they are submitted.
+    A growable executor starts another thread whenever a job would have to
+    wait, up to max_size threads, and drops the extra threads once there is
+    nothing to do. It is for jobs that block for long, like the steps of a
+    component, which would otherwise hold back everyone else's work.
+    """
+    def __init__(self, size=16, name='worker', clock=time.time,
+                 growable=False, max_size=64):
+        """
+        :type size: int
+            Threads kept, also when idle.
+        :type name: str
+        :type clock: types.FunctionType
+        :type growable: bool
+        :type max_size: int
+            Most threads a growable executor starts. Jobs beyond that wait.
+        """
+        self._size = max(int(size), 1)
+        self._max_size = max(int(max_size), self._size)
+        self._name = name
+        self._growable = growable
+        self._clock = clock
+        self._log = logging.getLogger('sent.executor')
+        self._condition = Condition(Lock())
+        self._jobs = deque()  # [(submitted, function, args, kwargs)]
+        self._threads = list()
+        self._running = False
+        self._busy = 0
+        self._counter = 0
+        self._wait = LatencyHistogram()
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0,
+                       'max_queue_depth': 0, 'peak_threads': 0}
+
+    @property
+    def stats(self):
+        """
+        :rtype: dict
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            if self._growable:
+                stats['max_size'] = self._max_size
+            stats['threads'] = len(self._threads)
+            stats['busy'] = self._busy
+            stats['queue_depth'] = len(self._jobs)
+        stats['wait'] = self._wait.to_dictionary()
+        return stats
+
+    def start(self):
+        with self._condition:
+            self._running = True
+            self._add_threads()
+
+    def stop(self):
+        """
+        Let the running jobs finish and drop the queued ones.
+        """
+        with self._condition:
+            self._running = False
+            dropped = len(self._jobs)
+            self._jobs.clear()
+            threads = list(self._threads)
+            self._condition.notify_all()
+        if dropped:
+            self._log.warning('Dropped {0} queued jobs.'.format(dropped))
+        for thread in threads:
+            if thread is not current_thread():
+                thread.join()
+
+    def resize(self, size, max_size=None):
+        """
+        :type size: int
+        :type max_size: int or None
+            For growable executors, None keeps the current one.
+        """
+        with self._condition:
+            self._size = max(int(size), 1)
+            self._max_size = max(int(max_size or self._max_size), self._size)
+            if self._running:
+                self._add_threads()
+            # surplus threads exit when they look for their next job
+            self._condition.notify_all()
+        self._log.info('Running jobs on {0} threads.'.format(self._size))
+
+    def submit(self, function, *args, **kwargs):
+        """
+        :type function: types.FunctionType
+        """
+        with self._condition:
+            self._jobs.append((self._clock(), function, args, kwargs))
+            self._stats['submitted'] += 1
+            self._stats['max_queue_depth'] = max(
+                self._stats['max_queue_depth'], len(self._jobs))
+            idle = len(self._threads) - self._busy
+            if (self._growable and self._running and len(self._jobs) > idle
+                    and len(self._threads) < self._max_size):
+                self._add_thread()
+            self._condition.notify()
+
+    def _add_threads(self):
+        """
+        Call with the lock held.
+        """
+        while len(self._threads) < self._size:
+            self._add_thread()
+
+    def _add_thread(self):
+        """
+        Call with the lock held.
+        """
+        self._counter += 1
+        thread = Thread(target=self._work,
+                        name='{0}-{1}'.format(self._name, self._counter))
+        thread.daemon = True
+        self._threads.append(thread)
+        self._stats['peak_threads'] = max(self._stats['peak_threads'],
+                                         len(self._threads))
+        thread.start()
+
+    def _work(self):
+        me = current_thread()
+        while True:
+            with self._condition:
+                while (not self._jobs and self._running and
+                       len(self._threads) <= self._size):
+                    self._condition.wait()
+                # surplus threads of a growable executor finish the queue
+                surplus = len(self._threads) > self._size and not (
+                    self._growable and self._jobs)
+                if not self._running or surplus:
+                    self._threads.remove(me)
+                    return
+                submitted, function, args, kwargs = self._jobs.popleft()
+                self._busy += 1
+
+            self._wait.add(self._clock() - submitted)
+            failed = False
+            try:
+                function(*args, **kwargs)
+            except Exception:
+                failed = True
+                self._log.exception('Job {0} failed.'.format(function))
+
+            with self._condition:
+                self._busy -= 1
+                self._stats['failed' if failed else 'completed'] += 1
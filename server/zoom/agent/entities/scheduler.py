@@ -0,0 +1,296 @@
+import atexit
+import heapq
+import itertools
+import logging
+import random
+import time
+from threading import Condition, Lock, Thread
+
+from zoom.agent.entities.executor import Executor
+from zoom.agent.util.histogram import LatencyHistogram
+
+# first runs are spread over at most this many seconds
+MAX_JITTER = 1.0
+# threads polling for predicates created outside of an agent
+DEFAULT_POLL_THREADS = 4
+
+_default = None
+_default_lock = Lock()
+
+
+def get_default_scheduler():
+    """
+    A started Scheduler with a small executor of its own, for predicates
+    created outside of an agent. As in an agent, a slow poll does not hold
+    back the others and can time out.
+    :rtype: zoom.agent.entities.scheduler.Scheduler
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            executor = Executor(size=DEFAULT_POLL_THREADS,
+                                name='default-poll')
+            executor.start()
+            _default = Scheduler(executor=executor, name='default-scheduler')
+            _default.start()
+            # a waiting thread does not survive interpreter shutdown. The
+            # workers are left alone, stopping waits for a hung poll.
+            atexit.register(_default.stop)
+        return _default
+
+
+class ScheduledJob(object):
+    """
+    A function the Scheduler calls every interval, until cancelled.
+    """
+    def __init__(self, scheduler, function, interval, timeout=None,
+                 on_timeout=None, name=None):
+        """
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler
+        :type function: types.FunctionType
+        :type interval: int or float
+            Seconds from the end of one run to the start of the next
+        :type timeout: int or float or None
+        :type on_timeout: types.FunctionType or None
+            Called when a run takes longer than timeout.
+        :type name: str or None
+        """
+        self.function = function
+        self.interval = max(float(interval), 0.0)
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+        self.name = name or getattr(function, '__name__', str(function))
+        self.cancelled = False
+        self.runs = 0
+        self.timeouts = 0
+        self.running = False
+        self._scheduler = scheduler
+
+    def cancel(self):
+        """
+        Drop the next runs. A run in progress is not waited for.
+        """
+        self._scheduler.cancel(self)
+
+    def __repr__(self):
+        return ('{0}(name={1}, interval={2}, timeout={3}, runs={4}, '
+                'timeouts={5}, cancelled={6})'
+                .format(self.__class__.__name__, self.name, self.interval,
+                        self.timeout, self.runs, self.timeouts,
+                        self.cancelled))
+
+
+class Scheduler(object):
+    """
+    One thread keeps the due times of all polling jobs in a heap and hands
+    the due runs to the executor, instead of every predicate sleeping in its
+    own thread. A job is scheduled again once its run is over, so runs of
+    one job never overlap.
+    """
+    def __init__(self, executor=None, jitter=MAX_JITTER, clock=time.time,
+                 name='scheduler'):
+        """
+        :type executor: zoom.agent.entities.executor.Executor or None
+            Without one, jobs run on the scheduler thread.
+        :type jitter: int or float
+            First runs are delayed by a random part of the interval, up to
+            this many seconds, so predicates created together do not poll
+            together.
+        :type clock: types.FunctionType
+        :type name: str
+        """
+        self._executor = executor
+        self._jitter = jitter
+        self._clock = clock
+        self._name = name
+        self._log = logging.getLogger('sent.scheduler')
+        self._condition = Condition(Lock())
+        self._heap = list()  # [(due, sequence, job, run)]
+        self._timeouts = dict()  # {job: timeout entry of the running run}
+        self._sequence = itertools.count()
+        self._jobs = set()
+        self._running = False
+        self._thread = None
+        self._lag = LatencyHistogram()
+        self._stats = {'runs': 0, 'failed': 0, 'timeouts': 0}
+
+    @property
+    def stats(self):
+        """
+        :rtype: dict
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats['jobs'] = len(self._jobs)
+        stats['lag'] = self._lag.to_dictionary()
+        if self._executor is not None:
+            stats['executor'] = self._executor.stats
+        return stats
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._thread = Thread(target=self._loop, name=self._name)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """
+        Drop all jobs. Runs in progress are not waited for.
+        """
+        with self._condition:
+            self._running = False
+            for job in self._jobs:
+                job.cancelled = True
+            self._jobs.clear()
+            del self._heap[:]
+            self._timeouts.clear()
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def schedule(self, function, interval, timeout=None, on_timeout=None,
+                 name=None, delay=None):
+        """
+        :type function: types.FunctionType
+        :type interval: int or float
+        :type timeout: int or float or None
+        :type on_timeout: types.FunctionType or None
+        :type name: str or None
+        :type delay: int or float or None
+            Seconds to the first run. By default a random jitter.
+        :rtype: zoom.agent.entities.scheduler.ScheduledJob
+        """
+        job = ScheduledJob(self, function, interval, timeout=timeout,
+                           on_timeout=on_timeout, name=name)
+        if delay is None:
+            delay = random.uniform(0, min(job.interval, self._jitter))
+        with self._condition:
+            self._jobs.add(job)
+            self._push(self._clock() + delay, job)
+        return job
+
+    def cancel(self, job):
+        """
+        :type job: zoom.agent.entities.scheduler.ScheduledJob
+        """
+        with self._condition:
+            if job.cancelled:
+                return
+            job.cancelled = True
+            self._jobs.discard(job)
+            # left in the heap, it is skipped when it comes up
+
+    def _push(self, due, job, run=None):
+        """
+        Call with the lock held.
+        :type due: float
+        :type job: zoom.agent.entities.scheduler.ScheduledJob
+        :type run: int or None
+            For timeout entries, the run they belong to.
+        :rtype: tuple
+        """
+        entry = (due, next(self._sequence), job, run)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._condition.notify()
+        return entry
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                entry = None
+                while self._running:
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    due, _, job, run = self._heap[0]
+                    if job.cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+                    wait = due - self._clock()
+                    if wait > 0:
+                        self._condition.wait(wait)
+                        continue
+                    entry = heapq.heappop(self._heap)
+                    break
+
+                if entry is None:
+                    return
+                due, _, job, run = entry
+                if run is None:
+                    timed_out = False
+                elif job.running and job.runs == run:
+                    self._timeouts.pop(job, None)
+                    job.timeouts += 1
+                    self._stats['timeouts'] += 1
+                    timed_out = True
+                else:
+                    continue  # that run is over
+
+            if timed_out:
+                self._timed_out(job)
+            else:
+                self._lag.add(self._clock() - due)
+                if self._executor is not None:
+                    self._executor.submit(self._run, job)
+                else:
+                    self._run(job)
+
+    def _run(self, job):
+        """
+        The timeout of a run counts from when it starts, not from when it
+        was handed to the executor.
+        :type job: zoom.agent.entities.scheduler.ScheduledJob
+        """
+        with self._condition:
+            job.running = True
+            job.runs += 1
+            if job.timeout is not None and self._running:
+                self._timeouts[job] = self._push(
+                    self._clock() + job.timeout, job, job.runs)
+
+        failed = False
+        try:
+            job.function()
+        except Exception:
+            failed = True
+            self._log.exception('Scheduled job {0} failed.'.format(job.name))
+        finally:
+            with self._condition:
+                job.running = False
+                self._drop_timeout(job)
+                self._stats['failed' if failed else 'runs'] += 1
+                if not job.cancelled and self._running:
+                    self._push(self._clock() + job.interval, job)
+
+    def _drop_timeout(self, job):
+        """
+        Take the timeout of a finished run out of the heap. Call with the
+        lock held.
+        :type job: zoom.agent.entities.scheduler.ScheduledJob
+        """
+        entry = self._timeouts.pop(job, None)
+        if entry is None:
+            return
+        try:
+            self._heap.remove(entry)
+        except ValueError:
+            return  # popped in the meantime
+        heapq.heapify(self._heap)
+
+    def _timed_out(self, job):
+        """
+        :type job: zoom.agent.entities.scheduler.ScheduledJob
+        """
+        self._log.warning('{0} has run longer than {1}s.'
+                          .format(job.name, job.timeout))
+        if job.on_timeout is not None:
+            try:
+                job.on_timeout()
+            except Exception:
+                self._log.exception('Timeout handler of {0} failed.'
+                                    .format(job.name))
@@ -3,32 +3,38 @@ import platform
 import time
 from threading import Thread
 
-from kazoo.client import KazooClient, KazooState
-from kazoo.exceptions import LockTimeout, ConnectionClosedError
+from kazoo.client import KazooState
+from kazoo.exceptions import (
+    CancelledError,
+    ConnectionClosedError,
+    ConnectionLoss,
+    LockTimeout,
+    SessionExpiredError
+)
 
-from zoom.common.constants import get_zk_conn_string
 from zoom.common.decorators import catch_exception
 from zoom.common.types import ApplicationState
 
 
 class StaggerLock(object):
     def __init__(self, temp_path, timeout,
-                 parent='None', acquire_lock=None, app_state=None):
+                 parent='None', acquire_lock=None, app_state=None,
+                 zkclient=None):
         """
         :type temp_path: str
         :type timeout: int
         :type parent: str
         :type acquire_lock: zoom.agent.entities.thread_safe_object.ThreadSafeObject or None
         :type app_state: zoom.agent.entities.thread_safe_object.ThreadSafeObject or None
+        :type zkclient: zoom.agent.entities.zk_session.ComponentSession
         """
         self._path = temp_path
         self._timeout = timeout
         self._parent = parent
         self._thread = None
         self._prev_state = None
-        self._zk = KazooClient(hosts=get_zk_conn_string(),
-                               timeout=60.0)
-        self._zk.add_listener(self._zk_listener)
+        self._zk = zkclient
+        self._lock = None
         self._log = logging.getLogger('sent.{0}.sl'.format(parent))
         self._counter = 0
         self._acquire_lock = acquire_lock
@@ -37,17 +43,15 @@ class StaggerLock(object):
     def join(self):
         if self._thread is not None and self._zk.connected:
             self._thread.join()
-            self._close()
-        else:
-            return
+        self._close()
 
     def start(self):
         """
         This method is to implement a staggered startup.
-        A new KazooClient is instantiated b/c of thread-safety issues with the
-        election.
+        The lock uses the session of the component, and gives up if the
+        connection is interrupted while staggering.
         """
-        self._zk.start()
+        self._zk.add_listener(self._zk_listener)
         self._acquire_lock.set_value(True)
         self._app_state.set_value(ApplicationState.STAGGERED)
         self._acquire()
@@ -57,6 +61,7 @@ class StaggerLock(object):
             while self._acquire_lock.value:
                 if self._zk.connected:
                     lock = self._zk.Lock(self._path, identifier=platform.node())
+                    self._lock = lock
                     if lock.acquire(blocking=True, timeout=5):
                         self._thread = Thread(target=self._sleep_and_unlock,
                                               args=(lock,),
@@ -74,22 +79,21 @@ class StaggerLock(object):
             self._log.debug('Lock timed out. Trying to acquire lock again.')
             self._acquire()
 
+        except CancelledError:
+            self._log.info('Stopped waiting for stagger lock.')
+
         except Exception as e:
             self._log.error('Unhandled exception: {0}'.format(e))
 
     def _close(self):
         try:
             self._thread = None
-            self._zk.stop()
-            self._zk.close()
-
-        # TypeError happens when stop() is called when already stopping
-        except TypeError:
-            pass
+            self._zk.remove_listener(self._zk_listener)
         except Exception as e:
             self._log.debug('Unhandled exception: {0}'.format(e))
 
-    @catch_exception(ConnectionClosedError)
+    @catch_exception(ConnectionClosedError, ConnectionLoss,
+                     SessionExpiredError)
     def _sleep_and_unlock(self, lck):
         self._log.info('Got stagger lock. Sleeping for {0} seconds.'
                        .format(self._timeout))
@@ -98,37 +102,23 @@ class StaggerLock(object):
         self._log.info('Released stagger lock.')
 
     def _close_connection(self):
-        self._close()
         self._acquire_lock.set_value(False)
+        if self._lock is not None:
+            # wakes up a blocking acquire
+            self._lock.cancel()
+        self._close()
 
     def _zk_listener(self, state):
         """
         The callback function that runs when the connection state to Zookeeper
-        changes.
-        Either passes or immediately spawns a new thread that resets any
-        watches, etc., so that it can listen to future connection state changes.
+        changes while staggering. The lock node may be gone once the
+        connection is interrupted, so stop trying to get the lock.
         """
         try:
             self._log.info('Zookeeper Connection went from {0} to {1}'
                            .format(self._prev_state, state))
-            if self._prev_state is None and state == KazooState.CONNECTED:
-                pass
-            elif self._prev_state == KazooState.LOST and state == KazooState.CONNECTED:
-                pass
-            elif self._prev_state == KazooState.CONNECTED and state == KazooState.SUSPENDED:
-                self._zk.handler.spawn(self._close_connection)
-            elif self._prev_state == KazooState.CONNECTED and state == KazooState.LOST:
-                self._zk.handler.spawn(self._close_connection)
-            elif self._prev_state == KazooState.SUSPENDED and state == KazooState.LOST:
-                self._zk.handler.spawn(self._close_connection)
-            elif self._prev_state == KazooState.SUSPENDED and state == KazooState.CONNECTED:
-                pass
-            elif state == KazooState.CONNECTED:
+            if state in (KazooState.SUSPENDED, KazooState.LOST):
                 self._zk.handler.spawn(self._close_connection)
-            else:
-                self._log.info('Zookeeper Connection in unknown state: {0}'
-                               .format(state))
-                return
             self._prev_state = state
 
         except Exception:
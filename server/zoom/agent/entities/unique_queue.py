@@ -1,13 +1,58 @@
 import logging
-from collections import deque
+import time
+from threading import RLock
 
 from zoom.agent.task.task import Task
 
+# tasks added to the head of the queue go before every priority
+HEAD = float('-inf')
 
-class UniqueQueue(deque):
-    def __init__(self):
-        deque.__init__(self)
+
+class _Node(object):
+    __slots__ = ('task', 'key', 'priority', 'enqueued', 'prev', 'next')
+
+    def __init__(self, task=None, key=None, priority=None, enqueued=None):
+        self.task = task
+        self.key = key
+        self.priority = priority
+        self.enqueued = enqueued
+        self.prev = self
+        self.next = self
+
+
+class UniqueQueue(object):
+    """
+    Queue of tasks, kept in a doubly linked list with an index by
+    (name, target, host), which is what makes two tasks equal. Membership
+    and removal take constant time.
+    Tasks run in the order they are added, unless the queue is given
+    priorities. Then a task added to the tail goes after the tasks of the
+    same or a more urgent priority but before the less urgent ones. That
+    suits queues the agent fills itself, not queues of operator commands,
+    where a stop sent after a start has to run after it. Tasks added to the
+    head go before all others.
+    Every change to the queue is reported to its listeners, so consumers
+    do not have to poll it.
+    """
+    def __init__(self, priorities=None, default_priority=99, clock=time.time):
+        """
+        :type priorities: dict or None
+            {task name: priority}, lower runs first, like SENTINEL_METHODS.
+            Without it, tasks are kept in the order they come in.
+        :type default_priority: int
+            Priority of tasks not in priorities
+        :type clock: types.FunctionType
+        """
         self._log = logging.getLogger('sent.q')
+        self._lock = RLock()
+        self._listeners = list()
+        self._clock = clock
+        self._priorities = priorities
+        self._default_priority = default_priority
+        self._root = _Node()
+        self._index = dict()  # {(name, target, host): [_Node]}
+        self._last = dict()  # {priority: last _Node with that priority}
+        self._length = 0
 
     def append_unique(self, task, sender='', first=False):
         """
@@ -20,17 +65,202 @@ class UniqueQueue(deque):
             self._log.error('Queue items must be of type Task.')
             return False
 
-        if task in self:
-            self._log.info('Object {0} already in queue. Not adding again.'
-                           .format(task))
-            return False
-        else:
-            if first:
-                self._log.info('{0} Adding "{1}" to the head of the queue.'
-                               .format(sender, task.name))
-                self.appendleft(task)
+        with self._lock:
+            if task in self:
+                self._log.info('Object {0} already in queue. Not adding again.'
+                               .format(task))
+                return False
+            else:
+                if first:
+                    self._log.info('{0} Adding "{1}" to the head of the queue.'
+                                   .format(sender, task.name))
+                    self.appendleft(task)
+                else:
+                    self._log.info('{0} Adding "{1}" to the tail of the queue.'
+                                   .format(sender, task.name))
+                    self.append(task)
+                return True
+
+    def append(self, task):
+        """
+        Add task after the others of its priority, even if an equal task is
+        already in the queue.
+        :type task: zoom.agent.task.task.Task
+        """
+        with self._lock:
+            priority = self._priority(task)
+            # the last node of the closest priority that is not less urgent
+            previous = self._root
+            for p, node in self._last.iteritems():
+                if p <= priority and (previous is self._root or
+                                      p > previous.priority):
+                    previous = node
+            self._insert(previous, task, priority)
+
+    def appendleft(self, task):
+        """
+        :type task: zoom.agent.task.task.Task
+        """
+        with self._lock:
+            self._insert(self._root, task, HEAD)
+
+    def remove(self, task):
+        """
+        Remove task, or else the task equal to it that was added first.
+        :raises ValueError: if there is none
+        """
+        with self._lock:
+            nodes = self._index.get(self._key(task), None)
+            if not nodes:
+                raise ValueError('{0} is not in the queue.'.format(task))
+            node = nodes[0]
+            for n in nodes:
+                if n.task is task:
+                    node = n
+                    break
+            self._unlink(node)
+            self._changed()
+
+    def clear(self, keep=()):
+        """
+        :type keep: tuple
+            Names of tasks to leave in the queue
+        :rtype: list
+            The removed tasks
+        """
+        with self._lock:
+            removed = list()
+            node = self._root.next
+            while node is not self._root:
+                following = node.next
+                if node.task.name not in keep:
+                    removed.append(node.task)
+                    self._unlink(node)
+                node = following
+            self._changed()
+            return removed
+
+    def enqueued_at(self, task):
+        """
+        :type task: zoom.agent.task.task.Task
+        :rtype: float or None
+            When this task object was added to the queue.
+        """
+        with self._lock:
+            for node in self._index.get(self._key(task), ()):
+                if node.task is task:
+                    return node.enqueued
+            return None
+
+    def add_listener(self, listener):
+        """
+        :type listener: types.FunctionType
+            Called without arguments after every change, with the queue
+            locked. It must not wait for other threads.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        :type listener: types.FunctionType
+        """
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def __contains__(self, task):
+        return bool(self._index.get(self._key(task), None))
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        with self._lock:
+            tasks = list()
+            node = self._root.next
+            while node is not self._root:
+                tasks.append(node.task)
+                node = node.next
+        return iter(tasks)
+
+    def __getitem__(self, index):
+        with self._lock:
+            if index == 0 and self._length:
+                return self._root.next.task
+            elif index == -1 and self._length:
+                return self._root.prev.task
+            return list(self)[index]
+
+    def __repr__(self):
+        return '{0}({1})'.format(self.__class__.__name__, list(self))
+
+    def _priority(self, task):
+        """
+        :type task: zoom.agent.task.task.Task
+        :rtype: int
+        """
+        if self._priorities is None:
+            return 0
+        return self._priorities.get(task.name, self._default_priority)
+
+    def _key(self, task):
+        """
+        The fields Task.__eq__ compares.
+        :type task: zoom.agent.task.task.Task
+        :rtype: tuple
+        """
+        return (getattr(task, 'name', None), getattr(task, 'target', None),
+                getattr(task, 'host', None))
+
+    def _insert(self, previous, task, priority):
+        """
+        Call with the lock held.
+        :type previous: _Node
+        :type task: zoom.agent.task.task.Task
+        :type priority: int or float
+        """
+        node = _Node(task, self._key(task), priority, self._clock())
+        node.prev = previous
+        node.next = previous.next
+        previous.next.prev = node
+        previous.next = node
+
+        last = self._last.get(priority, None)
+        if last is None or last is previous:
+            self._last[priority] = node
+        self._index.setdefault(node.key, list()).append(node)
+        self._length += 1
+        self._changed()
+
+    def _changed(self):
+        """
+        Call with the lock held.
+        """
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception:
+                self._log.exception('Queue listener {0} failed.'
+                                    .format(listener))
+
+    def _unlink(self, node):
+        """
+        Call with the lock held.
+        :type node: _Node
+        """
+        node.prev.next = node.next
+        node.next.prev = node.prev
+
+        if self._last.get(node.priority, None) is node:
+            if (node.prev is not self._root and
+                    node.prev.priority == node.priority):
+                self._last[node.priority] = node.prev
             else:
-                self._log.info('{0} Adding "{1}" to the tail of the queue.'
-                               .format(sender, task.name))
-                self.append(task)
-            return True
+                del self._last[node.priority]
+
+        nodes = self._index[node.key]
+        nodes.remove(node)
+        if not nodes:
+            del self._index[node.key]
+        self._length -= 1
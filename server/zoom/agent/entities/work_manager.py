@@ -1,89 +1,154 @@
 import logging
 import pprint
 import time
-from threading import Thread
+from threading import Event, Lock, current_thread
 
 from zoom.agent.entities.thread_safe_object import ThreadSafeObject
-
-
-class ThreadWithReturn(Thread):
-    def __init__(self, *args, **kwargs):
-        super(ThreadWithReturn, self).__init__(*args, **kwargs)
-
-        self._return = None
-
-    def run(self):
-        if self._Thread__target is not None:
-            self._return = self._Thread__target(*self._Thread__args,
-                                                **self._Thread__kwargs)
-
-    def join(self, *args, **kwargs):
-        super(ThreadWithReturn, self).join(*args, **kwargs)
-
-        return self._return
+from zoom.agent.util.histogram import LatencyHistogram
 
 
 class WorkManager(object):
-    def __init__(self, comp_name, queue, work_dict):
+    """
+    Runs the tasks of one component's queue on the agent's shared executor.
+    At most one step of a component is submitted at a time, so its tasks
+    still run in queue order, and a blocking task holds back the ones behind
+    it. Non-blocking tasks are handed to the executor on their own.
+    """
+    def __init__(self, comp_name, queue, work_dict, executor,
+                 step_executor=None, clock=time.time):
         """
         :type comp_name: str
         :type queue: zoom.agent.entities.unique_queue.UniqueQueue
         :type work_dict: dict
+        :type executor: zoom.agent.entities.executor.Executor
+        :type step_executor: zoom.agent.entities.executor.Executor or None
+            Runs the steps, and with them the blocking tasks. Steps can wait
+            for minutes, on a stagger lock or a process, so this should be a
+            growable executor. Defaults to executor.
+        :type clock: types.FunctionType
         """
-        self._operate = ThreadSafeObject(True)
-        self._thread = Thread(target=self._run,
-                              name='work_manager',
-                              args=(self._operate, queue, work_dict))
-        self._thread.daemon = True
+        self._operate = ThreadSafeObject(False)
+        self._queue = queue
+        self._work_dict = work_dict
+        self._executor = executor
+        self._step_executor = step_executor or executor
+        self._clock = clock
+        self._latency = dict()  # {task name: LatencyHistogram}
+        self._latency_lock = Lock()
+        self._lock = Lock()
+        self._scheduled = False
+        self._worker = None  # thread running the current step
+        self._idle = Event()
+        self._idle.set()
         self._log = logging.getLogger('sent.{0}.wm'.format(comp_name))
 
     def start(self):
         self._log.info('starting work manager')
-        self._thread.start()
+        self._operate.set_value(True)
+        # the listener runs once for every change, so look at what is
+        # already queued too
+        self._queue.add_listener(self._schedule)
+        self._schedule()
+
+    @property
+    def latency(self):
+        """
+        Time from adding a task to the queue to starting it, per task name.
+        :rtype: dict
+        """
+        with self._latency_lock:
+            histograms = self._latency.items()
+        return dict((name, h.to_dictionary()) for name, h in histograms)
 
     def stop(self):
+        """
+        Wait for the running step, unless called from it.
+        """
         self._log.info('Stopping work manager.')
         self._operate.set_value(False)
-        self._thread.join()
+        self._queue.remove_listener(self._schedule)
+        with self._lock:
+            own_thread = self._worker is current_thread()
+        if not own_thread:
+            self._idle.wait()
         self._log.info('Stopped work manager.')
 
-    def _run(self, operate, queue, work_dict):
+    def _schedule(self):
         """
-        :type operate: zoom.agent.entities.thread_safe_object.ThreadSafeObject
-        :type queue: zoom.agent.entities.unique_queue.UniqueQueue
-        :type work_dict: dict
+        Queue listener, submit a step unless one is pending already.
         """
-        while operate == True:
-            if queue:  # if queue is not empty
-                self._log.info('Current Task Queue:\n{0}'
-                               .format(pprint.pformat(list(queue))))
-                task = queue[0]  # grab task, but keep it in the queue
-
-                if task.func is None:
-                    func_to_run = work_dict.get(task.name, None)
+        with self._lock:
+            if self._scheduled or self._operate == False or not self._queue:
+                return
+            self._scheduled = True
+            self._idle.clear()
+        self._step_executor.submit(self._step)
+
+    def _step(self):
+        """
+        Run the task at the head of the queue, then submit the next step.
+        """
+        with self._lock:
+            self._worker = current_thread()
+        try:
+            if self._operate == True and self._queue:
+                self._run(self._queue)
+        finally:
+            # a task added before this point is either seen here or
+            # finds _scheduled False in _schedule
+            with self._lock:
+                self._worker = None
+                if self._operate == False or not self._queue:
+                    self._scheduled = False
+                    self._idle.set()
                 else:
-                    func_to_run = task.func
+                    self._step_executor.submit(self._step)
 
-                if func_to_run is not None:
-                    self._log.info('Found work "{0}" in queue.'
-                                   .format(task.name))
-                    t = ThreadWithReturn(target=func_to_run, name=task.name,
-                                         args=task.args, kwargs=task.kwargs)
-                    t.start()
-
-                    if task.block:
-                        task.result = t.join()
-
-                else:
-                    self._log.warning('Cannot do "{0}", it is not a valid '
-                                      'action.'.format(task.name))
+    def _run(self, queue):
+        """
+        :type queue: zoom.agent.entities.unique_queue.UniqueQueue
+        """
+        self._log.info('Current Task Queue:\n{0}'
+                       .format(pprint.pformat(list(queue))))
+        try:
+            task = queue[0]  # grab task, but keep it in the queue
+        except IndexError:
+            return  # cleared in the meantime
+
+        if task.func is None:
+            func_to_run = self._work_dict.get(task.name, None)
+        else:
+            func_to_run = task.func
+
+        if func_to_run is not None:
+            self._log.info('Found work "{0}" in queue.'.format(task.name))
+            self._record_latency(task, queue.enqueued_at(task))
+            if task.block:
                 try:
-                    queue.remove(task)
-                except ValueError:
-                    self._log.debug('Item no longer exists in the queue: {0}'
-                                    .format(task))
+                    task.result = func_to_run(*task.args, **task.kwargs)
+                except Exception:
+                    self._log.exception('Work "{0}" failed.'
+                                        .format(task.name))
             else:
-                time.sleep(1)
-
-        self._log.info('Done listening for work.')
-        return
+                self._executor.submit(func_to_run, *task.args, **task.kwargs)
+        else:
+            self._log.warning('Cannot do "{0}", it is not a valid '
+                              'action.'.format(task.name))
+        try:
+            queue.remove(task)
+        except ValueError:
+            self._log.debug('Item no longer exists in the queue: {0}'
+                            .format(task))
+
+    def _record_latency(self, task, enqueued):
+        """
+        :type task: zoom.agent.task.task.Task
+        :type enqueued: float or None
+        """
+        if enqueued is None:
+            return
+        with self._latency_lock:
+            histogram = self._latency.get(task.name, None)
+            if histogram is None:
+                histogram = self._latency[task.name] = LatencyHistogram()
+        histogram.add(self._clock() - enqueued)
@@ -0,0 +1,439 @@
+import logging
+from threading import Lock, RLock
+
+from kazoo.client import KazooClient, KazooState
+from kazoo.exceptions import NoNodeError
+from kazoo.handlers.threading import SequentialThreadingHandler
+
+from zoom.common.constants import get_zk_conn_string
+
+
+class SharedSession(object):
+    """
+    One ZooKeeper session shared by several components of an agent.
+    Components use it through a ComponentSession, which keeps track of
+    their own listeners, watches, locks and ephemeral nodes.
+    Kazoo delivers all watch and listener callbacks of a session on a
+    single handler thread, so one slow callback delays those of every
+    other component on the same session.
+    """
+    def __init__(self, name='shared', hosts=None, timeout=60.0, client=None):
+        """
+        :type name: str
+        :type hosts: str or None
+            Defaults to the ensemble of the current environment.
+        :type timeout: float
+        :type client: kazoo.client.KazooClient or None
+        """
+        self.name = name
+        if client is None:
+            client = KazooClient(
+                hosts=hosts or get_zk_conn_string(),
+                timeout=timeout,
+                handler=SequentialThreadingHandler(),
+                logger=logging.getLogger('kazoo.session.{0}'.format(name)))
+        self.client = client
+        self.client.add_listener(self._listener)
+        self._log = logging.getLogger('sent.session.{0}'.format(name))
+        self._lock = RLock()
+        self._start_lock = Lock()
+        self._started = False
+        self._state = None  # last state seen by the listener
+        self._views = list()
+
+    @property
+    def state(self):
+        """
+        :rtype: str or None
+        """
+        return self._state
+
+    @property
+    def views(self):
+        """
+        :rtype: list
+        """
+        with self._lock:
+            return list(self._views)
+
+    def view(self, name):
+        """
+        :type name: str
+        :rtype: ComponentSession
+        """
+        view = ComponentSession(self, name)
+        with self._lock:
+            self._views.append(view)
+        return view
+
+    def start(self):
+        """
+        Connect, unless already connected. Safe to call from any component.
+        """
+        with self._start_lock:
+            if not self._started:
+                self._log.info('Starting shared ZooKeeper session.')
+                self.client.start()
+                self._started = True
+
+    def stop(self):
+        with self._start_lock:
+            if self._started:
+                self._log.info('Stopping shared ZooKeeper session.')
+                self.client.stop()
+                self.client.close()
+                self._started = False
+
+    def remove(self, view):
+        """
+        :type view: ComponentSession
+        """
+        with self._lock:
+            if view in self._views:
+                self._views.remove(view)
+
+    def _listener(self, state):
+        """
+        Runs in the connection thread of the client.
+        :type state: kazoo.protocol.states.KazooState
+        """
+        with self._lock:
+            self._state = state
+            views = list(self._views)
+        self._log.info('Connection is {0}, notifying {1} components.'
+                       .format(state, len(views)))
+        for view in views:
+            view.notify(state)
+
+
+class ComponentSession(object):
+    """
+    What a component sees of a SharedSession. Offers the parts of the
+    KazooClient interface the agent uses. Stopping it forgets its listeners
+    and watches, gives up its locks and deletes its ephemeral nodes, as
+    closing its own client used to, but keeps the session open for the
+    other components.
+    """
+    def __init__(self, session, name):
+        """
+        :type session: SharedSession
+        :type name: str
+        """
+        self.name = name
+        self._session = session
+        self._client = session.client
+        self._log = logging.getLogger('sent.{0}.session'.format(name))
+        self._lock = RLock()
+        self._started = False
+        self._closed = False
+        self._listeners = list()
+        self._watchers = dict()  # {(path, callback): wrapped callback}
+        self._locks = set()  # ComponentLocks acquiring or held
+        self._generation = 0  # watches of earlier starts stay quiet
+        self._ephemerals = set()
+
+    @property
+    def connected(self):
+        """
+        :rtype: bool
+        """
+        return not self._closed and self._client.connected
+
+    @property
+    def handler(self):
+        return self._client.handler
+
+    @property
+    def state(self):
+        return self._client.state
+
+    @property
+    def closed(self):
+        """
+        :rtype: bool
+        """
+        return self._closed
+
+    @property
+    def watches(self):
+        """
+        :rtype: int
+            Watches of this component that have not fired yet.
+        """
+        return len(self._watchers)
+
+    def add_listener(self, listener):
+        """
+        :type listener: types.FunctionType
+        """
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        :type listener: types.FunctionType
+        """
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def start(self):
+        """
+        Start receiving connection state changes. If the session is already
+        connected, the listeners are told right away, as they would have
+        been by a client of their own.
+        """
+        with self._lock:
+            self._started = True
+            self._closed = False
+        connected = self._session.state == KazooState.CONNECTED
+        self._session.start()
+        if connected:
+            self.notify(KazooState.CONNECTED)
+
+    def stop(self):
+        """
+        Release the locks and delete the ephemeral nodes of this component,
+        and stop calling its listeners and watches.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._started = False
+            locks = list(self._locks)
+            self._locks.clear()
+            ephemerals = list(self._ephemerals)
+            self._ephemerals.clear()
+            self._watchers.clear()
+            self._generation += 1
+
+        for lock in locks:
+            lock.abandon()
+
+        if self._client.connected:
+            for path in ephemerals:
+                try:
+                    self._client.delete(path)
+                except NoNodeError:
+                    pass
+                except Exception as e:
+                    self._log.warning('Could not delete {0}: {1}'
+                                      .format(path, e))
+
+    def close(self):
+        self.stop()
+        self._session.remove(self)
+
+    def notify(self, state):
+        """
+        :type state: kazoo.protocol.states.KazooState
+        """
+        with self._lock:
+            if not self._started or self._closed:
+                return
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(state)
+            except Exception:
+                self._log.exception('Listener {0} failed.'.format(listener))
+
+    def exists(self, path, watch=None):
+        return self._client.exists(path, watch=self._watcher(path, watch))
+
+    def get(self, path, watch=None):
+        return self._client.get(path, watch=self._watcher(path, watch))
+
+    def get_children(self, path, watch=None, include_data=False):
+        return self._client.get_children(path,
+                                         watch=self._watcher(path, watch),
+                                         include_data=include_data)
+
+    def create(self, path, value='', acl=None, ephemeral=False,
+               sequence=False, makepath=False):
+        created = self._client.create(path, value=value, acl=acl,
+                                      ephemeral=ephemeral, sequence=sequence,
+                                      makepath=makepath)
+        if ephemeral:
+            with self._lock:
+                self._ephemerals.add(created)
+        return created
+
+    def delete(self, path, version=-1, recursive=False):
+        with self._lock:
+            self._ephemerals.discard(path)
+        return self._client.delete(path, version=version, recursive=recursive)
+
+    def set(self, path, value, version=-1):
+        return self._client.set(path, value, version=version)
+
+    def ensure_path(self, path, acl=None):
+        return self._client.ensure_path(path, acl=acl)
+
+    def Lock(self, path, identifier=None):
+        """
+        :rtype: ComponentLock
+        """
+        return ComponentLock(self,
+                             self._client.Lock(path, identifier=identifier))
+
+    def _track_lock(self, lock, active):
+        """
+        :type lock: ComponentLock
+        :type active: bool
+            Whether the lock is acquiring or held.
+        """
+        with self._lock:
+            if active:
+                self._locks.add(lock)
+            else:
+                self._locks.discard(lock)
+
+    def _watcher(self, path, callback):
+        """
+        Until its watch fires, the same callback on the same node is wrapped
+        by the same function, so the client still registers it only once.
+        Watches fire once, so the wrapper is forgotten when it is called.
+        Wrappers from before a stop never call their callback.
+        :type path: str
+        :type callback: types.FunctionType or None
+        :rtype: types.FunctionType or None
+        """
+        if callback is None:
+            return None
+
+        key = (path, callback)
+        with self._lock:
+            if self._closed:
+                return None
+            wrapped = self._watchers.get(key, None)
+            if wrapped is None:
+                generation = self._generation
+
+                def wrapped(event):
+                    with self._lock:
+                        if self._watchers.get(key, None) is wrapped:
+                            del self._watchers[key]
+                        current = (generation == self._generation and
+                                   not self._closed)
+                    if current:
+                        callback(event)
+
+                self._watchers[key] = wrapped
+            return wrapped
+
+    def __repr__(self):
+        return 'ComponentSession(name={0}, session={1})'\
+            .format(self.name, self._session.name)
+
+
+class ComponentLock(object):
+    """
+    A kazoo Lock that its ComponentSession gives up when it stops, as the
+    lock node would have gone with a client of the component's own.
+    """
+    def __init__(self, session, lock):
+        """
+        :type session: ComponentSession
+        :type lock: kazoo.recipe.lock.Lock
+        """
+        self._session = session
+        self._lock = lock
+
+    def acquire(self, blocking=True, timeout=None):
+        """
+        :type blocking: bool
+        :type timeout: float or None
+        :rtype: bool
+        """
+        self._session._track_lock(self, True)
+        acquired = False
+        try:
+            acquired = self._lock.acquire(blocking=blocking, timeout=timeout)
+            return acquired
+        finally:
+            if not acquired:
+                self._session._track_lock(self, False)
+
+    def release(self):
+        """
+        :rtype: bool
+        """
+        self._session._track_lock(self, False)
+        return self._lock.release()
+
+    def cancel(self):
+        self._lock.cancel()
+
+    def abandon(self):
+        """
+        Stop a pending acquire and release the lock if held.
+        """
+        self._lock.cancel()
+        try:
+            self._lock.release()
+        except Exception as e:
+            logging.getLogger('sent.session').warning(
+                'Could not release {0}: {1}'.format(self, e))
+
+    def __getattr__(self, name):
+        return getattr(self._lock, name)
+
+    def __repr__(self):
+        return 'ComponentLock(path={0})'.format(
+            getattr(self._lock, 'path', None))
+
+
+class SessionPool(object):
+    """
+    A small number of shared sessions. Each component is put on the
+    session with the fewest components.
+    All components on one session share its callback thread, so an agent
+    whose components have slow watches or listeners should use a larger
+    pool (session_pool_size), at the cost of more ZooKeeper connections.
+    """
+    def __init__(self, size=1, hosts=None, timeout=60.0):
+        """
+        :type size: int
+        :type hosts: str or None
+        :type timeout: float
+        """
+        self._sessions = [SharedSession(name='shared{0}'.format(i),
+                                        hosts=hosts, timeout=timeout)
+                          for i in xrange(max(int(size), 1))]
+        self._lock = Lock()
+
+    @property
+    def sessions(self):
+        """
+        :rtype: list
+        """
+        return list(self._sessions)
+
+    @property
+    def stats(self):
+        """
+        :rtype: dict
+        """
+        return {
+            'sessions': len(self._sessions),
+            'components': [len(s.views) for s in self._sessions],
+            'watches': sum(v.watches for s in self._sessions
+                           for v in s.views),
+            'states': [s.state for s in self._sessions]
+        }
+
+    def view(self, name):
+        """
+        :type name: str
+        :rtype: ComponentSession
+        """
+        with self._lock:
+            session = min(self._sessions, key=lambda s: len(s.views))
+            return session.view(name)
+
+    def stop(self):
+        for session in self._sessions:
+            session.stop()
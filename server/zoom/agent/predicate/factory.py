@@ -23,15 +23,17 @@ from zoom.common.decorators import catch_exception
 
 class PredicateFactory(object):
     def __init__(self, component_name=None, action=None, zkclient=None,
-                 proc_client=None, system=None, pred_list=None, settings=None):
+                 proc_client=None, system=None, pred_list=None, settings=None,
+                 scheduler=None):
         """
         :type component_name: str or None
         :type action: str or None
-        :type zkclient: kazoo.client.KazooClient or None
+        :type zkclient: zoom.agent.entities.zk_session.ComponentSession or None
         :type proc_client: zoom.agent.client.process_client.ProcessClient
         :type system: zoom.common.types.PlatformType
         :type pred_list: list
         :type settings: dict
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler or None
         """
         self.zkclient = zkclient
         self._proc_client = proc_client
@@ -41,6 +43,7 @@ class PredicateFactory(object):
         self._log = logging.getLogger('sent.{0}.pred.factory'
                                       .format(component_name))
         self._pred_list = pred_list
+        self._scheduler = scheduler
         self._holiday_path = settings.get('zookeeper', {}).get('holiday')
 
     @catch_exception(Exception)
@@ -127,7 +130,8 @@ class PredicateFactory(object):
                                        self.zkclient,
                                        verify_attribute(root, 'path'),
                                        operational=operational,
-                                       parent=parent),
+                                       parent=parent,
+                                       scheduler=self._scheduler),
                 callback=callback
             )
         elif ptype == PredicateType.PROCESS:
@@ -136,7 +140,8 @@ class PredicateFactory(object):
                                  self._proc_client,
                                  verify_attribute(root, 'interval', cast=float),
                                  operational=operational,
-                                 parent=parent),
+                                 parent=parent,
+                                 scheduler=self._scheduler),
                 callback=callback
             )
         elif ptype == PredicateType.API:
@@ -149,8 +154,12 @@ class PredicateFactory(object):
                                                             none_allowed=True,
                                                             cast=int, default=200),
                              interval=verify_attribute(root, 'interval', cast=float),
+                             timeout=verify_attribute(root, 'timeout',
+                                                      none_allowed=True,
+                                                      cast=float, default=2.0),
                              operational=operational,
-                             parent=parent),
+                             parent=parent,
+                             scheduler=self._scheduler),
                 callback=callback
             )
         elif ptype == PredicateType.HEALTH:
@@ -160,7 +169,11 @@ class PredicateFactory(object):
                                 verify_attribute(root, 'interval', cast=float),
                                 self._system,
                                 operational=operational,
-                                parent=parent),
+                                parent=parent,
+                                timeout=verify_attribute(root, 'timeout',
+                                                         none_allowed=True,
+                                                         cast=float),
+                                scheduler=self._scheduler),
                 callback=callback
             )
         elif ptype == PredicateType.HOLIDAY:
@@ -168,13 +181,15 @@ class PredicateFactory(object):
                                                      self.zkclient,
                                                      path=self._holiday_path,
                                                      operational=operational,
-                                                     parent=parent),
+                                                     parent=parent,
+                                                     scheduler=self._scheduler),
                                     callback=callback
                                     )
         elif ptype == PredicateType.WEEKEND:
             return self._ensure_new(PredicateWeekend(self._component_name,
                                                      operational=operational,
-                                                     parent=parent),
+                                                     parent=parent,
+                                                     scheduler=self._scheduler),
                                     callback=callback
                                     )
         elif ptype == PredicateType.TIMEWINDOW:
@@ -186,7 +201,8 @@ class PredicateFactory(object):
                            weekdays=verify_attribute(root, 'weekdays',
                                                      none_allowed=True),
                            operational=operational,
-                           parent=parent),
+                           parent=parent,
+                           scheduler=self._scheduler),
                 callback=callback
             )
 
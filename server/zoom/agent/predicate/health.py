@@ -2,17 +2,15 @@ import logging
 import os.path
 import shlex
 from subprocess import Popen, PIPE
-from threading import Thread
-from time import sleep
 
 from zoom.common.types import PlatformType
-from zoom.agent.entities.thread_safe_object import ThreadSafeObject
-from zoom.agent.predicate.simple import SimplePredicate
+from zoom.agent.predicate.polling import PollingPredicate
 
 
-class PredicateHealth(SimplePredicate):
+class PredicateHealth(PollingPredicate):
     def __init__(self, comp_name, command, interval, system,
-                 operational=False, parent=None):
+                 operational=False, parent=None, timeout=None,
+                 scheduler=None):
         """
         :type comp_name: str
         :type command: str
@@ -20,39 +18,21 @@ class PredicateHealth(SimplePredicate):
         :type system: zoom.common.types.PlatformType
         :type operational: bool
         :type parent: str or None
+        :type timeout: int or float or None
+            Seconds after which a running check is killed
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler or None
         """
-        SimplePredicate.__init__(self, comp_name, operational=operational, parent=parent)
+        PollingPredicate.__init__(self, comp_name, interval,
+                                  operational=operational, parent=parent,
+                                  timeout=timeout, scheduler=scheduler)
         self._log = logging.getLogger('sent.{0}.pred.health'.format(comp_name))
-        self.interval = interval
         self.rawcmd = command
         self._runcmd = str()
         self._system = system
+        self._process = None
         self._verify()
 
-        self._operate = ThreadSafeObject(True)
-        self._thread = Thread(target=self._run_loop, name=str(self))
-        self._thread.daemon = True
         self._log.info('Registered {0}'.format(self))
-        self._started = False
-
-    def start(self):
-        if self._started is False:
-            self._log.debug('Starting {0}'.format(self))
-            self._started = True
-            self._thread.start()
-            self._block_until_started()
-        else:
-            self._log.debug('Already started {0}'.format(self))
-
-    def stop(self):
-        if self._started is True:
-            self._log.info('Stopping {0}'.format(self))
-            self._started = False
-            self._operate.set_value(False)
-            self._thread.join()
-            self._log.info('{0} stopped'.format(self))
-        else:
-            self._log.debug('Already stopped {0}'.format(self))
 
     def _verify(self):
         if self._system == PlatformType.LINUX:
@@ -84,8 +64,9 @@ class PredicateHealth(SimplePredicate):
         return code. (Non-zero equals failure)
         :rtype: bool
         """
-        p = Popen(self._runcmd, stdout=PIPE, stderr=PIPE)
+        p = self._process = Popen(self._runcmd, stdout=PIPE, stderr=PIPE)
         out, err = p.communicate()
+        self._process = None
 
         if err:
             self._log.error('There was some error with the check "{0}"\n{1}'
@@ -98,11 +79,18 @@ class PredicateHealth(SimplePredicate):
             self._log.debug('Check "{0}" has succeeded.'.format(self.rawcmd))
             self.set_met(True)
 
-    def _run_loop(self):
-        while self._operate == True:
-            self._run()
-            sleep(self.interval)
-        self._log.info('Done running {0}'.format(self))
+    def _poll(self):
+        self._run()
+
+    def _on_timeout(self):
+        process = self._process
+        if process is not None:
+            self._log.error('Check "{0}" did not finish within {1}s. '
+                            'Killing it.'.format(self.rawcmd, self.timeout))
+            try:
+                process.kill()
+            except OSError:
+                pass  # it exited in the meantime
 
     def __repr__(self):
         return ('{0}(component={1}, parent={2}, cmd="{3}", interval={4} '
@@ -1,16 +1,13 @@
 import logging
 import datetime
-from time import sleep
-from threading import Thread
 
-from zoom.agent.predicate.simple import SimplePredicate
-from zoom.agent.entities.thread_safe_object import ThreadSafeObject
+from zoom.agent.predicate.polling import PollingPredicate
 from zoom.common.decorators import connected
 
 
-class PredicateHoliday(SimplePredicate):
+class PredicateHoliday(PollingPredicate):
     def __init__(self, comp_name, zkclient, path,
-                 operational=False, parent=None, interval=10):
+                 operational=False, parent=None, interval=10, scheduler=None):
         """
         :type comp_name: str
         :type zkclient: kazoo.client.KazooClient
@@ -18,18 +15,15 @@ class PredicateHoliday(SimplePredicate):
         :type operational: bool
         :type parent: str or None
         :type interval: int or float
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler or None
         """
-        SimplePredicate.__init__(self, comp_name, operational=operational, parent=parent)
+        PollingPredicate.__init__(self, comp_name, interval,
+                                  operational=operational, parent=parent,
+                                  scheduler=scheduler)
         self.zkclient = zkclient
-        self.interval = interval
         self.path = path
         self._log = logging.getLogger('sent.{0}.holiday'.format(comp_name))
         self._log.info('Registered {0}'.format(self))
-
-        self._operate = ThreadSafeObject(True)
-        self._thread = Thread(target=self._run_loop, name=str(self))
-        self._thread.daemon = True
-        self._started = False
         self._holidays = list()
 
     @property
@@ -42,29 +36,11 @@ class PredicateHoliday(SimplePredicate):
 
     def start(self):
         if self._started is False:
-            self._log.debug('Starting {0}'.format(self))
-            self._started = True
             self._watch_node()
-            self._thread.start()
-            self._block_until_started()
-        else:
-            self._log.debug('Already started {0}'.format(self))
+        PollingPredicate.start(self)
 
-    def stop(self):
-        if self._started is True:
-            self._log.info('Stopping {0}'.format(self))
-            self._started = False
-            self._operate.set_value(False)
-            self._thread.join()
-            self._log.info('{0} stopped'.format(self))
-        else:
-            self._log.debug('Already stopped {0}'.format(self))
-
-    def _run_loop(self):
-        while self._operate == True:
-            self._process_met()
-            sleep(self.interval)
-        self._log.info('Done checking for holiday.')
+    def _poll(self):
+        self._process_met()
 
     def _process_met(self):
         self.set_met(self.date_string in self._holidays)
@@ -0,0 +1,69 @@
+from abc import ABCMeta, abstractmethod
+
+from zoom.agent.entities.scheduler import get_default_scheduler
+from zoom.agent.predicate.simple import SimplePredicate
+
+
+class PollingPredicate(SimplePredicate):
+    """
+    Predicate that checks something every interval. The checks run on the
+    agent's Scheduler instead of a thread of their own.
+    Subclasses implement _poll.
+    """
+    __metaclass__ = ABCMeta
+
+    def __init__(self, comp_name, interval, operational=False, parent=None,
+                 timeout=None, scheduler=None):
+        """
+        :type comp_name: str
+        :type interval: int or float
+        :type operational: bool
+        :type parent: str or None
+        :type timeout: int or float or None
+            Seconds a check may take before _on_timeout is called.
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler or None
+        """
+        SimplePredicate.__init__(self, comp_name, operational=operational,
+                                 parent=parent)
+        self.interval = interval
+        self.timeout = timeout
+        self._scheduler = scheduler
+        self._job = None
+
+    def start(self):
+        if self._started is False:
+            self._log.debug('Starting {0}'.format(self))
+            self._started = True
+            scheduler = self._scheduler or get_default_scheduler()
+            self._job = scheduler.schedule(self._poll, self.interval,
+                                           timeout=self.timeout,
+                                           on_timeout=self._on_timeout,
+                                           name=str(self))
+            self._block_until_started()
+        else:
+            self._log.debug('Already started {0}'.format(self))
+
+    def stop(self):
+        if self._started is True:
+            self._log.info('Stopping {0}'.format(self))
+            self._started = False
+            if self._job is not None:
+                self._job.cancel()
+                self._job = None
+            self._log.info('{0} stopped'.format(self))
+        else:
+            self._log.debug('Already stopped {0}'.format(self))
+
+    @abstractmethod
+    def _poll(self):
+        """
+        Check once and set met.
+        """
+
+    def _on_timeout(self):
+        """
+        Called from the scheduler while a check is taking too long.
+        """
+        self._log.warning('{0} did not finish within {1}s.'
+                          .format(self, self.timeout))
+        self.set_met(False)
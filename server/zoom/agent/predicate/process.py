@@ -1,23 +1,23 @@
 import logging
-from threading import Thread
-from time import sleep
 from multiprocessing import Lock
 
-from zoom.agent.predicate.simple import SimplePredicate
-from zoom.agent.entities.thread_safe_object import ThreadSafeObject
+from zoom.agent.predicate.polling import PollingPredicate
 
 
-class PredicateProcess(SimplePredicate):
+class PredicateProcess(PollingPredicate):
     def __init__(self, comp_name, proc_client, interval,
-                 operational=False, parent=None):
+                 operational=False, parent=None, scheduler=None):
         """
         :type comp_name: str
         :type proc_client: zoom.agent.client.process_client.ProcessClient
         :type interval: int or float
         :type operational: bool
         :type parent: str or None
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler or None
         """
-        SimplePredicate.__init__(self, comp_name, operational=operational, parent=parent)
+        PollingPredicate.__init__(self, comp_name, interval,
+                                  operational=operational, parent=parent,
+                                  scheduler=scheduler)
         self._log = logging.getLogger('sent.{0}.pred.process'.format(comp_name))
         self._proc_client = proc_client
 
@@ -27,11 +27,7 @@ class PredicateProcess(SimplePredicate):
         else:
             self.process_client_lock = Lock()
 
-        self.interval = interval
-        self._operate = ThreadSafeObject(True)
-        self._thread = Thread(target=self._run_loop, name=str(self))
-        self._thread.daemon = True
-        self._started = False
+        self._cancel_counter = 0
 
     def running(self):
         """
@@ -42,41 +38,17 @@ class PredicateProcess(SimplePredicate):
         """
         return self._proc_client.running()
 
-    def start(self):
-        if self._started is False:
-            self._log.debug('Starting {0}'.format(self))
-            self._started = True
-            self._thread.start()
-            self._block_until_started()
+    def _poll(self):
+        if self._proc_client.cancel_flag == False:
+            self.set_met(self.running())
+            self._cancel_counter = 0
+        elif self._cancel_counter > 1:
+            self._log.info('Waited long enough. Resetting cancel flag.')
+            self._proc_client.cancel_flag.set_value(False)
+            self._cancel_counter = 0
         else:
-            self._log.debug('Already started {0}'.format(self))
-
-    def stop(self):
-        if self._started is True:
-            self._log.info('Stopping {0}'.format(self))
-            self._started = False
-            self._operate.set_value(False)
-            self._thread.join()
-            self._log.info('{0} stopped'.format(self))
-        else:
-            self._log.debug('Already stopped {0}'.format(self))
-
-    def _run_loop(self):
-        cancel_counter = 0
-        while self._operate == True:
-            if self._proc_client.cancel_flag == False:
-                self.set_met(self.running())
-                cancel_counter = 0
-            elif cancel_counter > 1:
-                self._log.info('Waited long enough. Resetting cancel flag.')
-                self._proc_client.cancel_flag.set_value(False)
-                cancel_counter = 0
-            else:
-                cancel_counter += 1
-                self._log.info('Cancel Flag detected, skipping status check.')
-
-            sleep(self.interval)
-        self._log.info('Done watching process.')
+            self._cancel_counter += 1
+            self._log.info('Cancel Flag detected, skipping status check.')
 
     def __repr__(self):
         return ('{0}(component={1}, parent={2}, interval={3}, started={4}, '
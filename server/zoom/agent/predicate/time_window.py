@@ -1,20 +1,18 @@
 import logging
 import datetime
-from time import sleep
-from threading import Thread
 import re
 
-from zoom.agent.predicate.simple import SimplePredicate
-from zoom.agent.entities.thread_safe_object import ThreadSafeObject
+from zoom.agent.predicate.polling import PollingPredicate
 
 
-class TimeWindow(SimplePredicate):
+class TimeWindow(PollingPredicate):
     """
     Predicate for comparing current time to start/stop times.
     It will set the 'met' value based on start > current_time > stop.
     """
     def __init__(self, comp_name, begin=None, end=None,
-                 weekdays=None, operational=False, parent=None, interval=5):
+                 weekdays=None, operational=False, parent=None, interval=5,
+                 scheduler=None):
         """
         :type comp_name: str
         :type begin: str or None
@@ -23,20 +21,17 @@ class TimeWindow(SimplePredicate):
         :type operational: bool
         :type parent: str or None
         :type interval: int or float
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler or None
         """
-        SimplePredicate.__init__(self, comp_name, operational=operational, parent=parent)
+        PollingPredicate.__init__(self, comp_name, interval,
+                                  operational=operational, parent=parent,
+                                  scheduler=scheduler)
         self.begin = self.get_datetime_object(begin)
         self.end = self.get_datetime_object(end)
         self.day_range = self.parse_range(weekdays)
-        self.interval = interval
         self._log = logging.getLogger('sent.{0}.pred.timewin'.format(comp_name))
         self._log.info('Registered {0}'.format(self))
 
-        self._operate = ThreadSafeObject(True)
-        self._thread = Thread(target=self._run_loop, name=str(self))
-        self._thread.daemon = True
-        self._started = False
-
     def weekday(self):
         """
         :rtype: int
@@ -44,30 +39,8 @@ class TimeWindow(SimplePredicate):
         """
         return datetime.date.today().weekday()
 
-    def start(self):
-        if self._started is False:
-            self._log.debug('Starting {0}'.format(self))
-            self._started = True
-            self._thread.start()
-            self._block_until_started()
-        else:
-            self._log.debug('Already started {0}'.format(self))
-
-    def stop(self):
-        if self._started is True:
-            self._log.info('Stopping {0}'.format(self))
-            self._started = False
-            self._operate.set_value(False)
-            self._thread.join()
-            self._log.info('{0} stopped'.format(self))
-        else:
-            self._log.debug('Already stopped {0}'.format(self))
-
-    def _run_loop(self):
-        while self._operate == True:
-            self._process_met()
-            sleep(self.interval)
-        self._log.info('Done comparing times.')
+    def _poll(self):
+        self._process_met()
 
     def _process_met(self):
         results = []
@@ -1,31 +1,26 @@
 import logging
 import datetime
-from time import sleep
-from threading import Thread
 
 from zoom.common.types import Weekdays
-from zoom.agent.predicate.simple import SimplePredicate
-from zoom.agent.entities.thread_safe_object import ThreadSafeObject
+from zoom.agent.predicate.polling import PollingPredicate
 
 
-class PredicateWeekend(SimplePredicate):
-    def __init__(self, comp_name, operational=False, parent=None, interval=10):
+class PredicateWeekend(PollingPredicate):
+    def __init__(self, comp_name, operational=False, parent=None, interval=10,
+                 scheduler=None):
         """
         :type comp_name: str
         :type operational: bool
         :type parent: str or None
         :type interval: int or float
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler or None
         """
-        SimplePredicate.__init__(self, comp_name, operational=operational, parent=parent)
-        self.interval = interval
+        PollingPredicate.__init__(self, comp_name, interval,
+                                  operational=operational, parent=parent,
+                                  scheduler=scheduler)
         self._log = logging.getLogger('sent.{0}.weekend'.format(comp_name))
         self._log.info('Registered {0}'.format(self))
 
-        self._operate = ThreadSafeObject(True)
-        self._thread = Thread(target=self._run_loop, name=str(self))
-        self._thread.daemon = True
-        self._started = False
-
     @property
     def weekday(self):
         """
@@ -34,30 +29,8 @@ class PredicateWeekend(SimplePredicate):
         """
         return datetime.date.today().weekday()
 
-    def start(self):
-        if self._started is False:
-            self._log.debug('Starting {0}'.format(self))
-            self._started = True
-            self._thread.start()
-            self._block_until_started()
-        else:
-            self._log.debug('Already started {0}'.format(self))
-
-    def stop(self):
-        if self._started is True:
-            self._log.info('Stopping {0}'.format(self))
-            self._started = False
-            self._operate.set_value(False)
-            self._thread.join()
-            self._log.info('{0} stopped'.format(self))
-        else:
-            self._log.debug('Already stopped {0}'.format(self))
-
-    def _run_loop(self):
-        while self._operate == True:
-            self._process_met()
-            sleep(self.interval)
-        self._log.info('Done checking for weekend.')
+    def _poll(self):
+        self._process_met()
 
     def _process_met(self):
         self.set_met(self.weekday in [Weekdays.SATURDAY, Weekdays.SUNDAY])
@@ -0,0 +1,57 @@
+from bisect import bisect_left
+from threading import Lock
+
+# upper bounds in seconds, the last bucket holds everything slower
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+
+class LatencyHistogram(object):
+    """
+    Counts of durations per bucket, with their total and maximum.
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        :type buckets: tuple
+            Sorted upper bounds in seconds
+        """
+        self._bounds = tuple(buckets)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._total = 0.0
+        self._max = 0.0
+        self._lock = Lock()
+
+    @property
+    def count(self):
+        """
+        :rtype: int
+        """
+        return sum(self._counts)
+
+    def add(self, seconds):
+        """
+        :type seconds: float
+        """
+        seconds = max(seconds, 0.0)
+        with self._lock:
+            self._counts[bisect_left(self._bounds, seconds)] += 1
+            self._total += seconds
+            self._max = max(self._max, seconds)
+
+    def to_dictionary(self):
+        """
+        :rtype: dict
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._total
+            maximum = self._max
+
+        count = sum(counts)
+        labels = ['<={0}'.format(b) for b in self._bounds]
+        labels.append('>{0}'.format(self._bounds[-1]))
+        return {
+            'count': count,
+            'average': total / count if count else 0.0,
+            'max': maximum,
+            'buckets': dict(zip(labels, counts))
+        }
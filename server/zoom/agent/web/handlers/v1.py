@@ -1,4 +1,6 @@
 import json
+import threading
+
 from tornado.web import RequestHandler
 from zoom.agent.task.task import Task
 from zoom.agent.util.helpers import get_log
@@ -99,3 +101,36 @@ class StatusHandler(RequestHandler):
             result = tc.send_work_all(task, wait=True, immediate=True)
             for i in result.values():
                 self.write(i.get('result'))
+
+
+class MetricsHandler(RequestHandler):
+    def get(self):
+        """
+        @api {get} /api/v1/metrics Retrieve thread and work queue metrics (json)
+        @apiDescription The number of threads in the agent, the state of the
+        shared worker pool, of the pool for blocking work and of the
+        predicate scheduler, and per component the depth of its work queue
+        and how long its tasks waited before they started.
+        @apiVersion 1.0.0
+        @apiName GetMetrics
+        @apiGroup Sentinel Agent
+        """
+        components = dict()
+        for name, child in self.application.children.items():
+            process = child['process']
+            components[name] = {
+                'queue_depth': process.queue_depth,
+                'latency': process.latency
+            }
+
+        executor = self.application.executor
+        step_executor = self.application.step_executor
+        scheduler = self.application.scheduler
+        self.write(json.dumps({
+            'threads': threading.active_count(),
+            'executor': executor.stats if executor is not None else None,
+            'step_executor': (step_executor.stats
+                              if step_executor is not None else None),
+            'scheduler': scheduler.stats if scheduler is not None else None,
+            'components': components
+        }))
@@ -5,6 +5,7 @@ import tornado.web
 from zoom.agent.task.base_task_client import BaseTaskClient
 from zoom.agent.web.handlers.v1 import (
     LogHandler,
+    MetricsHandler,
     TaskHandler,
     StatusHandler
 )
@@ -16,9 +17,13 @@ from zoom.common.handlers import (
 
 
 class RestServer(tornado.web.Application):
-    def __init__(self, children, version, temp_dir, hostname, zk_object):
+    def __init__(self, children, version, temp_dir, hostname, zk_object,
+                 executor=None, scheduler=None, step_executor=None):
         """
         :type children: dict
+        :type executor: zoom.agent.entities.executor.Executor or None
+        :type scheduler: zoom.agent.entities.scheduler.Scheduler or None
+        :type step_executor: zoom.agent.entities.executor.Executor or None
         """
         self.log = logging.getLogger('sent.rest')
         self.children = children
@@ -26,10 +31,14 @@ class RestServer(tornado.web.Application):
         self.temp_dir = temp_dir
         self.hostname = hostname
         self.zk = zk_object
+        self.executor = executor
+        self.scheduler = scheduler
+        self.step_executor = step_executor
         self.task_client = BaseTaskClient(children)
         handlers = [
             # Versioned
             (r"/api/v1/log/?(?P<count>\d+)?", LogHandler),
+            (r"/api/v1/metrics/?", MetricsHandler),
             (r"/api/v1/status/?(?P<target>[\w|\/]+)?", StatusHandler),
             (r"/api/v1/task/(?P<work>\w+)/?(?P<target>[\w|\/]+)?", TaskHandler),
             # Unversioned
@@ -0,0 +1,91 @@
+from io import BytesIO
+from xml.etree.ElementTree import iterparse, tostring
+
+
+def iter_components(data, parent_tag=None, clear=True):
+    """
+    Stream the Component elements of a sentinel config without building the
+    whole document first.
+    :type data: str
+    :type parent_tag: str or None
+        Only yield components whose parent is a child of the root with this
+        tag, like root.findall('Automation/Component').
+    :type clear: bool
+        Drop each component once the caller is done with it, so only one
+        component is held in memory at a time. Pass False to keep the
+        yielded elements.
+    :rtype: generator
+        xml.etree.ElementTree.Element
+    :raises: xml.etree.ElementTree.ParseError
+    """
+    for root, component in _stream(data, parent_tag, clear):
+        yield component
+
+
+def iter_component_attributes(data, names):
+    """
+    Stream only the requested attributes of every Component.
+    :type data: str
+    :type names: list
+        e.g. ['id', 'registrationpath']
+    :rtype: generator
+        tuple of attribute values (None if missing), in the order of names
+    """
+    for component in iter_components(data):
+        yield tuple(component.get(n, None) for n in names)
+
+
+def update_components(data, update):
+    """
+    Run every Component through update and serialize the config again if
+    any of them was changed.
+    :type data: str
+    :type update: types.FunctionType
+        Called with each xml.etree.ElementTree.Element; returns True if it
+        modified the component.
+    :rtype: str or None
+        The updated config, or None if nothing was changed.
+    """
+    root = None
+    changed = False
+    for root, component in _stream(data, None, False):
+        changed = update(component) or changed
+
+    if not changed:
+        return None
+    return tostring(root)
+
+
+def _stream(data, parent_tag, clear):
+    """
+    :type data: str
+    :type parent_tag: str or None
+    :type clear: bool
+    :rtype: generator
+        (root element, Component element)
+    """
+    if isinstance(data, unicode):
+        data = data.encode('utf-8')
+
+    root = None
+    stack = list()
+    for event, element in iterparse(BytesIO(data), events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            stack.append(element)
+            continue
+
+        stack.pop()
+        if element.tag != 'Component':
+            continue
+
+        parent = stack[-1] if stack else None
+        if parent_tag is None or (len(stack) == 2 and
+                                  parent.tag == parent_tag):
+            yield root, element
+
+        if clear:
+            element.clear()
+            if parent is not None:
+                parent.remove(element)
@@ -77,6 +77,12 @@ class UpdateType():
     APPLICATION_DEPENDENCY_UPDATE = "application_dependency"
     GLOBAL_MODE_UPDATE = "global_mode"
     TIMING_UPDATE = "timing_estimate"
+    BATCH_UPDATE = "batch"
+
+
+class MessageEncoding():
+    JSON = "json"
+    COMPACT = "compact"
 
 
 class Weekdays():
@@ -0,0 +1,158 @@
+import json
+import logging
+import os.path
+
+from kazoo.exceptions import NoNodeError
+from kazoo.protocol.states import EventType
+
+from zoom.common.decorators import connected_with_return
+from zoom.www.cache.tree_loader import TreeLoader
+from zoom.www.cache.watch_registry import WatchRegistry
+from zoom.agent.util.helpers import zk_path_join
+
+
+class AgentStateCache(object):
+    def __init__(self, agent_state_path, zoo_keeper, watch_registry,
+                 callback=None):
+        """
+        Index of the registered components of every agent that is up.
+        It is fed by one children watch on the agent state path and one data
+        watch per agent node.
+        :type agent_state_path: str
+        :type zoo_keeper: kazoo.client.KazooClient
+        :type watch_registry: zoom.www.cache.watch_registry.WatchRegistry
+        :type callback: types.FunctionType or None
+            Called with the host name when an agent goes up/down or changes
+            its registered components.
+        """
+        self._path = agent_state_path
+        self._zoo_keeper = zoo_keeper
+        self._callback = callback
+        self._watch_registry = watch_registry
+        self._tree_loader = TreeLoader(zoo_keeper,
+                                       watch_registry=watch_registry)
+        self._agents = dict()
+        self._loaded = False
+
+    @property
+    def agents(self):
+        """
+        :rtype: dict
+            {'host': ['registered', 'components']}
+        """
+        if not self._loaded:
+            self._load()
+        return self._agents
+
+    def is_up(self, host):
+        """
+        :type host: str
+        :rtype: bool
+        """
+        return host in self.agents
+
+    def components(self, host):
+        """
+        :type host: str
+        :rtype: list
+        """
+        return self.agents.get(host, list())
+
+    def reload(self):
+        """
+        Force a re-read of all agents on next access.
+        """
+        self._loaded = False
+
+    @connected_with_return(None)
+    def _load(self):
+        hosts = self._watch_registry.call(self._zoo_keeper.get_children,
+                                          self._path, WatchRegistry.CHILDREN,
+                                          self._on_children_update)
+        paths = [zk_path_join(self._path, h) for h in hosts]
+        agents = dict()
+        for path, (data, stat) in self._tree_loader.get_data(
+                paths, watch=self._on_agent_update).iteritems():
+            agents[os.path.basename(path)] = self._parse_components(data)
+
+        self._agents = agents
+        self._loaded = True
+        logging.info('Loaded {0} agents from {1}'
+                     .format(len(self._agents), self._path))
+
+    @connected_with_return(None)
+    def _on_children_update(self, event=None):
+        """
+        An agent went up or down.
+        :type event: kazoo.protocol.states.WatchedEvent or None
+        """
+        hosts = set(self._watch_registry.call(self._zoo_keeper.get_children,
+                                              self._path,
+                                              WatchRegistry.CHILDREN,
+                                              self._on_children_update))
+
+        for host in hosts - set(self._agents):
+            components = self._read_agent(host)
+            if components is not None:
+                self._agents[host] = components
+                self._notify(host)
+
+        for host in set(self._agents) - hosts:
+            self._agents.pop(host, None)
+            self._notify(host)
+
+    @connected_with_return(None)
+    def _on_agent_update(self, event):
+        """
+        An agent changed its registered components or went away.
+        :type event: kazoo.protocol.states.WatchedEvent
+        """
+        host = os.path.basename(event.path)
+        if event.type == EventType.DELETED:
+            components = None
+        else:
+            components = self._read_agent(host)
+
+        if components is None:
+            if self._agents.pop(host, None) is not None:
+                self._notify(host)
+        elif components != self._agents.get(host, None):
+            self._agents[host] = components
+            self._notify(host)
+
+    def _read_agent(self, host):
+        """
+        :type host: str
+        :rtype: list or None
+            None if the agent node does not exist.
+        """
+        try:
+            data, stat = self._watch_registry.call(
+                self._zoo_keeper.get, zk_path_join(self._path, host),
+                WatchRegistry.DATA, self._on_agent_update)
+            return self._parse_components(data)
+        except NoNodeError:
+            return None
+
+    def _parse_components(self, data):
+        """
+        :type data: str
+        :rtype: list
+        """
+        try:
+            return json.loads(data).get('components', list())
+        except (AttributeError, TypeError, ValueError):
+            logging.warning('Agent data {0} is not valid JSON.'.format(data))
+            return list()
+
+    def _notify(self, host):
+        """
+        :type host: str
+        """
+        logging.info('Agent on host {0} has changed up/down state.'
+                     .format(host))
+        if self._callback is not None:
+            try:
+                self._callback(host)
+            except Exception:
+                logging.exception('An unhandled Exception has occurred')
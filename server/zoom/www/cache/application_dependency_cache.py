@@ -1,40 +1,80 @@
 import logging
-import time
+from threading import Lock
 
-from xml.etree import ElementTree
 from kazoo.exceptions import NoNodeError
 
 from zoom.agent.predicate.time_window import TimeWindow
 from zoom.agent.util.helpers import verify_attribute
-from zoom.common.decorators import connected_with_return, TimeThis
+from zoom.common.decorators import (
+    connected_with_return,
+    synchronous,
+    TimeThis
+)
+from zoom.common.sentinel_config import iter_components
 from zoom.common.types import PredicateType, Weekdays
+from zoom.www.cache.dependency_graph import DependencyGraph
+from zoom.www.cache.tree_loader import TreeLoader
+from zoom.www.cache.watch_registry import WatchRegistry
 from zoom.www.messages.application_dependencies \
     import ApplicationDependenciesMessage
-from zoom.www.messages.message_throttler import MessageThrottle
 from zoom.agent.util.helpers import zk_path_join
 
 
 class ApplicationDependencyCache(object):
-    def __init__(self, configuration, zoo_keeper, web_socket_clients,
-                 time_estimate_cache):
+    def __init__(self, configuration, zoo_keeper, message_throttle,
+                 time_estimate_cache, watch_registry):
         """
         :type configuration: zoom.config.configuration.Configuration
         :type zoo_keeper: kazoo.client.KazooClient
-        :type web_socket_clients: list
+        :type message_throttle: zoom.www.messages.message_throttler.MessageThrottle
+        :type time_estimate_cache: zoom.www.cache.time_estimate_cache.TimeEstimateCache
+        :type watch_registry: zoom.www.cache.watch_registry.WatchRegistry
         """
         self._cache = ApplicationDependenciesMessage()
         self._configuration = configuration
         self._zoo_keeper = zoo_keeper
-        self._web_socket_clients = web_socket_clients
         self._time_estimate_cache = time_estimate_cache
-        self._message_throttle = MessageThrottle(configuration,
-                                                 web_socket_clients)
+        self._watch_registry = watch_registry
+        self._message_throttle = message_throttle
+        self._tree_loader = TreeLoader(zoo_keeper,
+                                       window=configuration.tree_loader_window,
+                                       watch_registry=watch_registry)
+        self._graph = DependencyGraph()
+        self._lock = Lock()
+        # {config path: (mzxid, {registration path: dependency data})}
+        self._parsed = dict()
+        self._parse_stats = {'hits': 0, 'misses': 0}
+        # bumped on every change to the cache
+        self._version = 0
+
+    @property
+    def parse_stats(self):
+        """
+        :rtype: dict
+        """
+        stats = dict(self._parse_stats)
+        stats['cached_configs'] = len(self._parsed)
+        return stats
+
+    @property
+    def closure_stats(self):
+        """
+        :rtype: dict
+        """
+        return self._graph.closure_stats
+
+    @property
+    def version(self):
+        """
+        :rtype: int
+        """
+        return self._version
 
     def start(self):
-        self._message_throttle.start()
+        pass
 
     def stop(self):
-        self._message_throttle.stop()
+        pass
 
     def load(self):
         """
@@ -52,22 +92,74 @@ class ApplicationDependencyCache(object):
         """
         Clear cache, and re-walk agent config path.
         """
-        self._cache.clear()
+        self._clear()
         logging.info("Application dependency cache cleared")
-        self._on_update_path(self._configuration.agent_configuration_path)
+        self._on_update_path(self._configuration.agent_configuration_path,
+                             bulk=True)
+
+    @synchronous('_lock')
+    def operational_dependents(self, path):
+        """
+        :type path: str
+        :rtype: list
+            path, followed by every application that depends on it
+            operationally, directly or through other applications.
+        """
+        return [path] + sorted(self._graph.operational_closure(path))
+
+    @synchronous('_lock')
+    @TimeThis(__file__)
+    def all_operational_dependents(self):
+        """
+        :rtype: dict
+            {application path: list as returned by operational_dependents}
+        """
+        return dict((path, [path] + sorted(closure)) for path, closure
+                    in self._graph.operational_closures().iteritems())
+
+    @synchronous('_lock')
+    @TimeThis(__file__)
+    def impact(self, paths, max_depth=None):
+        """
+        Everything affected by taking down the given applications.
+        :type paths: iterable
+            Application paths
+        :type max_depth: int or None
+        :rtype: dict
+            downstream: {path: depth} of the applications depending on them,
+            upstream: {path: depth} of the applications they depend on,
+            cycles: the dependency cycles any of these applications are in.
+        """
+        paths = set(paths)
+        known = paths.intersection(self._cache.application_dependencies)
+        downstream = self._graph.closure(known, downstream=True,
+                                         max_depth=max_depth)
+        upstream = self._graph.closure(known, downstream=False,
+                                       max_depth=max_depth)
+        involved = known.union(downstream, upstream)
+        return {
+            'applications': sorted(known),
+            'unknown': sorted(paths - known),
+            'downstream': downstream,
+            'upstream': upstream,
+            'cycles': [c for c in self._graph.cycles()
+                       if involved.intersection(c)]
+        }
 
     @TimeThis(__file__)
     def _load(self):
         """
         Walk full agent config path to get data. Load self._cache object
         """
-        self._cache.clear()
+        self._clear()
 
-        self._walk(self._configuration.agent_configuration_path, self._cache)
+        self._load_tree(self._configuration.agent_configuration_path,
+                        self._cache)
         logging.info("Application dependency cache loaded from ZooKeeper {0}"
                      .format(self._configuration.agent_configuration_path))
 
-        self._recalc_downstream_dependencies()
+        self._update_downstream_dependencies(
+            self._cache.application_dependencies.keys())
 
         self._time_estimate_cache.update_dependencies(
             self._cache.application_dependencies)
@@ -79,8 +171,9 @@ class ApplicationDependencyCache(object):
         :type result: ApplicationDependenciesMessage
         """
         try:
-            children = self._zoo_keeper.get_children(path,
-                                                     watch=self._on_update)
+            children = self._watch_registry.call(self._zoo_keeper.get_children,
+                                                 path, WatchRegistry.CHILDREN,
+                                                 self._on_update)
 
             if children:
                 for child in children:
@@ -90,51 +183,122 @@ class ApplicationDependencyCache(object):
         except NoNodeError:
             logging.debug('Node at {0} no longer exists.'.format(path))
 
+    @connected_with_return(None)
+    def _load_tree(self, path, result):
+        """
+        Same as _walk, but all nodes are fetched with pipelined asynchronous
+        requests.
+        :type path: str
+        :type result: ApplicationDependenciesMessage
+        """
+        tree = self._tree_loader.walk(path, watch=self._on_update,
+                                      data_watch=self._on_update)
+        loaded = set()
+        for node_path, node in tree.iteritems():
+            if not node['children'] and node['data']:
+                self._add_application_dependency(node_path, node['data'],
+                                                 node['stat'], result)
+                loaded.add(node_path)
+        self._prune_parsed(path, loaded)
+
+    def _prune_parsed(self, path, loaded):
+        """
+        Drop parsed configs under path that were not loaded from the tree.
+        :type path: str
+        :type loaded: set
+        """
+        prefix = path.rstrip('/') + '/'
+        for parsed_path in self._parsed.keys():
+            if parsed_path not in loaded and (parsed_path == path or
+                                              parsed_path.startswith(prefix)):
+                del self._parsed[parsed_path]
+
     def _get_application_dependency(self, path, result):
         """
         Load result object with application dependencies
         :type path: str
         :type result: ApplicationDependenciesMessage
         """
-        if self._zoo_keeper.exists(path):
-            data, stat = self._zoo_keeper.get(path, watch=self._on_update)
-            if not data:
-                return
+        try:
+            data, stat = self._watch_registry.call(self._zoo_keeper.get, path,
+                                                   WatchRegistry.DATA,
+                                                   self._on_update)
+        except NoNodeError:
+            logging.warn("config path does not exist: {0}".format(path))
+            self._parsed.pop(path, None)
+            return
 
-            try:
-                root = ElementTree.fromstring(data)
+        if not data:
+            return
 
-                for node in root.findall('Automation/Component'):
+        self._add_application_dependency(path, data, stat, result)
 
-                    app_id = node.attrib.get('id')
-                    registrationpath = node.attrib.get('registrationpath', None)
+    def _add_application_dependency(self, path, data, stat, result):
+        """
+        Load result object with the dependencies in a sentinel config, only
+        parsing the XML if the config changed since it was last parsed.
+        :type path: str
+        :type data: str
+        :type stat: kazoo.protocol.states.ZnodeStat or None
+        :type result: ApplicationDependenciesMessage
+        """
+        mzxid = getattr(stat, 'mzxid', None)
+        cached = self._parsed.get(path, None)
+        if mzxid is not None and cached is not None and cached[0] == mzxid:
+            self._parse_stats['hits'] += 1
+            for registrationpath, item in cached[1].iteritems():
+                # downstream lists are filled in place, so hand out new ones
+                result.update({registrationpath: {
+                    "configuration_path": item['configuration_path'],
+                    "dependencies": item['dependencies'],
+                    "downstream": list()
+                }})
+            return
+
+        self._parse_stats['misses'] += 1
+        parsed = ApplicationDependenciesMessage()
+        self._parse_application_dependency(path, data, parsed)
+        result.combine(parsed)
+        if mzxid is not None:
+            self._parsed[path] = (mzxid, parsed.application_dependencies)
+
+    def _parse_application_dependency(self, path, data, result):
+        """
+        Load result object with the dependencies in a sentinel config
+        :type path: str
+        :type data: str
+        :type result: ApplicationDependenciesMessage
+        """
+        try:
+            for node in iter_components(data, parent_tag='Automation'):
 
-                    if registrationpath is None:
-                        registrationpath = zk_path_join(
-                            self._configuration.application_state_path, app_id)
+                app_id = node.attrib.get('id')
+                registrationpath = node.attrib.get('registrationpath', None)
 
-                    start_action = node.find('Actions/Action[@id="start"]')
+                if registrationpath is None:
+                    registrationpath = zk_path_join(
+                        self._configuration.application_state_path, app_id)
 
-                    if start_action is None:
-                        logging.warn("No Start Action Found for {0}"
-                                     .format(registrationpath))
-                        dependencies = list()
-                    else:
-                        dependencies = self._parse_dependencies(start_action)
+                start_action = node.find('Actions/Action[@id="start"]')
 
-                    data = {
-                        "configuration_path": registrationpath,
-                        "dependencies": dependencies,
-                        "downstream": list()
-                    }
+                if start_action is None:
+                    logging.warn("No Start Action Found for {0}"
+                                 .format(registrationpath))
+                    dependencies = list()
+                else:
+                    dependencies = self._parse_dependencies(start_action)
 
-                    result.update({registrationpath: data})
+                data = {
+                    "configuration_path": registrationpath,
+                    "dependencies": dependencies,
+                    "downstream": list()
+                }
 
-            except Exception:
-                logging.exception('An unhandled exception occurred')
+                result.update({registrationpath: data})
 
-        else:
-            logging.warn("config path does not exist: {0}".format(path))
+        except Exception:
+            logging.exception('An unhandled exception occurred for path: '
+                              '{0}'.format(path))
 
     def _parse_dependencies(self, action):
         """
@@ -217,32 +381,27 @@ class ApplicationDependencyCache(object):
 
         return dependencies
 
+    @synchronous('_lock')
+    def _clear(self):
+        self._cache.clear()
+        self._graph.clear()
+        self._parsed.clear()
+        self._version += 1
+
+    @synchronous('_lock')
     @TimeThis(__file__)
-    def _recalc_downstream_dependencies(self, tries=0):
+    def _update_downstream_dependencies(self, paths):
         """
-        Loop over existing cache and link upstream with downstream elements
+        Re-index the dependencies of the given applications and link upstream
+        with downstream elements for every application they affect.
+        :type paths: list
         """
-        # clear existing downstream
-        try:
-            for data in self._cache.application_dependencies.itervalues():
-                downstream = data.get('downstream')
-                del downstream[:]
-
-            dep_copy = self._cache.application_dependencies.copy()
-            for path, data in dep_copy.iteritems():
-                for key, value in self._cache.application_dependencies.iteritems():
-                    for dep in data.get('dependencies'):
-                        if dep['type'] == PredicateType.ZOOKEEPERHASGRANDCHILDREN:
-                            if key.startswith(dep['path']):
-                                value.get('downstream').append(path)
-                        elif dep['type'] == PredicateType.ZOOKEEPERHASCHILDREN:
-                            if dep['path'] == key:
-                                value.get('downstream').append(path)
-        except RuntimeError:
-            time.sleep(1)
-            tries += 1
-            if tries < 3:
-                self._recalc_downstream_dependencies(tries=tries)
+        affected = self._graph.update(self._cache.application_dependencies,
+                                      paths)
+        self._version += 1
+        logging.debug('Updated downstream dependencies of {0} applications '
+                      'for {1} changed configs.'
+                      .format(len(affected), len(paths)))
 
     def _on_update(self, event):
         """
@@ -251,20 +410,29 @@ class ApplicationDependencyCache(object):
         """
         self._on_update_path(event.path)
 
-    def _on_update_path(self, path):
+    def _on_update_path(self, path, bulk=False):
+        """
+        :type path: str
+        :type bulk: bool
+            Load the whole tree under path with pipelined requests.
+        """
         try:
             message = ApplicationDependenciesMessage()
 
-            self._walk(path, message)
+            if bulk:
+                self._load_tree(path, message)
+            else:
+                self._walk(path, message)
 
             self._cache.update(message.application_dependencies)
 
-            self._recalc_downstream_dependencies()
+            self._update_downstream_dependencies(
+                message.application_dependencies.keys())
 
             self._message_throttle.add_message(message)
 
             self._time_estimate_cache.update_dependencies(
-                self._cache.application_dependencies)
+                message.application_dependencies)
 
         except Exception:
             logging.exception('An unhandled Exception has occurred for path: '
@@ -1,46 +1,112 @@
 import logging
 import os.path
 import json
+import time
+from collections import OrderedDict
+from threading import Lock
 
 from kazoo.exceptions import NoNodeError
+from kazoo.protocol.states import EventType
 
 from zoom.common.decorators import connected_with_return, TimeThis
 from zoom.common.types import ApplicationStatus
+from zoom.www.cache.agent_state_cache import AgentStateCache
+from zoom.www.cache.path_index import PathIndex
+from zoom.www.cache.tree_loader import TreeLoader
+from zoom.www.cache.watch_registry import WatchRegistry
+from zoom.www.cache.znode_index import ZnodeIndex
 from zoom.www.entities.application_state import ApplicationState
 from zoom.www.messages.application_states import ApplicationStatesMessage
-from zoom.www.messages.message_throttler import MessageThrottle
 from zoom.agent.util.helpers import zk_path_join
 
 
 class ApplicationStateCache(object):
-    def __init__(self, configuration, zoo_keeper, web_socket_clients,
-                 time_estimate_cache):
+    # regex query results are reused for this many seconds, unless the
+    # cache changes first
+    QUERY_TTL = 2.0
+    QUERY_CACHE_SIZE = 128
+
+    def __init__(self, configuration, zoo_keeper, message_throttle,
+                 time_estimate_cache, override_cache, watch_registry):
         """
         :type configuration: zoom.config.configuration.Configuration
         :type zoo_keeper: zoom.zoo_keeper.ZooKeeper
-        :type web_socket_clients: list
+        :type message_throttle: zoom.www.messages.message_throttler.MessageThrottle
         :type time_estimate_cache: zoom.www.cache.time_estimate_cache.TimeEstimateCache
+        :type override_cache: zoom.www.cache.override_cache.OverrideCache
+        :type watch_registry: zoom.www.cache.watch_registry.WatchRegistry
         """
         self._path_to_host_mapping = dict()
         self._configuration = configuration
         self._cache = ApplicationStatesMessage()
         self._cache.set_environment(self._configuration.environment)
         self._zoo_keeper = zoo_keeper
-        self._web_socket_clients = web_socket_clients
+        self._message_throttle = message_throttle
 
         self._time_estimate_cache = time_estimate_cache
-        self._message_throttle = MessageThrottle(configuration,
-                                                 web_socket_clients)
+        self._override_cache = override_cache
+        self._watch_registry = watch_registry
+        self._agent_state_cache = AgentStateCache(
+            configuration.agent_state_path, zoo_keeper, watch_registry,
+            callback=self._on_agent_state_update)
+
+        self._tree_loader = TreeLoader(zoo_keeper,
+                                       window=configuration.tree_loader_window,
+                                       watch_registry=watch_registry)
+        self._index = ZnodeIndex()
+        self._round_trips = 0
+        self._walk_stats = {
+            'events': 0,
+            'incremental_events': 0,
+            'round_trips': 0,
+            'round_trips_saved': 0
+        }
+        # bumped on every change to the cache, and to the set of paths in it
+        self._version = 0
+        self._paths_version = 0
+        self._path_index = PathIndex()
+        self._query_results = OrderedDict()  # {pattern: (version, time, json)}
+        self._query_lock = Lock()
+        self._query_stats = {'hits': 0, 'misses': 0}
 
     @property
     def host_mapping(self):
         return self._path_to_host_mapping
 
+    @property
+    def walk_stats(self):
+        """
+        Counters for the incremental walk.
+        :rtype: dict
+        """
+        stats = dict(self._walk_stats)
+        stats['indexed_nodes'] = len(self._index)
+        return stats
+
+    @property
+    def version(self):
+        """
+        :rtype: int
+        """
+        return self._version
+
+    @property
+    def query_stats(self):
+        """
+        Counters for the regex query result cache.
+        :rtype: dict
+        """
+        with self._query_lock:
+            stats = dict(self._query_stats)
+            stats['cached_results'] = len(self._query_results)
+        stats['indexed_paths'] = len(self._path_index)
+        return stats
+
     def start(self):
-        self._message_throttle.start()
+        pass
 
     def stop(self):
-        self._message_throttle.stop()
+        pass
 
     def load(self):
         """
@@ -53,48 +119,56 @@ class ApplicationStateCache(object):
 
     def reload(self):
         self._cache.clear()
-        self._on_update_path(self._configuration.application_state_path)
+        self._changed(paths=True)
+        self._index.clear()
+        self._agent_state_cache.reload()
+        self._on_update_path(self._configuration.application_state_path,
+                             bulk=True)
 
     @TimeThis(__file__)
     def _load(self):
         self._cache.clear()
+        self._index.clear()
 
-        self._walk(self._configuration.application_state_path, self._cache)
+        self._load_tree(self._configuration.application_state_path,
+                        self._cache)
         logging.info("Application state cache loaded from ZooKeeper {0}"
                      .format(self._configuration.application_state_path))
 
         self._time_estimate_cache.update_states(
             self._cache.application_states)
         self._cache.remove_deletes()
+        self._changed(paths=True)
 
-    def _build_default_override_store(self):
-        logging.debug('Override storage node not found, creating')
-        _template = {}
-        self._zoo_keeper.create(self._configuration.override_node,
-                                json.dumps(_template), makepath=True)
-
-    def _update_override_info(self, path, override_key, override_value):
+    def query(self, pattern):
         """
-        Update zookeeper with override values passed in
+        :type pattern: str
+            Regex that has to match the configuration path from the start
+        :rtype: str
+            JSON list of the matching application states
         """
-        logging.debug("_update_override_info: path: {0}, override_key: {1} override_value: {2}"
-                      .format(path, override_key, override_value))
-        try:
-            override_str, stat = self._zoo_keeper.get(self._configuration.override_node)
-            override_dict = json.loads(override_str)
-
-            update = {override_key: override_value}
-            state = override_dict.get(path, {})
-            state.update(update)
-            override_dict.update({path: state})
-
-            self._zoo_keeper.set(self._configuration.override_node,
-                                 json.dumps(override_dict))
-        except NoNodeError as err:
-            logging.debug('Unable to find {0}, {1}'
-                          .format(self._configuration.override_node, err))
-            self._build_default_override_store()
-            self._update_override_info(path, override_key, override_value)
+        now = time.time()
+        with self._query_lock:
+            entry = self._query_results.pop(pattern, None)
+            if (entry is not None and entry[0] == self._version and
+                    now - entry[1] < self.QUERY_TTL):
+                self._query_results[pattern] = entry
+                self._query_stats['hits'] += 1
+                return entry[2]
+            self._query_stats['misses'] += 1
+
+        version = self._version
+        states = self._cache.application_states
+        self._path_index.refresh(states.keys(), self._paths_version)
+        items = [states[p] for p in self._path_index.match(pattern)
+                 if p in states]
+        data = json.dumps(items)
+
+        with self._query_lock:
+            self._query_results[pattern] = (version, now, data)
+            while len(self._query_results) > self.QUERY_CACHE_SIZE:
+                self._query_results.popitem(last=False)
+        return data
 
     def manual_update(self, path, key, value):
         """
@@ -105,9 +179,10 @@ class ApplicationStateCache(object):
         """
         state = self._cache.application_states.get(path, None)
         if state is not None:
-            self._update_override_info(path, key, value)
+            self._override_cache.update(path, key, value)
             message = ApplicationStatesMessage()
             state[key] = value
+            self._changed()
             message.update({path: state})
             self._message_throttle.add_message(message)
 
@@ -118,18 +193,20 @@ class ApplicationStateCache(object):
         :type result: zoom.www.messages.application_states.ApplicationStatesMessage
         """
         try:
-            children = self._zoo_keeper.get_children(path, watch=self._on_update)
+            children = self._watch_registry.call(self._zoo_keeper.get_children,
+                                                 path, WatchRegistry.CHILDREN,
+                                                 self._on_update)
+            self._round_trips += 1
 
             if children:
+                self._index.update(path, children=children, cost=1)
                 for child in children:
                     self._walk(zk_path_join(path, child), result)
             else:
-                app_state = self._get_application_state(path)
-                result.update(
-                    {app_state.configuration_path: app_state.to_dictionary()}
-                )
+                self._walk_leaf(path, result)
 
         except NoNodeError:
+            self._index.remove(path)
             result.update({path: ApplicationState(configuration_path=path,
                                                   delete=True).to_dictionary(),
             })
@@ -138,13 +215,213 @@ class ApplicationStateCache(object):
             logging.exception('An unhandled Exception has occurred while '
                               'running ApplicationStateCache.walk.')
 
+    @connected_with_return(None)
+    def _load_tree(self, path, result):
+        """
+        Same as _walk, but the whole tree is listed and the leaves are read
+        with pipelined asynchronous requests before the states are built.
+        :type path: str
+        :type result: zoom.www.messages.application_states.ApplicationStatesMessage
+        """
+        try:
+            requests = self._tree_loader.requests
+            tree = self._tree_loader.walk(path, watch=self._on_update,
+                                          data_watch=self._on_update)
+
+            if path not in tree:
+                raise NoNodeError
+
+            leaves = list()
+            for node_path, node in tree.iteritems():
+                if node['children']:
+                    self._index.update(node_path, children=node['children'],
+                                       cost=1)
+                elif node['stat'] is not None:
+                    leaves.append(node_path)
+
+            # running apps are built from the data of their parent node
+            parents = set(os.path.dirname(p) for p in leaves
+                          if tree[p]['stat'].ephemeralOwner != 0)
+            parent_data = self._tree_loader.get_data(parents,
+                                                     watch=self._on_update)
+            self._round_trips += self._tree_loader.requests - requests
+
+            for leaf in leaves:
+                node = tree[leaf]
+                details = (self._parse_app_data(node['data']), node['stat'])
+                parent_details = None
+                raw_parent = parent_data.get(os.path.dirname(leaf), None)
+                if raw_parent is not None:
+                    parent_details = (self._parse_app_data(raw_parent[0]),
+                                      raw_parent[1])
+                elif node['stat'].ephemeralOwner != 0:
+                    # parent went away while loading
+                    continue
+
+                self._walk_leaf(leaf, result, details=details,
+                                parent_details=parent_details)
+
+        except NoNodeError:
+            self._index.remove(path)
+            result.update({path: ApplicationState(configuration_path=path,
+                                                  delete=True).to_dictionary(),
+            })
+
+        except Exception:
+            logging.exception('An unhandled Exception has occurred while '
+                              'running ApplicationStateCache.load_tree.')
+
+    def _walk_leaf(self, path, result, details=None, parent_details=None):
+        """
+        Load the state of a leaf node into result and record it in the index.
+        :type path: str
+        :type result: zoom.www.messages.application_states.ApplicationStatesMessage
+        :type details: (dict, kazoo.protocol.states.ZnodeStat) or None
+        :type parent_details: (dict, kazoo.protocol.states.ZnodeStat) or None
+        """
+        start = self._round_trips
+        # a synchronous re-walk would also list the leaf's children and
+        # read the data we were handed
+        prefetched = len([d for d in (details, parent_details)
+                          if d is not None])
+        watched = details is not None
+        if details is None:
+            details = self._get_app_details(path)
+        app_state = self._get_application_state(
+            path, details=details, parent_details=parent_details,
+            watched=watched)
+        result.update(
+            {app_state.configuration_path: app_state.to_dictionary()}
+        )
+        self._index.update(path, children=[],
+                           mzxid=getattr(details[1], 'mzxid', None),
+                           cost=1 + prefetched + self._round_trips - start)
+
+    @connected_with_return(None)
+    def _walk_incremental(self, path, event_type, result):
+        """
+        Compare the event against the index and only fetch what changed.
+        :type path: str
+        :type event_type: str
+            kazoo.protocol.states.EventType
+        :type result: zoom.www.messages.application_states.ApplicationStatesMessage
+        """
+        start = self._round_trips
+        full_walk_cost = self._index.subtree_cost(path)
+
+        try:
+            if event_type == EventType.CHILD:
+                self._rewalk_children(path, result)
+            elif event_type == EventType.CHANGED:
+                self._rewalk_data(path, result)
+            elif event_type == EventType.DELETED:
+                self._remove_subtree(path, result)
+            else:
+                self._walk(path, result)
+                return
+
+        except NoNodeError:
+            self._remove_subtree(path, result)
+
+        except Exception:
+            logging.exception('An unhandled Exception has occurred while '
+                              'running ApplicationStateCache.walk_incremental.')
+
+        spent = self._round_trips - start
+        saved = max(full_walk_cost - spent, 0)
+        self._walk_stats['incremental_events'] += 1
+        self._walk_stats['round_trips_saved'] += saved
+        logging.debug('Incremental {0} update of {1} took {2} round trips, '
+                      'saved {3}.'.format(event_type, path, spent, saved))
+
+    def _rewalk_children(self, path, result):
+        """
+        Re-list the children of path and only walk the ones that were added.
+        :type path: str
+        :type result: zoom.www.messages.application_states.ApplicationStatesMessage
+        """
+        children, stat = self._watch_registry.call(
+            self._zoo_keeper.get_children, path, WatchRegistry.CHILDREN,
+            self._on_update, include_data=True)
+        self._round_trips += 1
+
+        entry = self._index.get(path)
+        if entry['cversion'] is not None and entry['cversion'] == stat.cversion:
+            logging.debug('Children of {0} are unchanged.'.format(path))
+            return
+
+        old = set(entry['children'])
+        new = set(children)
+        self._index.update(path, children=children, cversion=stat.cversion)
+
+        for child in old - new:
+            self._remove_subtree(zk_path_join(path, child), result)
+
+        for child in new - old:
+            self._walk(zk_path_join(path, child), result)
+
+        if not new:
+            # the last child went away (e.g. the app stopped)
+            self._walk_leaf(path, result)
+
+    def _rewalk_data(self, path, result):
+        """
+        Re-read the data of path and reload its state if it actually changed.
+        :type path: str
+        :type result: zoom.www.messages.application_states.ApplicationStatesMessage
+        """
+        previous = self._index.get(path)['mzxid']
+        details = self._get_app_details(path)
+        data, stat = details
+
+        if previous is not None and previous == stat.mzxid:
+            logging.debug('Data of {0} is unchanged.'.format(path))
+            return
+
+        children = self._index.children(path)
+        if children:
+            # the app is running, its state is loaded from the ephemeral child
+            # and the data just read
+            for child in children:
+                self._walk_leaf(zk_path_join(path, child), result,
+                                parent_details=details)
+        else:
+            self._walk_leaf(path, result, details=details)
+
+    def _remove_subtree(self, path, result):
+        """
+        Drop path and its descendants from the index and mark deleted states.
+        :type path: str
+        :type result: zoom.www.messages.application_states.ApplicationStatesMessage
+        """
+        removed = self._index.remove(path)
+        for p in removed:
+            if p != path and p in self._cache.application_states:
+                result.update({p: ApplicationState(configuration_path=p,
+                                                   delete=True).to_dictionary()})
+
+        result.update({path: ApplicationState(configuration_path=path,
+                                              delete=True).to_dictionary()})
+
     def _get_app_details(self, path):
         """
         :type path: str
         :rtype: dict, kazoo.protocol.states.ZnodeStat
         """
-        raw_data, stat = self._zoo_keeper.get(path, watch=self._on_update)
+        raw_data, stat = self._watch_registry.call(self._zoo_keeper.get, path,
+                                                   WatchRegistry.DATA,
+                                                   self._on_update)
+        self._round_trips += 1
+        if path in self._index:
+            self._index.update(path, mzxid=getattr(stat, 'mzxid', None))
+
+        return self._parse_app_data(raw_data), stat
 
+    def _parse_app_data(self, raw_data):
+        """
+        :type raw_data: str
+        :rtype: dict
+        """
         data = {}
 
         if raw_data:
@@ -153,41 +430,51 @@ class ApplicationStateCache(object):
             except ValueError:
                 pass
 
-        return data, stat
+        return data
 
-    def _get_application_state(self, path):
+    def _get_application_state(self, path, details=None, parent_details=None,
+                               watched=None):
         """
         :type path: str
+        :type details: (dict, kazoo.protocol.states.ZnodeStat) or None
+            The already fetched data and stat of path.
+        :type parent_details: (dict, kazoo.protocol.states.ZnodeStat) or None
+            The already fetched data and stat of the parent of an ephemeral
+            path.
+        :type watched: bool or None
+            Whether the caller has set the children watch on path, or on the
+            parent of an ephemeral path. By default, if details were given.
         :rtype: zoom.entities.application_state.ApplicationState
         """
-        data, stat = self._get_app_details(path)
+        if watched is None:
+            watched = details is not None
+        if details is None:
+            details = self._get_app_details(path)
+        data, stat = details
 
         # persistent node
         if stat.ephemeralOwner == 0:
-            # watch node to see if children are created
-            self._zoo_keeper.get_children(path, watch=self._on_update)
+            if not watched:
+                # watch node to see if children are created
+                self._watch_registry.call(self._zoo_keeper.get_children,
+                                          path, WatchRegistry.CHILDREN,
+                                          self._on_update)
+                self._round_trips += 1
             host = data.get('host', 'Unknown')
             name = data.get('name', os.path.basename(path))
-            agent_path = zk_path_join(self._configuration.agent_state_path,
-                                      host)
-
-            # if the agent is down, update state and mode with unknown
-            agent_up = bool(self._zoo_keeper.exists(
-                agent_path,
-                watch=self._on_agent_state_update))
 
             valid = True
             if host in (None, 'Unknown'):
                 data['state'] = 'invalid'
                 data['mode'] = 'unknown'
                 valid = False
-            elif not agent_up:
+            elif not self._agent_state_cache.is_up(host):
+                # if the agent is down, update state and mode with unknown
                 data['state'] = 'unknown'
                 data['mode'] = 'unknown'
                 valid = False
-            elif agent_up:
-                d, s = self._zoo_keeper.get(agent_path)
-                registered_comps = json.loads(d).get('components', [])
+            else:
+                registered_comps = self._agent_state_cache.components(host)
                 if name not in registered_comps:
                     data['state'] = 'invalid'
                     data['mode'] = 'unknown'
@@ -216,15 +503,21 @@ class ApplicationStateCache(object):
 
         # ephemeral node
         else:
-            # watch node to see if it goes away
-            self._zoo_keeper.get_children(os.path.dirname(path),
-                                          watch=self._on_update)
+            if not watched:
+                # watch node to see if it goes away
+                self._watch_registry.call(self._zoo_keeper.get_children,
+                                          os.path.dirname(path),
+                                          WatchRegistry.CHILDREN,
+                                          self._on_update)
+                self._round_trips += 1
 
             host = os.path.basename(path)
             # if it is running, path = /app/path/HOSTNAME
             # need to convert to /app/path to get the app_details
             config_path = os.path.dirname(path)
-            parent_data, parent_stat = self._get_app_details(config_path)
+            if parent_details is None:
+                parent_details = self._get_app_details(config_path)
+            parent_data, parent_stat = parent_details
 
             self._update_mapping(host, {config_path: True})
 
@@ -265,32 +558,62 @@ class ApplicationStateCache(object):
         Callback to send updates via websocket on application state changes.
         :type event: kazoo.protocol.states.WatchedEvent
         """
-        self._on_update_path(event.path)
+        self._on_update_path(event.path, event_type=event.type)
 
-    def _on_update_path(self, path):
+    def _on_update_path(self, path, event_type=None, bulk=False):
+        """
+        :type path: str
+        :type event_type: str or None
+            kazoo.protocol.states.EventType of the watch that fired. When it is
+            known and the path is indexed, only the changed nodes are fetched.
+        :type bulk: bool
+            Load the whole tree under path with pipelined requests.
+        """
         try:
             message = ApplicationStatesMessage()
+            start = self._round_trips
+
+            if (self._configuration.incremental_walk and
+                    event_type is not None and path in self._index):
+                self._walk_incremental(path, event_type, message)
+            elif bulk:
+                self._load_tree(path, message)
+            else:
+                self._walk(path, message)
 
-            self._walk(path, message)
+            self._walk_stats['events'] += 1
+            self._walk_stats['round_trips'] += self._round_trips - start
 
+            states = self._cache.application_states
+            added = any(p not in states for p in message.application_states)
+            count = len(states)
             self._cache.update(message.application_states)
             self._cache.remove_deletes()
+            self._changed(paths=added or count != len(states))
 
             self._message_throttle.add_message(message)
 
             self._time_estimate_cache.update_states(
-                self._cache.application_states)
+                message.application_states)
 
         except Exception:
             logging.exception('An unhandled Exception has occurred')
 
-    def _on_agent_state_update(self, event):
+    def _changed(self, paths=False):
         """
-        This is to capture when an agent goes down.
-        :type event: kazoo.protocol.states.WatchedEvent
+        :type paths: bool
+            Whether paths were added or removed.
+        """
+        self._version += 1
+        if paths:
+            self._paths_version += 1
+
+    def _on_agent_state_update(self, host):
+        """
+        This is to capture when an agent goes up/down or changes its
+        registered components.
+        :type host: str
         """
-        host = os.path.basename(event.path)
-        logging.info('Agent on host {0} has changed up/down state.'.format(host))
         paths = self._path_to_host_mapping.get(host, {})
         for p in paths.keys():
             self._on_update_path(p)
@@ -315,16 +638,7 @@ class ApplicationStateCache(object):
         :type attr: str
         """
         state = self._cache.application_states.get(path, None)
-        override = {}
-
-        try:
-            data, stat = self._zoo_keeper.get(self._configuration.override_node)
-            override = json.loads(data)
-        except (TypeError, ValueError) as err:
-            logging.critical('There was a problem returning values from the '
-                             'override cache: {0}'.format(err))
-
-        setting = override.get(path, {}).get(attr, None)
+        setting = self._override_cache.get(path, attr)
 
         if setting is not None:
             return setting
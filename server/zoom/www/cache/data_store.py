@@ -1,16 +1,24 @@
 import logging
+import sys
+from threading import Thread
 
 from zoom.www.cache.application_state_cache import ApplicationStateCache
 from zoom.www.cache.application_dependency_cache \
     import ApplicationDependencyCache
 from zoom.www.cache.time_estimate_cache import TimeEstimateCache
 from zoom.www.cache.global_cache import GlobalCache
+from zoom.www.cache.override_cache import OverrideCache
+from zoom.www.cache.snapshot import Snapshot
+from zoom.www.cache.watch_registry import WatchRegistry
 from zoom.common.decorators import connected_with_return
 from zoom.common.pagerduty import PagerDuty
 from zoom.www.entities.alert_manager import AlertManager
 
 from zoom.www.messages.application_states import ApplicationStatesMessage
+from zoom.www.messages.change_log import ChangeLog
 from zoom.www.messages.global_mode_message import GlobalModeMessage
+from zoom.www.messages.message_throttler import MessageThrottle
+from zoom.www.messages.subscriptions import SubscriptionIndex
 from zoom.www.messages.application_dependencies import ApplicationDependenciesMessage
 from zoom.www.messages.timing_estimate import TimeEstimateMessage
 
@@ -33,36 +41,58 @@ class DataStore(object):
                       self._configuration.pagerduty_default_svc_key,
                       alert_footer=self._configuration.pagerduty_alert_footer)
 
+        self._watch_registry = WatchRegistry(
+            coalesce_interval=configuration.watch_coalesce_interval)
+
+        self._override_cache = OverrideCache(configuration.override_node,
+                                             zoo_keeper, self._watch_registry)
+
         self._alert_manager = AlertManager(configuration.alert_path,
-                                           configuration.override_node,
+                                           self._override_cache,
                                            configuration.application_state_path,
                                            zoo_keeper, self._pd,
                                            self._alert_exceptions)
 
         self._web_socket_clients = list()
+        self._change_log = ChangeLog(size=configuration.change_log_size)
+        self._subscriptions = SubscriptionIndex(self._change_log)
+        # every cache sends its updates through the same scheduler
+        self._message_throttle = MessageThrottle(
+            configuration, self._web_socket_clients,
+            change_log=self._change_log, subscriptions=self._subscriptions)
 
         self._time_estimate_cache = TimeEstimateCache(self._configuration,
-                                                      self._web_socket_clients)
+                                                      self._message_throttle)
 
         self._application_dependency_cache = \
             ApplicationDependencyCache(self._configuration,
                                        self._zoo_keeper,
-                                       self._web_socket_clients,
-                                       self._time_estimate_cache)
+                                       self._message_throttle,
+                                       self._time_estimate_cache,
+                                       self._watch_registry)
 
         self._application_state_cache = \
             ApplicationStateCache(self._configuration,
                                   self._zoo_keeper,
-                                  self._web_socket_clients,
-                                  self._time_estimate_cache)
+                                  self._message_throttle,
+                                  self._time_estimate_cache,
+                                  self._override_cache,
+                                  self._watch_registry)
 
         self._global_cache = GlobalCache(self._configuration,
                                          self._zoo_keeper,
-                                         self._web_socket_clients)
+                                         self._message_throttle,
+                                         self._watch_registry)
+        self._application_state_snapshot = Snapshot(
+            lambda: self.load_application_state_cache().to_json())
+        self._application_dependency_snapshot = Snapshot(
+            lambda: self.load_application_dependency_cache().to_json())
         self._pd_svc_list_cache = {}
 
     def start(self):
         logging.info('Starting data store.')
+        self._watch_registry.start()
+        self._message_throttle.start()
         self._global_cache.start()
         self._application_state_cache.start()
         self._application_dependency_cache.start()
@@ -76,13 +106,15 @@ class DataStore(object):
         self._application_dependency_cache.stop()
         self._time_estimate_cache.stop()
         self._alert_manager.stop()
+        self._watch_registry.stop()
+        self._message_throttle.stop()
 
     @connected_with_return(ApplicationStatesMessage())
     def load_application_state_cache(self):
         """
         :rtype: zoom.messages.application_states.ApplicationStatesMessage
         """
-        logging.info('Loading application states.')
+        logging.debug('Loading application states.')
         return self._application_state_cache.load()
 
     @connected_with_return(ApplicationDependenciesMessage())
@@ -90,9 +122,25 @@ class DataStore(object):
         """
         :rtype: zoom.messages.application_dependencies.ApplicationDependenciesMessage
         """
-        logging.info('Loading application dependencies.')
+        logging.debug('Loading application dependencies.')
         return self._application_dependency_cache.load()
 
+    def get_application_state_snapshot(self):
+        """
+        :rtype: tuple
+            (zoom.www.cache.snapshot.Snapshot, version of the cache)
+        """
+        return (self._application_state_snapshot,
+                self._application_state_cache.version)
+
+    def get_application_dependency_snapshot(self):
+        """
+        :rtype: tuple
+            (zoom.www.cache.snapshot.Snapshot, version of the cache)
+        """
+        return (self._application_dependency_snapshot,
+                self._application_dependency_cache.version)
+
     @connected_with_return(TimeEstimateMessage())
     def load_time_estimate_cache(self):
         """
@@ -114,14 +162,22 @@ class DataStore(object):
         logging.info('Loading global mode.')
         return self._global_cache.get_mode()
 
-    def reload(self):
+    def reload(self, session_lost=False):
         """
         Clear all cache objects and send reloaded data as updates.
+        :type session_lost: bool
+            Whether the ZooKeeper session expired. Watches survive a
+            suspended connection, and then the armed ones are kept so kazoo
+            does not get a second watch for the same node.
         """
         # restart client to destroy any existing watches
         # self._zoo_keeper.restart()
         logging.info('Reloading all cache types.')
         self._task_server.clear_all_tasks()
+        if session_lost:
+            # watches do not survive a lost session, so re-arm all of them
+            self._watch_registry.clear()
+        self._override_cache.reload()
         self._global_cache.on_update()
         self._application_state_cache.reload()
         self._application_dependency_cache.reload()
@@ -133,15 +189,53 @@ class DataStore(object):
     def load(self):
         """
         Clear all cache objects and send reloaded data as updates.
+        :raises Exception: the first error of the loaders, after all of them
+            are done
         """
         logging.info('Loading all cache types.')
-        self._global_cache.on_update()
-        self._application_state_cache.load()
-        self._application_dependency_cache.load()
+        # the caches are independent of each other, so load them in parallel
+        errors = list()  # [(name, exc_info)]
+        loaders = [
+            ('load_global_cache', self._global_cache.on_update),
+            ('load_application_state_cache',
+             self._application_state_cache.load),
+            ('load_application_dependency_cache',
+             self._application_dependency_cache.load),
+            ('load_pagerduty_services', self._load_pagerduty_services),
+        ]
+        threads = [Thread(target=self._run_loader, name=name,
+                          args=(name, function, errors))
+                   for name, function in loaders]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join()
+
+        if errors:
+            for name, exc_info in errors:
+                logging.error('{0} failed.'.format(name), exc_info=exc_info)
+            exc_type, exc_value, exc_traceback = errors[0][1]
+            raise exc_type, exc_value, exc_traceback
+
         self._time_estimate_cache.load()
-        self._pd_svc_list_cache = self._pd.get_service_dict()
         return {'cache_load': 'okay'}
 
+    def _run_loader(self, name, function, errors):
+        """
+        :type name: str
+        :type function: types.FunctionType
+        :type errors: list
+            Gets (name, exc_info) if function raises.
+        """
+        try:
+            function()
+        except Exception:
+            errors.append((name, sys.exc_info()))
+
+    def _load_pagerduty_services(self):
+        self._pd_svc_list_cache = self._pd.get_service_dict()
+
     @property
     def pd_client(self):
         """
@@ -156,6 +250,20 @@ class DataStore(object):
         """
         return self._web_socket_clients
 
+    @property
+    def change_log(self):
+        """
+        :rtype: zoom.www.messages.change_log.ChangeLog
+        """
+        return self._change_log
+
+    @property
+    def subscriptions(self):
+        """
+        :rtype: zoom.www.messages.subscriptions.SubscriptionIndex
+        """
+        return self._subscriptions
+
     @property
     def application_state_cache(self):
         """
@@ -163,6 +271,36 @@ class DataStore(object):
         """
         return self._application_state_cache
 
+    @property
+    def application_dependency_cache(self):
+        """
+        :rtype: zoom.www.cache.application_dependency_cache.ApplicationDependencyCache
+        """
+        return self._application_dependency_cache
+
+    def get_cache_stats(self):
+        """
+        :rtype: dict
+        """
+        return {
+            'watches': self._watch_registry.stats,
+            'application_state_walk': self._application_state_cache.walk_stats,
+            'application_state_query':
+                self._application_state_cache.query_stats,
+            'application_dependency_parse':
+                self._application_dependency_cache.parse_stats,
+            'operational_dependencies':
+                self._application_dependency_cache.closure_stats,
+            'graphite': self._time_estimate_cache.graphite_stats,
+            'delivery': self._message_throttle.stats,
+            'subscriptions': self._subscriptions.stats,
+            'snapshots': {
+                'application_states': self._application_state_snapshot.stats,
+                'application_dependencies':
+                    self._application_dependency_snapshot.stats
+            }
+        }
+
     @property
     def alert_exceptions(self):
         """
@@ -0,0 +1,412 @@
+from bisect import bisect_left, insort
+
+from zoom.common.types import PredicateType
+
+
+class DependencyGraph(object):
+    """
+    Index of which applications depend on which paths.
+    zookeeperhaschildren dependencies are kept in an exact-path index and
+    zookeeperhasgrandchildren dependencies in a prefix trie, so the downstream
+    list of one application can be computed without looking at every other
+    application. Only the applications whose configs changed are re-indexed.
+    Operational dependencies are also kept in a second pair of indexes, from
+    which the transitive set of operational dependents of an application is
+    computed on demand and memoized until a change reaches it.
+    """
+    _DEPENDENTS = None  # trie key holding the dependents of a prefix
+
+    def __init__(self):
+        self._exact = dict()  # {path: {dependent: count}}
+        self._trie = dict()  # {char: {char: ..., None: {dependent: count}}}
+        self._op_exact = dict()  # same as _exact, operational only
+        self._op_trie = dict()  # same as _trie, operational only
+        self._edges = dict()  # {dependent: [(type, path, operational)]}
+        self._paths = list()  # sorted application paths
+        self._closures = dict()  # {path: frozenset(operational dependents)}
+        self._members = dict()  # {path: set(closure keys it is part of)}
+        self._closure_stats = {'hits': 0, 'misses': 0, 'invalidated': 0}
+        self._cycles = None  # memoized until the next change
+
+    @property
+    def closure_stats(self):
+        """
+        :rtype: dict
+        """
+        stats = dict(self._closure_stats)
+        stats['cached'] = len(self._closures)
+        return stats
+
+    def update(self, dependencies, changed):
+        """
+        Re-index the changed applications and refresh the downstream list
+        of every application whose upstream set was affected.
+        :type dependencies: dict
+            All applications, as held by ApplicationDependenciesMessage.
+        :type changed: list
+            Application paths whose config was (re)loaded.
+        :rtype: set
+            The application paths whose downstream list was refreshed.
+        """
+        affected = set()
+        # applications whose operational dependents changed
+        touched = set()
+        for path in changed:
+            data = dependencies.get(path, None)
+            if data is None:
+                continue
+
+            if path not in self._edges:
+                self._add_path(path)
+            affected.add(path)
+            touched.add(path)
+
+            for edge in self._edges.pop(path, list()):
+                self._unlink(path, edge)
+                targets = self._targets(edge)
+                affected.update(targets)
+                if edge[2]:
+                    touched.update(targets)
+
+            edges = self._parse_edges(data)
+            for edge in edges:
+                self._link(path, edge)
+                targets = self._targets(edge)
+                affected.update(targets)
+                if edge[2]:
+                    touched.update(targets)
+            self._edges[path] = edges
+
+        self._invalidate(touched)
+        self._cycles = None
+
+        for path in affected:
+            data = dependencies.get(path, None)
+            if data is not None:
+                data.get('downstream')[:] = self.downstream(path)
+
+        return affected
+
+    def downstream(self, path):
+        """
+        :type path: str
+        :rtype: list
+            Applications depending on path, once per matching dependency.
+        """
+        counts = self._dependents(path, self._exact, self._trie)
+        result = list()
+        for dependent in sorted(counts):
+            result.extend([dependent] * counts[dependent])
+        return result
+
+    def upstream(self, path):
+        """
+        :type path: str
+        :rtype: set
+            Applications path depends on.
+        """
+        targets = set()
+        for edge in self._edges.get(path, ()):
+            targets.update(self._targets(edge))
+        return targets
+
+    def closure(self, paths, downstream=True, max_depth=None):
+        """
+        Breadth-first walk from all paths at once.
+        :type paths: iterable
+        :type downstream: bool
+            Follow the applications that depend on paths if True, the
+            applications paths depend on if False.
+        :type max_depth: int or None
+        :rtype: dict
+            {application path: number of hops from the nearest of paths},
+            without paths themselves.
+        """
+        start = set(paths)
+        depths = dict()
+        level = list(start)
+        depth = 0
+        while level and (max_depth is None or depth < max_depth):
+            depth += 1
+            following = list()
+            for node in level:
+                if downstream:
+                    neighbours = self._dependents(node, self._exact,
+                                                  self._trie)
+                else:
+                    neighbours = self.upstream(node)
+                for neighbour in neighbours:
+                    if neighbour not in start and neighbour not in depths:
+                        depths[neighbour] = depth
+                        following.append(neighbour)
+            level = following
+        return depths
+
+    def cycles(self):
+        """
+        Strongly connected components of the dependency graph, found with
+        an iterative version of Tarjan's algorithm.
+        :rtype: list
+            [sorted list of the applications in one cycle]
+        """
+        if self._cycles is not None:
+            return self._cycles
+
+        index = dict()
+        low = dict()
+        stack = list()
+        on_stack = set()
+        cycles = list()
+        for root in self._paths:
+            if root in index:
+                continue
+            work = [(root, iter(sorted(self.upstream(root))))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, neighbours = work[-1]
+                for neighbour in neighbours:
+                    if neighbour not in index:
+                        index[neighbour] = low[neighbour] = len(index)
+                        stack.append(neighbour)
+                        on_stack.add(neighbour)
+                        upstream = sorted(self.upstream(neighbour))
+                        work.append((neighbour, iter(upstream)))
+                        break
+                    elif neighbour in on_stack:
+                        low[node] = min(low[node], index[neighbour])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = list()
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if (len(component) > 1 or
+                                node in self.upstream(node)):
+                            cycles.append(sorted(component))
+
+        self._cycles = sorted(cycles)
+        return self._cycles
+
+    def operational_closure(self, path):
+        """
+        :type path: str
+        :rtype: frozenset
+            Applications that depend operationally on path, directly or
+            through other applications. Does not include path itself.
+        """
+        closure = self._closures.get(path, None)
+        if closure is not None:
+            self._closure_stats['hits'] += 1
+            return closure
+
+        self._closure_stats['misses'] += 1
+        seen = set()
+        stack = [path]
+        while stack:
+            node = stack.pop()
+            for dependent in self._dependents(node, self._op_exact,
+                                              self._op_trie):
+                if dependent in seen:
+                    continue
+                seen.add(dependent)
+                known = self._closures.get(dependent, None)
+                if known is None:
+                    stack.append(dependent)
+                else:
+                    # everything reachable from there is already known
+                    seen.update(known)
+
+        seen.discard(path)
+        closure = self._closures[path] = frozenset(seen)
+        for member in closure | set([path]):
+            self._members.setdefault(member, set()).add(path)
+        return closure
+
+    def operational_closures(self):
+        """
+        :rtype: dict
+            {application path: frozenset(operational dependents)}
+        """
+        return dict((path, self.operational_closure(path))
+                    for path in self._paths)
+
+    def clear(self):
+        self._exact.clear()
+        self._trie.clear()
+        self._op_exact.clear()
+        self._op_trie.clear()
+        self._edges.clear()
+        self._closures.clear()
+        self._members.clear()
+        self._cycles = None
+        del self._paths[:]
+
+    def _dependents(self, path, exact, trie):
+        """
+        :type path: str
+        :type exact: dict
+        :type trie: dict
+        :rtype: dict
+            {dependent: number of its dependencies matching path}
+        """
+        counts = dict(exact.get(path, {}))
+        node = trie
+        for char in path:
+            node = node.get(char, None)
+            if node is None:
+                break
+            for dependent, count in node.get(self._DEPENDENTS, {}).iteritems():
+                counts[dependent] = counts.get(dependent, 0) + count
+        return counts
+
+    def _invalidate(self, paths):
+        """
+        Forget the memoized closures that any of the paths is part of.
+        :type paths: set
+        """
+        for path in paths:
+            for key in self._members.pop(path, ()):
+                closure = self._closures.pop(key, None)
+                if closure is None:
+                    continue
+                self._closure_stats['invalidated'] += 1
+                for member in closure | set([key]):
+                    keys = self._members.get(member, None)
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del self._members[member]
+
+    def _add_path(self, path):
+        """
+        :type path: str
+        """
+        index = bisect_left(self._paths, path)
+        if index == len(self._paths) or self._paths[index] != path:
+            insort(self._paths, path)
+
+    def _parse_edges(self, data):
+        """
+        :type data: dict
+        :rtype: list
+            [(type, path, operational)]
+        """
+        return [(d['type'], d['path'], d.get('operational', None) is True)
+                for d in data.get('dependencies', [])
+                if d.get('type') in (PredicateType.ZOOKEEPERHASCHILDREN,
+                                     PredicateType.ZOOKEEPERHASGRANDCHILDREN)
+                and d.get('path') is not None]
+
+    def _targets(self, edge):
+        """
+        Application paths matched by a dependency.
+        :type edge: tuple
+        :rtype: list
+        """
+        dep_type, dep_path, _ = edge
+        if dep_type == PredicateType.ZOOKEEPERHASCHILDREN:
+            index = bisect_left(self._paths, dep_path)
+            if index < len(self._paths) and self._paths[index] == dep_path:
+                return [dep_path]
+            return list()
+
+        targets = list()
+        index = bisect_left(self._paths, dep_path)
+        while (index < len(self._paths) and
+               self._paths[index].startswith(dep_path)):
+            targets.append(self._paths[index])
+            index += 1
+        return targets
+
+    def _indexes(self, edge):
+        """
+        :type edge: tuple
+        :rtype: list
+            [(exact index, trie)] the edge belongs in
+        """
+        indexes = [(self._exact, self._trie)]
+        if edge[2]:
+            indexes.append((self._op_exact, self._op_trie))
+        return indexes
+
+    def _link(self, dependent, edge):
+        """
+        :type dependent: str
+        :type edge: tuple
+        """
+        for exact, trie in self._indexes(edge):
+            self._link_index(exact, trie, dependent, edge)
+
+    def _link_index(self, exact, trie, dependent, edge):
+        """
+        :type exact: dict
+        :type trie: dict
+        :type dependent: str
+        :type edge: tuple
+        """
+        dep_type, dep_path, _ = edge
+        if dep_type == PredicateType.ZOOKEEPERHASCHILDREN:
+            counts = exact.setdefault(dep_path, dict())
+        else:
+            node = trie
+            for char in dep_path:
+                node = node.setdefault(char, dict())
+            counts = node.setdefault(self._DEPENDENTS, dict())
+        counts[dependent] = counts.get(dependent, 0) + 1
+
+    def _unlink(self, dependent, edge):
+        """
+        :type dependent: str
+        :type edge: tuple
+        """
+        for exact, trie in self._indexes(edge):
+            self._unlink_index(exact, trie, dependent, edge)
+
+    def _unlink_index(self, exact, trie, dependent, edge):
+        """
+        :type exact: dict
+        :type trie: dict
+        :type dependent: str
+        :type edge: tuple
+        """
+        dep_type, dep_path, _ = edge
+        if dep_type == PredicateType.ZOOKEEPERHASCHILDREN:
+            self._decrement(exact, dep_path, dependent)
+            return
+
+        nodes = [(None, trie)]
+        for char in dep_path:
+            node = nodes[-1][1].get(char, None)
+            if node is None:
+                return
+            nodes.append((char, node))
+
+        self._decrement(nodes[-1][1], self._DEPENDENTS, dependent)
+        # prune branches that no longer lead to any dependency
+        while len(nodes) > 1 and not nodes[-1][1]:
+            char, node = nodes.pop()
+            del nodes[-1][1][char]
+
+    def _decrement(self, container, key, dependent):
+        """
+        :type container: dict
+        :type key: str or None
+        :type dependent: str
+        """
+        counts = container.get(key, None)
+        if counts is None or dependent not in counts:
+            return
+        counts[dependent] -= 1
+        if not counts[dependent]:
+            del counts[dependent]
+        if not counts:
+            del container[key]
@@ -1,19 +1,23 @@
 import logging
 
 from zoom.common.decorators import connected_with_return
+from zoom.www.cache.watch_registry import WatchRegistry
 from zoom.www.messages.global_mode_message import GlobalModeMessage
 
 
 class GlobalCache(object):
-    def __init__(self, configuration, zoo_keeper, web_socket_clients):
+    def __init__(self, configuration, zoo_keeper, message_throttle,
+                 watch_registry):
         """
         :type configuration: zoom.www.config.configuration.Configuration
         :type zoo_keeper: kazoo.client.KazooClient
-        :type web_socket_clients: list
+        :type message_throttle: zoom.www.messages.message_throttler.MessageThrottle
+        :type watch_registry: zoom.www.cache.watch_registry.WatchRegistry
         """
         self._configuration = configuration
         self._zoo_keeper = zoo_keeper
-        self._web_socket_clients = web_socket_clients
+        self._message_throttle = message_throttle
+        self._watch_registry = watch_registry
 
     def start(self):
         pass
@@ -23,8 +27,9 @@ class GlobalCache(object):
 
     @connected_with_return(GlobalModeMessage('{"mode":"Unknown"}'))
     def get_mode(self):
-        data, stat = self._zoo_keeper.get(
-            self._configuration.global_mode_path, watch=self.on_update)
+        data, stat = self._watch_registry.call(
+            self._zoo_keeper.get, self._configuration.global_mode_path,
+            WatchRegistry.DATA, self.on_update)
 
         logging.info("Global Mode retrieved from ZooKeeper {0}"
                      .format(self._configuration.global_mode_path))
@@ -36,10 +41,9 @@ class GlobalCache(object):
         """
         try:
             message = self.get_mode()
-            logging.debug('Sending update: {0}'.format(message.to_json()))
-
-            for client in self._web_socket_clients:
-                client.write_message(message.to_json())
+            logging.debug('Sending global mode update: {0}'
+                          .format(message.mode))
+            self._message_throttle.add_message(message)
 
         except Exception:
             logging.exception('An unhandled Exception has occurred')
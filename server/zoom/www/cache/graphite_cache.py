@@ -0,0 +1,172 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class GraphiteCache(object):
+    """
+    Bounded cache of Graphite startup times.
+    Entries expire after `ttl` seconds, failed lookups are cached for the
+    shorter `negative_ttl` so they are not retried on every walk, and the
+    least recently used entries are evicted once `max_size` is reached.
+    A hit on an entry that is older than `refresh_ahead` of its TTL calls
+    `refresh` with the path, so hot entries are renewed before they expire.
+    """
+    def __init__(self, max_size=10000, ttl=3600, negative_ttl=60,
+                 refresh_ahead=0.8, refresh=None, clock=time.time):
+        """
+        :type max_size: int
+        :type ttl: float
+            Seconds a fetched entry is valid.
+        :type negative_ttl: float
+            Seconds a failed lookup is valid.
+        :type refresh_ahead: float
+            Fraction of the TTL after which a hit triggers a refresh.
+        :type refresh: types.FunctionType or None
+            Called with a path that should be fetched again.
+        :type clock: types.FunctionType
+        """
+        self._max_size = max(int(max_size), 1)
+        self._ttl = float(ttl)
+        self._negative_ttl = float(negative_ttl)
+        self._refresh_ahead = float(refresh_ahead)
+        self._refresh = refresh
+        self._clock = clock
+        self._lock = Lock()
+        # {path: {'data': dict, 'created': float, 'expires': float,
+        #         'negative': bool, 'refreshing': bool}}
+        self._entries = OrderedDict()
+        self._stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'evictions': 0,
+            'refreshes': 0
+        }
+
+    @property
+    def stats(self):
+        """
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_size'] = self._max_size
+            stats['negative_entries'] = len(
+                [e for e in self._entries.itervalues() if e['negative']])
+        return stats
+
+    def get(self, path, default=None):
+        """
+        :type path: str
+        :type default: object
+        :rtype: dict or object
+            {'ave': 0, 'max': 0, 'min': 0}, or default on a miss.
+        """
+        refresh = False
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            now = self._clock()
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+
+            if entry['expires'] <= now:
+                self._stats['misses'] += 1
+                self._stats['expirations'] += 1
+                return default
+
+            # move to the most recently used end
+            self._entries[path] = entry
+            if entry['negative']:
+                self._stats['negative_hits'] += 1
+            else:
+                self._stats['hits'] += 1
+                age = now - entry['created']
+                if (not entry['refreshing'] and
+                        age >= self._ttl * self._refresh_ahead):
+                    entry['refreshing'] = True
+                    self._stats['refreshes'] += 1
+                    refresh = True
+            data = entry['data']
+
+        if refresh and self._refresh is not None:
+            requested = False
+            try:
+                self._refresh(path)
+                requested = True
+            finally:
+                if not requested:
+                    # let the next hit try again
+                    self.refresh_failed(path)
+        return data
+
+    def refresh_failed(self, path):
+        """
+        Allow another refresh of path, whose refresh did not happen.
+        :type path: str
+        """
+        with self._lock:
+            entry = self._entries.get(path, None)
+            if entry is not None:
+                entry['refreshing'] = False
+
+    def deadline(self, path):
+        """
+        When a hit on path would refresh or miss it.
+        :type path: str
+        :rtype: float or None
+        """
+        with self._lock:
+            entry = self._entries.get(path, None)
+            if entry is None:
+                return None
+            if entry['negative'] or entry['refreshing']:
+                return entry['expires']
+            return min(entry['expires'],
+                       entry['created'] + self._ttl * self._refresh_ahead)
+
+    def peek(self, path):
+        """
+        Like get, but without touching the counters or the LRU order.
+        :type path: str
+        :rtype: dict or None
+        """
+        with self._lock:
+            entry = self._entries.get(path, None)
+            if entry is None or entry['expires'] <= self._clock():
+                return None
+            return entry['data']
+
+    def put(self, path, data, negative=False):
+        """
+        :type path: str
+        :type data: dict
+        :type negative: bool
+            Whether data is a placeholder for a failed lookup.
+        """
+        with self._lock:
+            now = self._clock()
+            ttl = self._negative_ttl if negative else self._ttl
+            self._entries.pop(path, None)
+            self._entries[path] = {'data': data,
+                                   'created': now,
+                                   'expires': now + ttl,
+                                   'negative': negative,
+                                   'refreshing': False}
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, path):
+        with self._lock:
+            return path in self._entries
+
+    def __len__(self):
+        return len(self._entries)
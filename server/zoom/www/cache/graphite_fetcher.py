@@ -0,0 +1,156 @@
+import httplib
+import logging
+import requests
+from collections import OrderedDict
+from threading import Condition, Lock, Thread
+
+from requests.adapters import HTTPAdapter
+
+
+class GraphiteFetcher(object):
+    """
+    Fetch application startup times from Graphite on a background thread.
+    Paths are queued with `request` and fetched in batches, with one render
+    request for many applications over a pooled HTTP session. Results and
+    failed lookups are handed to `callback` as they land.
+    """
+    STATE_ROOT = '/spot/software/state/'
+    TARGET = ("alias(aggregateLine(Infrastructure.startup.{0}.runtime,"
+              "'{1}'),'{0}:{1}')")
+
+    def __init__(self, graphite_host, callback, batch_size=50, timeout=5):
+        """
+        :type graphite_host: str
+        :type callback: types.FunctionType
+            Called with {path: {'ave': 0, 'max': 0, 'min': 0}} and the list
+            of paths that could not be fetched.
+        :type batch_size: int
+            Maximum number of applications per render request.
+        :type timeout: float
+            Seconds to wait for a render request.
+        """
+        self._host = graphite_host
+        self._callback = callback
+        self._batch_size = max(int(batch_size), 1)
+        self._timeout = timeout
+        self._session = requests.Session()
+        self._session.mount('http://', HTTPAdapter(pool_connections=1,
+                                                   pool_maxsize=2))
+        self._lock = Lock()
+        self._condition = Condition(self._lock)
+        self._pending = OrderedDict()
+        self._in_flight = set()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self._thread = Thread(target=self._run, name='graphite_fetcher')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+
+    def request(self, path):
+        """
+        Queue a path to be fetched, unless it already is.
+        :type path: str
+        """
+        with self._lock:
+            if path in self._pending or path in self._in_flight:
+                return
+            self._pending[path] = None
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                batch = list()
+                while self._pending and len(batch) < self._batch_size:
+                    path, _ = self._pending.popitem(last=False)
+                    batch.append(path)
+                self._in_flight.update(batch)
+
+            try:
+                results, failed = self.fetch(batch)
+                self._callback(results, failed)
+            except Exception:
+                logging.exception('An unhandled Exception has occurred')
+            finally:
+                with self._lock:
+                    self._in_flight.difference_update(batch)
+
+    def fetch(self, paths):
+        """
+        Fetch the startup times of several applications with one request.
+        :type paths: list
+        :rtype: tuple
+            ({path: {'ave': 0, 'max': 0, 'min': 0}}, [failed paths])
+        """
+        results = dict()
+        failed = list()
+        apps = dict()
+        for path in paths:
+            if self.STATE_ROOT in path:
+                app_path = path.split(self.STATE_ROOT)[1].replace('/', '.')
+                apps[app_path] = path
+            else:
+                logging.debug('No startup data for path: {0}'.format(path))
+                results[path] = {'ave': 0, 'max': 0, 'min': 0}
+
+        if not apps:
+            return results, failed
+
+        targets = list()
+        for app_path in apps:
+            for stat in ('max', 'min', 'avg'):
+                targets.append(self.TARGET.format(app_path, stat))
+
+        try:
+            response = self._session.post(
+                'http://{0}/render'.format(self._host),
+                data={'format': 'json', 'from': '-7d', 'target': targets},
+                timeout=self._timeout)
+        except Exception as e:
+            logging.error('Error getting startup data from graphite for {0} '
+                          'paths: {1}'.format(len(apps), e))
+            failed.extend(apps.itervalues())
+            return results, failed
+
+        if response.status_code != httplib.OK:
+            logging.error('Graphite returned {0} for {1} paths.'
+                          .format(response.status_code, len(apps)))
+            failed.extend(apps.itervalues())
+            return results, failed
+
+        for path in apps.itervalues():
+            results[path] = {'ave': 0, 'max': 0, 'min': 0}
+
+        for data in response.json():
+            app_path, _, stat = data['target'].rpartition(':')
+            path = apps.get(app_path, None)
+            if path is None:
+                logging.warn("Received graphite data {} with unknown "
+                             "target".format(data))
+            elif not data['datapoints']:
+                continue
+            elif stat == 'avg':
+                results[path]['ave'] = data['datapoints'][0][0]
+            elif stat == 'max':
+                results[path]['max'] = data['datapoints'][-1][0]
+            elif stat == 'min':
+                results[path]['min'] = data['datapoints'][0][0]
+
+        logging.debug('Fetched startup data for {0} paths from graphite.'
+                      .format(len(apps)))
+        return results, failed
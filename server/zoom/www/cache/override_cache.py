@@ -0,0 +1,126 @@
+import json
+import logging
+
+from kazoo.exceptions import NoNodeError
+
+from zoom.common.decorators import connected_with_return
+from zoom.www.cache.watch_registry import WatchRegistry
+
+
+class OverrideCache(object):
+    def __init__(self, override_node, zoo_keeper, watch_registry):
+        """
+        In-memory copy of the override node. The node is read once and then
+        only re-read when its watch fires and its version has changed.
+        :type override_node: str
+        :type zoo_keeper: kazoo.client.KazooClient
+        :type watch_registry: zoom.www.cache.watch_registry.WatchRegistry
+        """
+        self._override_node = override_node
+        self._zoo_keeper = zoo_keeper
+        self._watch_registry = watch_registry
+        self._overrides = dict()
+        self._version = None
+        self._loaded = False
+
+    @property
+    def overrides(self):
+        """
+        :rtype: dict
+            {'/app/path': {'pd_disabled': True, 'grayed': False}}
+        """
+        if not self._loaded:
+            self._read()
+        return self._overrides
+
+    def get(self, path, attr, default=None):
+        """
+        :type path: str
+        :type attr: str
+        :type default: object
+        """
+        return self.overrides.get(path, {}).get(attr, default)
+
+    def reload(self):
+        """
+        Force a re-read of the override node on next access.
+        """
+        self._loaded = False
+        self._version = None
+
+    def update(self, path, key, value):
+        """
+        Write an override value to ZooKeeper and to the local copy. The node
+        is read with a watch, so later changes made elsewhere are seen.
+        :type path: str
+        :type key: str
+        :type value: object
+        """
+        logging.debug("Updating override for path: {0}, key: {1} value: {2}"
+                      .format(path, key, value))
+        try:
+            override_str, stat = self._watch_registry.call(
+                self._zoo_keeper.get, self._override_node,
+                WatchRegistry.DATA, self._on_update)
+            override_dict = json.loads(override_str)
+
+            state = override_dict.get(path, {})
+            state.update({key: value})
+            override_dict.update({path: state})
+
+            new_stat = self._zoo_keeper.set(self._override_node,
+                                            json.dumps(override_dict))
+            self._overrides = override_dict
+            # our own write fires the watch, no need to parse it again
+            self._version = getattr(new_stat, 'version', None)
+            self._loaded = True
+
+        except NoNodeError as err:
+            logging.debug('Unable to find {0}, {1}'
+                          .format(self._override_node, err))
+            self._build_default_override_store()
+            self.update(path, key, value)
+
+    def _build_default_override_store(self):
+        logging.debug('Override storage node not found, creating')
+        _template = {}
+        self._zoo_keeper.create(self._override_node,
+                                json.dumps(_template), makepath=True)
+
+    def _on_update(self, event=None):
+        """
+        :type event: kazoo.protocol.states.WatchedEvent or None
+        """
+        self._read()
+
+    @connected_with_return(None)
+    def _read(self):
+        try:
+            data, stat = self._watch_registry.call(self._zoo_keeper.get,
+                                                   self._override_node,
+                                                   WatchRegistry.DATA,
+                                                   self._on_update)
+        except NoNodeError:
+            # get notified when the node gets created
+            self._watch_registry.call(self._zoo_keeper.exists,
+                                      self._override_node, WatchRegistry.DATA,
+                                      self._on_update)
+            self._overrides = dict()
+            self._version = None
+            self._loaded = True
+            return
+
+        if self._loaded and stat.version == self._version:
+            logging.debug('Override node {0} is unchanged.'
+                          .format(self._override_node))
+            return
+
+        try:
+            self._overrides = json.loads(data)
+            self._version = stat.version
+        except (TypeError, ValueError) as err:
+            logging.critical('There was a problem returning values from the '
+                             'override cache: {0}'.format(err))
+            self._overrides = dict()
+
+        self._loaded = True
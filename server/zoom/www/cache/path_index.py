@@ -0,0 +1,93 @@
+import re
+from bisect import bisect_left
+from collections import OrderedDict
+from threading import Lock
+
+# characters that end the literal prefix of a pattern
+SPECIAL = frozenset('.^$*+?{}[]\\|()')
+
+
+def literal_prefix(pattern):
+    """
+    :type pattern: str
+    :rtype: tuple
+        (prefix every string the pattern matches starts with,
+         whether the pattern is nothing but that prefix)
+    """
+    if '|' in pattern:
+        return '', False
+
+    for i, char in enumerate(pattern):
+        if char in SPECIAL:
+            # the character before these quantifiers is optional
+            if char in '*?{' and i > 0:
+                i -= 1
+            return pattern[:i], False
+
+    return pattern, True
+
+
+class PathIndex(object):
+    """
+    Sorted paths that answer re.match queries. The literal prefix of a
+    pattern is looked up with bisect, so the regex only runs on the paths
+    that start with it, or not at all if the pattern is a plain prefix.
+    Compiled patterns are kept in an LRU.
+    """
+    def __init__(self, pattern_cache_size=256):
+        """
+        :type pattern_cache_size: int
+        """
+        self._paths = list()
+        self._version = None
+        self._patterns = OrderedDict()  # {pattern: compiled pattern}
+        self._pattern_cache_size = max(int(pattern_cache_size), 1)
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def refresh(self, paths, version):
+        """
+        Rebuild the index if the paths changed.
+        :type paths: iterable
+        :type version: int
+            Changes whenever paths are added or removed.
+        """
+        with self._lock:
+            if version != self._version:
+                self._paths = sorted(paths)
+                self._version = version
+
+    def match(self, pattern):
+        """
+        :type pattern: str
+        :rtype: list
+            The sorted paths that pattern matches from the start.
+        """
+        prefix, literal = literal_prefix(pattern)
+        with self._lock:
+            paths = self._paths
+            regex = None if literal else self._compile(pattern)
+
+        i = bisect_left(paths, prefix)
+        result = list()
+        while i < len(paths) and paths[i].startswith(prefix):
+            if regex is None or regex.match(paths[i]):
+                result.append(paths[i])
+            i += 1
+        return result
+
+    def _compile(self, pattern):
+        """
+        Call with the lock held.
+        :type pattern: str
+        :rtype: _sre.SRE_Pattern
+        """
+        regex = self._patterns.pop(pattern, None)
+        if regex is None:
+            regex = re.compile(pattern)
+            while len(self._patterns) >= self._pattern_cache_size:
+                self._patterns.popitem(last=False)
+        self._patterns[pattern] = regex
+        return regex
@@ -0,0 +1,79 @@
+import gzip
+import uuid
+from cStringIO import StringIO
+from threading import Lock
+
+
+class Snapshot(object):
+    """
+    The encoded contents of a whole cache, kept until the cache changes.
+    The gzipped copy is made on the first request that accepts it.
+    """
+    def __init__(self, encode, compress_level=6):
+        """
+        :type encode: types.FunctionType
+            Returns the contents of the cache as JSON.
+        :type compress_level: int
+        """
+        self._encode = encode
+        self._compress_level = compress_level
+        # versions restart with the process, so the ETag must not match
+        # what an earlier process sent
+        self._epoch = uuid.uuid4().hex[:8]
+        self._version = None
+        self._data = None
+        self._gzipped = None
+        self._lock = Lock()
+        self._stats = {'hits': 0, 'builds': 0}
+
+    @property
+    def stats(self):
+        """
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['bytes'] = len(self._data or '')
+            stats['gzipped_bytes'] = len(self._gzipped or '')
+        return stats
+
+    def etag(self, version):
+        """
+        :type version: int
+        :rtype: str
+        """
+        return '"{0}-{1}"'.format(self._epoch, version)
+
+    def get(self, version, gzipped=False):
+        """
+        :type version: int
+            The version of the cache now. The cache may change while it is
+            encoded, so it has to be read before.
+        :type gzipped: bool
+        :rtype: str
+        """
+        with self._lock:
+            if version != self._version or self._data is None:
+                self._data = self._encode()
+                self._gzipped = None
+                self._version = version
+                self._stats['builds'] += 1
+            else:
+                self._stats['hits'] += 1
+
+            if not gzipped:
+                return self._data
+            if self._gzipped is None:
+                self._gzipped = self._compress(self._data)
+            return self._gzipped
+
+    def _compress(self, data):
+        """
+        :type data: str
+        :rtype: str
+        """
+        buf = StringIO()
+        with gzip.GzipFile(mode='wb', fileobj=buf,
+                           compresslevel=self._compress_level) as f:
+            f.write(data)
+        return buf.getvalue()
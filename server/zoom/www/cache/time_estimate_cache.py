@@ -1,63 +1,117 @@
 import datetime
-import httplib
 import logging
 import re
 import requests
+import time
+from bisect import bisect_left, insort
+from threading import RLock
 
 from zoom.common.types import PredicateType
-from zoom.common.decorators import TimeThis
+from zoom.common.decorators import TimeThis, synchronous
+from zoom.www.cache.graphite_cache import GraphiteCache
+from zoom.www.cache.graphite_fetcher import GraphiteFetcher
 from zoom.www.messages.timing_estimate import TimeEstimateMessage
-from zoom.www.messages.message_throttler import MessageThrottle
 
 
 class TimeEstimateCache(object):
 
-    def __init__(self, configuration, web_socket_clients):
+    def __init__(self, configuration, message_throttle):
         """
         :type configuration: zoom.www.config.configuration.Configuration
-        :type web_socket_clients: list
+        :type message_throttle: zoom.www.messages.message_throttler.MessageThrottle
         """
         self.configuration = configuration
-        self._web_socket_clients = web_socket_clients
-        self._message_throttle = MessageThrottle(configuration,
-                                                 web_socket_clients)
+        self._message_throttle = message_throttle
         self.graphite = GraphiteAvailability(configuration.graphite_host,
                                              recheck=configuration.graphite_recheck)
-        self.graphite_cache = {}
+        self._fetcher = GraphiteFetcher(
+            configuration.graphite_host, self._on_graphite_data,
+            batch_size=configuration.graphite_batch_size,
+            timeout=configuration.graphite_timeout)
+        self.graphite_cache = GraphiteCache(
+            max_size=configuration.graphite_cache_size,
+            ttl=configuration.graphite_cache_ttl,
+            negative_ttl=configuration.graphite_negative_ttl,
+            refresh=self._fetcher.request)
         self.dependencies = {}
         self.states = {}
+        # the state and dependency caches update us from their own threads
+        self._lock = RLock()
+        # persistent DAG with memoized costs, only invalidated for the
+        # applications downstream of a change
+        self._costs = {}  # {path: {'ave': 0, 'max': 0, 'min': 0}}
+        self._upstream = {}  # {path: set(paths it waits on)}
+        self._downstream = {}  # {path: set(paths waiting on it)}
+        self._grandchildren = {}  # {grand_path: set(dependents)}
+        self._grand_paths = {}  # {dependent: set(grand_paths)}
+        self._keys = []  # sorted [(path.lower(), path)]
+        # when the graphite data used in a memoized cost has to be read
+        # again, to refresh or expire it
+        self._graphite_due = {}  # {path: deadline}
+        self._next_due = None
+        self._clock = time.time
+        self._message = None
+        self._available = None
 
     def start(self):
-        self._message_throttle.start()
+        self._fetcher.start()
 
     def stop(self):
-        self._message_throttle.stop()
+        self._fetcher.stop()
 
+    @synchronous('_lock')
     def reload(self):
         self.graphite_cache.clear()
+        self._invalidate_all()
         self.load()
 
+    @synchronous('_lock')
     def update_states(self, states):
         """
         :type states: dict
         """
-        self.states.update(states)
-        self.load(send=True)
-
+        changed = False
+        for path, state in states.iteritems():
+            waiting = self._is_waiting(path)
+            self.states[path] = state
+            if self._is_waiting(path) != waiting:
+                self._invalidate(path)
+                changed = True
+
+        if changed or self._message is None:
+            self.load(send=True)
+
+    @synchronous('_lock')
     def update_dependencies(self, deps):
         """
         :type deps: dict
         """
-        self.dependencies.update(deps)
+        for path, data in deps.iteritems():
+            if path not in self.dependencies:
+                self._add_key(path)
+            self.dependencies[path] = data
+            self._set_upstream(path, data)
+            self._invalidate(path)
+
         self.load(send=True)
 
     @TimeThis(__file__)
+    @synchronous('_lock')
     def load(self, send=False):
         """
         :type send: bool
             Whether to send messages to clients.
         :rtype: zoom.www.messages.global_mode_message.TimeEstimateMessage
         """
+        available = self.graphite.available
+        if available != self._available:
+            self._available = available
+            self._invalidate_all()
+
+        self._invalidate_due()
+        if self._message is not None:
+            return self._message
+
         logging.debug("Recomputing Timing Estimates...")
         # Pre-define path in case we except out before it's declared
         path = None
@@ -66,11 +120,10 @@ class TimeEstimateCache(object):
 
             cost = self._get_default_data()
             maxpath = "None"
-            searchdata = {}
 
-            if self.states and self.graphite.available:
+            if self.states and available:
                 for path in self.dependencies.iterkeys():
-                    data = self._get_max_cost(path, searchdata)
+                    data = self._get_max_cost(path)
                     if data['max'] > cost['max']:
                         maxpath = path
                     self._get_greatest_cost(cost, data)
@@ -85,6 +138,17 @@ class TimeEstimateCache(object):
             if all((send, self.dependencies, self.states)):
                 self._message_throttle.add_message(message)
 
+            self._message = message
+            return message
+
+        except CircularDependencyError as e:
+            logging.error(e)
+            message = TimeEstimateMessage()
+            message.update({'error_msg': 'Circular dependency on ' + e.path})
+            if all((send, self.dependencies, self.states)):
+                self._message_throttle.add_message(message)
+            # kept until a dependency changes, like a computed estimate
+            self._message = message
             return message
 
         except RuntimeError as e:
@@ -98,47 +162,156 @@ class TimeEstimateCache(object):
         except Exception as e:
             logging.exception(e)
 
-    def _get_max_cost(self, path, searchdata):
+    def _get_max_cost(self, path, visiting=None):
         """
         :type path: str
-        :type searchdata: dict
+        :type visiting: set or None
+            Paths whose cost is being computed further up the stack
         :rtype: dict
             Example: {'ave': 0, 'max': 0, 'min': 0}
+        :raises CircularDependencyError: if path depends on itself
         """
-        # init internal search data
-        cached_cost = searchdata.get(path, None)
+        cached_cost = self._costs.get(path, None)
         if cached_cost is not None:
             return cached_cost
 
-        dep_data = self.dependencies.get(path, None)
+        if visiting is None:
+            visiting = set()
+        if path in visiting:
+            raise CircularDependencyError(path)
+        visiting.add(path)
+
         greatest_cost = self._get_default_data()
 
         # take greatest_cost and record the largest cost from all a path's
         # dependencies.
-        if dep_data:
-            for i in dep_data['dependencies']:
-                # expecting: i = {'path': '/foo/bar', 'type': 'baz'}
-                if i.get('type').lower() == PredicateType.ZOOKEEPERHASCHILDREN:
-                    cached_cost = self._get_max_cost(i.get("path", None), searchdata)
-                    self._get_greatest_cost(greatest_cost, cached_cost)
-
-                elif i.get('type').lower() == PredicateType.ZOOKEEPERHASGRANDCHILDREN:
-                    grand_path = i.get("path")
-                    for key in self.dependencies.iterkeys():
-                        if key.lower().startswith(grand_path) and key.lower() != grand_path:
-                            cached_cost = self._get_max_cost(key, searchdata)
-                            self._get_greatest_cost(greatest_cost, cached_cost)
+        for upstream in self._upstream.get(path, ()):
+            cached_cost = self._get_max_cost(upstream, visiting)
+            self._get_greatest_cost(greatest_cost, cached_cost)
+
+        visiting.discard(path)
 
         # if application is not running, add its cost (from graphite) to the
         # greatest cost of its dependencies
-        if (self.states.get(path, None) is not None and
-                self.states[path].get('application_status', None) != "running"):
+        if self._is_waiting(path):
             graphite_data = self.get_graphite_data(path)
             self._add_data(greatest_cost, graphite_data)
+            self._set_due(path)
 
-        searchdata.update({path: greatest_cost})
+        self._costs[path] = greatest_cost
         return greatest_cost
 
+    def _is_waiting(self, path):
+        """
+        Whether the startup time of path counts towards the estimate.
+        :type path: str
+        :rtype: bool
+        """
+        return (self.states.get(path, None) is not None and
+                self.states[path].get('application_status', None) != "running")
+
+    def _add_key(self, path):
+        """
+        Index a new dependency path and link it to the grandchildren
+        dependencies it satisfies.
+        :type path: str
+        """
+        lower = path.lower()
+        insort(self._keys, (lower, path))
+        for i in xrange(len(lower)):
+            for dependent in self._grandchildren.get(lower[:i], ()):
+                self._link(dependent, path)
+
+    def _set_upstream(self, path, data):
+        """
+        Replace the edges from path to the paths it depends on.
+        :type path: str
+        :type data: dict
+        """
+        for upstream in self._upstream.pop(path, set()):
+            self._downstream.get(upstream, set()).discard(path)
+        for grand_path in self._grand_paths.pop(path, set()):
+            self._grandchildren.get(grand_path, set()).discard(path)
+
+        self._upstream[path] = set()
+        for i in data.get('dependencies', []):
+            # expecting: i = {'path': '/foo/bar', 'type': 'baz'}
+            dep_type = i.get('type').lower()
+            dep_path = i.get('path', None)
+            if dep_path is None:
+                continue
+
+            if dep_type == PredicateType.ZOOKEEPERHASCHILDREN:
+                self._link(path, dep_path)
+
+            elif dep_type == PredicateType.ZOOKEEPERHASGRANDCHILDREN:
+                self._grandchildren.setdefault(dep_path, set()).add(path)
+                self._grand_paths.setdefault(path, set()).add(dep_path)
+                index = bisect_left(self._keys, (dep_path,))
+                while (index < len(self._keys) and
+                       self._keys[index][0].startswith(dep_path)):
+                    if self._keys[index][0] != dep_path:
+                        self._link(path, self._keys[index][1])
+                    index += 1
+
+    def _link(self, dependent, upstream):
+        """
+        :type dependent: str
+        :type upstream: str
+        """
+        self._upstream.setdefault(dependent, set()).add(upstream)
+        self._downstream.setdefault(upstream, set()).add(dependent)
+
+    def _invalidate(self, path):
+        """
+        Drop the memoized cost of path and of everything waiting on it.
+        :type path: str
+        """
+        self._message = None
+        stack = [path]
+        seen = set()
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            self._costs.pop(current, None)
+            self._graphite_due.pop(current, None)
+            stack.extend(self._downstream.get(current, ()))
+
+    def _invalidate_all(self):
+        self._message = None
+        self._costs.clear()
+        self._graphite_due.clear()
+        self._next_due = None
+
+    def _set_due(self, path):
+        """
+        Remember when the graphite data of path is due to be read again.
+        :type path: str
+        """
+        deadline = self.graphite_cache.deadline(path)
+        if deadline is None:
+            return
+        self._graphite_due[path] = deadline
+        if self._next_due is None or deadline < self._next_due:
+            self._next_due = deadline
+
+    def _invalidate_due(self):
+        """
+        Drop the memoized costs that use graphite data which is past its
+        refresh-ahead point or expired, so the next walk reads it again.
+        """
+        now = self._clock()
+        if self._next_due is None or now < self._next_due:
+            return
+
+        due = [p for p, d in self._graphite_due.iteritems() if d <= now]
+        for path in due:
+            self._invalidate(path)
+        self._next_due = min(self._graphite_due.itervalues()) \
+            if self._graphite_due else None
+
     def _get_default_data(self):
         return {'ave': 0, 'max': 0, 'min': 0}
 
@@ -160,45 +333,64 @@ class TimeEstimateCache(object):
 
     def get_graphite_data(self, path):
         """
-        Grab startup times from graphite for a path.
+        Get startup times from graphite for a path. Uncached paths are
+        fetched in the background and read as zero until the data lands.
         :type path: str
         :rtype: dict
             Example: {'min': 0, 'max': 0, 'ave': 0}
         """
-        if self.graphite_cache.get(path, None) is not None:
-            return self.graphite_cache[path]
+        data = self.graphite_cache.get(path)
+        if data is not None:
+            return data
 
-        try:
-            app_path = path.split('/spot/software/state/')[1]
-            app_path = app_path.replace('/', '.')
-            url = ("http://{0}/render?format=json&from=-7d"
-                   "&target=alias(aggregateLine(Infrastructure.startup.{1}.runtime,'max'),'max')"
-                   "&target=alias(aggregateLine(Infrastructure.startup.{1}.runtime,'min'),'min')"
-                   "&target=alias(aggregateLine(Infrastructure.startup.{1}.runtime,'avg'),'avg')"
-                   .format(self.configuration.graphite_host, app_path))
-
-            response = requests.get(url, timeout=.5)
-
-            self.graphite_cache[path] = self._get_default_data()
-
-            if response.status_code == httplib.OK:
-                for data in response.json():
-                    if "avg" in data['target']:
-                        self.graphite_cache[path]['ave'] = data['datapoints'][0][0]
-                    elif "max" in data['target']:
-                        self.graphite_cache[path]['max'] = data['datapoints'][-1][0]
-                    elif "min" in data['target']:
-                        self.graphite_cache[path]['min'] = data['datapoints'][0][0]
-                    else:
-                        logging.warn("Received graphite data {} with unknown "
-                                     "target".format(data))
-
-            return self.graphite_cache[path]
-
-        except Exception:
-            logging.exception('Error getting startup data from graphite for '
-                              'path: {0}'.format(path))
-            return self._get_default_data()
+        self._fetcher.request(path)
+        return self._get_default_data()
+
+    @property
+    def graphite_stats(self):
+        """
+        :rtype: dict
+        """
+        return self.graphite_cache.stats
+
+    @synchronous('_lock')
+    def _on_graphite_data(self, results, failed):
+        """
+        Callback from the GraphiteFetcher. Store the new startup times and
+        send the updated estimate to clients.
+        :type results: dict
+            {path: {'min': 0, 'max': 0, 'ave': 0}}
+        :type failed: list
+            Paths that could not be fetched.
+        """
+        for path in failed:
+            # keep serving a valid entry whose refresh failed
+            if self.graphite_cache.peek(path) is None:
+                self.graphite_cache.put(path, self._get_default_data(),
+                                        negative=True)
+            else:
+                self.graphite_cache.refresh_failed(path)
+
+        for path, data in results.iteritems():
+            previous = self.graphite_cache.peek(path)
+            self.graphite_cache.put(path, data)
+            if data != previous and self._is_waiting(path):
+                self._invalidate(path)
+            elif path in self._graphite_due:
+                self._set_due(path)
+
+        if self._message is None:
+            self.load(send=True)
+
+
+class CircularDependencyError(RuntimeError):
+    def __init__(self, path):
+        """
+        :type path: str
+            An application whose dependencies lead back to it
+        """
+        RuntimeError.__init__(self, 'Circular dependency on {0}'.format(path))
+        self.path = path
 
 
 class GraphiteAvailability(object):
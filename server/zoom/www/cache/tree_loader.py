@@ -0,0 +1,117 @@
+import logging
+from collections import deque
+
+from kazoo.exceptions import NoNodeError
+
+from zoom.www.cache.watch_registry import WatchRegistry
+from zoom.agent.util.helpers import zk_path_join
+
+
+class TreeLoader(object):
+    """
+    Load a ZooKeeper tree with many requests in flight at once.
+    Requests are issued with the kazoo *_async calls and kept in a sliding
+    window of at most `window` outstanding requests, so the time to load a
+    tree is bound by the number of levels and the window, not by the number
+    of nodes times the ZooKeeper round trip.
+    """
+    CHILDREN = WatchRegistry.CHILDREN
+    DATA = WatchRegistry.DATA
+
+    def __init__(self, zoo_keeper, window=100, watch_registry=None):
+        """
+        :type zoo_keeper: kazoo.client.KazooClient
+        :type window: int
+        :type watch_registry: zoom.www.cache.watch_registry.WatchRegistry or None
+            If given, watches are set through the registry.
+        """
+        self._zoo_keeper = zoo_keeper
+        self._window = max(int(window), 1)
+        self._watch_registry = watch_registry
+        self.requests = 0
+
+    def walk(self, root, watch=None, data_watch=None):
+        """
+        List every node under root and read the data of every leaf.
+        :type root: str
+        :type watch: types.FunctionType or None
+            Child watch set on every node.
+        :type data_watch: types.FunctionType or None
+            Data watch set on every leaf.
+        :rtype: dict
+            {path: {'children': list, 'data': str or None,
+                    'stat': kazoo.protocol.states.ZnodeStat or None}}
+            Nodes that disappeared while loading are left out.
+        """
+        nodes = dict()
+        self._run([(root, self.CHILDREN)], nodes, watch, data_watch)
+        return nodes
+
+    def get_data(self, paths, watch=None):
+        """
+        Read the data of several nodes at once.
+        :type paths: list
+        :type watch: types.FunctionType or None
+        :rtype: dict
+            {path: (data, kazoo.protocol.states.ZnodeStat)}
+        """
+        nodes = dict()
+        self._run([(p, self.DATA) for p in paths], nodes, None, watch)
+        return dict((p, (n['data'], n['stat'])) for p, n in nodes.iteritems())
+
+    def _run(self, requests, nodes, watch, data_watch):
+        """
+        :type requests: list
+            [(path, kind)]
+        :type nodes: dict
+        """
+        pending = deque(requests)
+        in_flight = deque()
+
+        while pending or in_flight:
+            while pending and len(in_flight) < self._window:
+                path, kind = pending.popleft()
+                if kind == self.CHILDREN:
+                    watcher = self._watcher(path, kind, watch)
+                    result = self._zoo_keeper.get_children_async(
+                        path, watch=watcher)
+                else:
+                    watcher = self._watcher(path, kind, data_watch)
+                    result = self._zoo_keeper.get_async(path, watch=watcher)
+                self.requests += 1
+                in_flight.append((path, kind, watcher, result))
+
+            path, kind, watcher, result = in_flight.popleft()
+            try:
+                value = result.get()
+            except NoNodeError:
+                logging.debug('Node at {0} no longer exists.'.format(path))
+                if watcher is not None and self._watch_registry is not None:
+                    self._watch_registry.disarm(path, kind)
+                nodes.pop(path, None)
+                continue
+
+            if kind == self.CHILDREN:
+                nodes[path] = {'children': value, 'data': None, 'stat': None}
+                if value:
+                    for child in value:
+                        pending.append((zk_path_join(path, child),
+                                        self.CHILDREN))
+                else:
+                    pending.append((path, self.DATA))
+            else:
+                data, stat = value
+                node = nodes.setdefault(path, {'children': list()})
+                node['data'] = data
+                node['stat'] = stat
+
+    def _watcher(self, path, kind, callback):
+        """
+        :type path: str
+        :type kind: str
+        :type callback: types.FunctionType or None
+        :rtype: types.FunctionType or None
+        """
+        if callback is None or self._watch_registry is None:
+            return callback
+        return self._watch_registry.watcher(path, kind, callback)
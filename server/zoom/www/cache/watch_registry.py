@@ -0,0 +1,191 @@
+import logging
+import time
+from collections import OrderedDict
+from threading import Condition, Lock, Thread
+
+
+class WatchRegistry(object):
+    """
+    Keep at most one ZooKeeper watcher per (path, kind). Every cache asks the
+    registry for a watcher before setting a watch; if one is already armed
+    for that path the callback is attached to it and no new watcher is given
+    to kazoo. When a watch fires, events for the same path, event type and
+    callback that arrive within `coalesce_interval` seconds are delivered once.
+    """
+    CHILDREN = 'children'
+    DATA = 'data'
+
+    def __init__(self, coalesce_interval=0):
+        """
+        :type coalesce_interval: float
+            Seconds to hold fired events so duplicates can be coalesced.
+            0 delivers every event immediately on the kazoo callback thread.
+        """
+        self._interval = float(coalesce_interval)
+        self._lock = Lock()
+        self._condition = Condition(self._lock)
+        self._watches = dict()
+        self._generation = 0  # watchers handed out before a clear are stale
+        self._pending = OrderedDict()
+        self._running = False
+        self._thread = None
+        self._stats = {
+            'registered': 0,
+            'deduplicated': 0,
+            'fired': 0,
+            'coalesced': 0,
+            'delivered': 0,
+            'stale': 0
+        }
+
+    @property
+    def stats(self):
+        """
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['active_watches'] = len(self._watches)
+            stats['active_children_watches'] = len(
+                [k for k in self._watches if k[1] == self.CHILDREN])
+            stats['active_data_watches'] = len(
+                [k for k in self._watches if k[1] == self.DATA])
+            stats['active_callbacks'] = sum(len(c) for c in
+                                            self._watches.itervalues())
+            stats['pending_events'] = len(self._pending)
+            stats['coalesce_interval'] = self._interval
+        return stats
+
+    def start(self):
+        if self._interval > 0 and not self._running:
+            self._running = True
+            self._thread = Thread(target=self._run, name='watch_registry')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+        self._flush()
+
+    def clear(self):
+        """
+        Forget all armed watches, e.g. after the ZooKeeper session was lost.
+        Watchers handed out before are ignored if kazoo still calls them.
+        """
+        with self._lock:
+            self._watches.clear()
+            self._generation += 1
+
+    def watcher(self, path, kind, callback):
+        """
+        :type path: str
+        :type kind: str
+            WatchRegistry.CHILDREN or WatchRegistry.DATA
+        :type callback: types.FunctionType
+        :rtype: types.FunctionType or None
+            The function to hand to kazoo, or None if a watch on (path, kind)
+            is already armed.
+        """
+        key = (path, kind)
+        with self._lock:
+            callbacks = self._watches.get(key, None)
+            if callbacks is not None:
+                if callback in callbacks:
+                    self._stats['deduplicated'] += 1
+                callbacks.add(callback)
+                return None
+
+            self._watches[key] = set([callback])
+            self._stats['registered'] += 1
+            generation = self._generation
+
+        def _fire(event):
+            self._on_fire(key, generation, event)
+
+        return _fire
+
+    def disarm(self, path, kind):
+        """
+        Drop the watch on (path, kind), e.g. when kazoo did not set it.
+        :type path: str
+        :type kind: str
+        """
+        with self._lock:
+            self._watches.pop((path, kind), None)
+
+    def call(self, method, path, kind, callback, **kwargs):
+        """
+        Run a kazoo method with a registry-managed watch.
+        :type method: types.FunctionType
+            e.g. KazooClient.get_children
+        :type path: str
+        :type kind: str
+        :type callback: types.FunctionType
+        """
+        watch = self.watcher(path, kind, callback)
+        try:
+            return method(path, watch=watch, **kwargs)
+        except Exception:
+            if watch is not None:
+                self.disarm(path, kind)
+            raise
+
+    def _on_fire(self, key, generation, event):
+        """
+        :type key: tuple
+        :type generation: int
+        :type event: kazoo.protocol.states.WatchedEvent
+        """
+        with self._lock:
+            if generation != self._generation:
+                # the watch armed after the clear will deliver this event
+                self._stats['stale'] += 1
+                return
+            callbacks = self._watches.pop(key, set())
+            self._stats['fired'] += 1
+
+            if self._running:
+                for callback in callbacks:
+                    pending_key = (event.path, event.type, callback)
+                    if pending_key in self._pending:
+                        self._stats['coalesced'] += 1
+                    self._pending[pending_key] = event
+                self._condition.notify()
+                return
+
+        for callback in callbacks:
+            self._deliver(callback, event)
+
+    def _run(self):
+        while self._running:
+            with self._lock:
+                while self._running and not self._pending:
+                    self._condition.wait()
+            # let the burst build up
+            time.sleep(self._interval)
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            items = self._pending.items()
+            self._pending.clear()
+
+        for (path, event_type, callback), event in items:
+            self._deliver(callback, event)
+
+    def _deliver(self, callback, event):
+        """
+        :type callback: types.FunctionType
+        :type event: kazoo.protocol.states.WatchedEvent
+        """
+        with self._lock:
+            self._stats['delivered'] += 1
+        try:
+            callback(event)
+        except Exception:
+            logging.exception('An unhandled Exception has occurred in watch '
+                              'callback for {0}'.format(event.path))
@@ -0,0 +1,108 @@
+from zoom.agent.util.helpers import zk_path_join
+
+
+class ZnodeIndex(object):
+    """
+    In-memory index of the ZooKeeper nodes a cache has already walked.
+    For every node we remember its children, the ZnodeStat versions we last
+    saw and how many ZooKeeper round trips it took to fetch it. This lets a
+    cache compare a watch event against what it already knows and only fetch
+    the nodes that actually changed.
+    """
+    def __init__(self):
+        self._entries = dict()
+
+    def update(self, path, children=None, cversion=None, mzxid=None,
+               cost=None):
+        """
+        :type path: str
+        :type children: list or None
+        :type cversion: int or None
+            ZnodeStat.cversion seen when the children were listed.
+        :type mzxid: int or None
+            ZnodeStat.mzxid seen when the data was read.
+        :type cost: int or None
+            Number of round trips it took to fetch this node.
+        """
+        entry = self._entries.setdefault(path, {'children': set(),
+                                                'cversion': None,
+                                                'mzxid': None,
+                                                'cost': 0})
+        if children is not None:
+            entry['children'] = set(children)
+        if cversion is not None:
+            entry['cversion'] = cversion
+        if mzxid is not None:
+            entry['mzxid'] = mzxid
+        if cost is not None:
+            entry['cost'] = cost
+
+    def get(self, path):
+        """
+        :type path: str
+        :rtype: dict or None
+        """
+        return self._entries.get(path, None)
+
+    def children(self, path):
+        """
+        :type path: str
+        :rtype: set
+        """
+        entry = self._entries.get(path, None)
+        if entry is None:
+            return set()
+        return entry['children']
+
+    def is_leaf(self, path):
+        """
+        :type path: str
+        :rtype: bool
+        """
+        return path in self._entries and not self.children(path)
+
+    def subtree(self, path):
+        """
+        Return path and all of its indexed descendants.
+        :type path: str
+        :rtype: list
+        """
+        paths = list()
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            if current not in self._entries:
+                continue
+            paths.append(current)
+            for child in self.children(current):
+                stack.append(zk_path_join(current, child))
+        return paths
+
+    def subtree_cost(self, path):
+        """
+        Number of round trips a full re-walk of path would cost.
+        :type path: str
+        :rtype: int
+        """
+        return sum(self._entries[p]['cost'] for p in self.subtree(path))
+
+    def remove(self, path):
+        """
+        Remove path and all of its descendants from the index.
+        :type path: str
+        :rtype: list
+            The paths that were removed.
+        """
+        removed = self.subtree(path)
+        for p in removed:
+            del self._entries[p]
+        return removed
+
+    def clear(self):
+        self._entries.clear()
+
+    def __contains__(self, path):
+        return path in self._entries
+
+    def __len__(self):
+        return len(self._entries)
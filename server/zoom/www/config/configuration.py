@@ -87,6 +87,11 @@ class Configuration(object):
             self._read_write_groups = env_settings.get('read_write_groups')
             self._graphite_host = env_settings.get('graphite_host')
             self._graphite_recheck = env_settings.get('graphite_recheck', '5m')
+            self._graphite_batch_size = env_settings.get('graphite_batch_size', 50)
+            self._graphite_timeout = env_settings.get('graphite_timeout', 5)
+            self._graphite_cache_size = env_settings.get('graphite_cache_size', 10000)
+            self._graphite_cache_ttl = env_settings.get('graphite_cache_ttl', 3600)
+            self._graphite_negative_ttl = env_settings.get('graphite_negative_ttl', 60)
 
             # chatops
             chatops_settings = env_settings.get('chatops', {})
@@ -97,10 +102,18 @@ class Configuration(object):
             # message throttling
             throttle_settings = config.get('message_throttle')
             self._throttle_interval = throttle_settings.get('interval')
+            self._change_log_size = throttle_settings.get('change_log_size', 1000)
+            self._client_buffer_size = throttle_settings.get('client_buffer_size', 100)
 
             # salt
             self._salt_settings = env_settings.get('saltREST')
 
+            # cache
+            cache_settings = config.get('cache', {})
+            self._incremental_walk = cache_settings.get('incremental_walk', True)
+            self._tree_loader_window = cache_settings.get('tree_loader_window', 100)
+            self._watch_coalesce_interval = cache_settings.get('watch_coalesce_interval', 0.1)
+
         except ValueError as e:
             logging.error('Data at {0} is not valid JSON.'.format(ZOOM_CONFIG))
             raise e
@@ -247,6 +260,14 @@ class Configuration(object):
     def throttle_interval(self):
         return self._throttle_interval
 
+    @property
+    def change_log_size(self):
+        return self._change_log_size
+
+    @property
+    def client_buffer_size(self):
+        return self._client_buffer_size
+
     @property
     def override_node(self):
         return self._override_node
@@ -263,6 +284,26 @@ class Configuration(object):
     def graphite_recheck(self):
         return self._graphite_recheck
 
+    @property
+    def graphite_batch_size(self):
+        return self._graphite_batch_size
+
+    @property
+    def graphite_timeout(self):
+        return self._graphite_timeout
+
+    @property
+    def graphite_cache_size(self):
+        return self._graphite_cache_size
+
+    @property
+    def graphite_cache_ttl(self):
+        return self._graphite_cache_ttl
+
+    @property
+    def graphite_negative_ttl(self):
+        return self._graphite_negative_ttl
+
     @property
     def chatops_url(self):
         return self._chatops_url
@@ -274,3 +315,15 @@ class Configuration(object):
     @property
     def chatops_commands_to_chat(self):
         return self._chatops_commands_to_chat
+
+    @property
+    def incremental_walk(self):
+        return self._incremental_walk
+
+    @property
+    def tree_loader_window(self):
+        return self._tree_loader_window
+
+    @property
+    def watch_coalesce_interval(self):
+        return self._watch_coalesce_interval
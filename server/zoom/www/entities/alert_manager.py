@@ -13,17 +13,18 @@ from zoom.agent.util.helpers import zk_path_join
 
 
 class AlertManager(object):
-    def __init__(self, alert_path, override_path, state_path, zk, pd, exceptions):
+    def __init__(self, alert_path, override_cache, state_path, zk, pd,
+                 exceptions):
         """
         :type alert_path: str
-        :type override_path: str
+        :type override_cache: zoom.www.cache.override_cache.OverrideCache
         :type state_path: str
         :type zk: kazoo.client.KazooClient
         :type pd: zoom.common.pagerduty.PagerDuty
         :type exceptions: list
         """
         self._path = alert_path
-        self._override_path = override_path
+        self._override_cache = override_cache
         self._state_path = state_path
         self._zk = zk
         self._pd = pd
@@ -108,19 +109,9 @@ class AlertManager(object):
         """
         # TODO: change the key or add a different field so that we don't have to
         # do that messy construction below...
-        try:
-            app_id = '/'.join(key.split('/')[1:-1])
-            app_state_path = zk_path_join(self._state_path, app_id)
-            data, stat = self._zk.get(self._override_path)
-            d = json.loads(data)
-            return d.get(app_state_path, {}).get('pd_disabled', False)
-
-        except ValueError:
-            logging.error('Node {0} has malformed JSON.'
-                          .format(self._override_path))
-            return False
-        except NoNodeError:
-            return False
+        app_id = '/'.join(key.split('/')[1:-1])
+        app_state_path = zk_path_join(self._state_path, app_id)
+        return self._override_cache.get(app_state_path, 'pd_disabled', False)
 
     def _clean_up_threads(self):
         """
@@ -62,7 +62,8 @@ class Session(object):
             elif self._prev_connection_state == KazooState.LOST \
                     and state == KazooState.CONNECTED:
                 logging.info('Connection restored. Initiating data reload.')
-                self._zoo_keeper.handler.spawn(self._data_store.reload)
+                self._zoo_keeper.handler.spawn(self._data_store.reload,
+                                               session_lost=True)
             elif self._prev_connection_state == KazooState.CONNECTED \
                     and state == KazooState.SUSPENDED:
                 pass
@@ -5,6 +5,7 @@ import httplib
 from tornado.web import RequestHandler
 
 from zoom.common.decorators import TimeThis
+from zoom.www.handlers.snapshot_response import write_snapshot
 
 
 class ApplicationDependenciesHandler(RequestHandler):
@@ -29,6 +30,8 @@ class ApplicationDependenciesHandler(RequestHandler):
         @api {get} /api/v1/application/dependencies/[:id] Get Application's dependencies
         @apiDescription Retrieve the upstream and downstream dependencies for an app.
         You can provide the full path in Zookeeper or the ComponentID.
+        All dependencies are sent with an ETag, so clients can poll with
+        If-None-Match and get 304 Not Modified if nothing changed.
         @apiVersion 1.0.0
         @apiName GetAppDep
         @apiGroup Dependency
@@ -54,9 +57,15 @@ class ApplicationDependenciesHandler(RequestHandler):
                 ]
             }
         """
-        logging.info('Retrieving Application Dependency Cache for client {0}'
-                     .format(self.request.remote_ip))
+        logging.debug('Retrieving Application Dependency Cache for client {0}'
+                      .format(self.request.remote_ip))
         try:
+            if not path:
+                snapshot, version = \
+                    self.data_store.get_application_dependency_snapshot()
+                write_snapshot(self, snapshot, version)
+                return
+
             result = self.data_store.load_application_dependency_cache()
             if path:
                 if not path.startswith(self.app_state_path):
@@ -74,4 +83,4 @@ class ApplicationDependenciesHandler(RequestHandler):
             self.write(json.dumps({'errorText': str(e)}))
 
         self.set_header('Content-Type', 'application/json')
-        logging.info('Done Retrieving Application Depends Cache')
+        logging.debug('Done Retrieving Application Depends Cache')
@@ -22,10 +22,22 @@ class ApplicationOpdepHandler(tornado.web.RequestHandler):
         """
         return self.application.configuration.application_state_path
 
+    @property
+    def application_dependency_cache(self):
+        """
+        :rtype: zoom.www.cache.application_dependency_cache.ApplicationDependencyCache
+        """
+        return self.application.data_store.application_dependency_cache
+
     @TimeThis(__file__)
     def get(self, path):
         """
         @api {get} /api/v1/application/opdep/[:id] Get Application's operational dependencies
+        @apiDescription
+            Get the application and every application that depends on it
+            operationally, directly or through other applications. Without
+            an id, the operational dependencies of all applications are
+            returned, keyed by application path.
         @apiVersion 1.0.0
         @apiName GetAppOpDep
         @apiGroup Dependency
@@ -38,25 +50,23 @@ class ApplicationOpdepHandler(tornado.web.RequestHandler):
                 ]
             }
         """
-        opdep_array = []
-        opdep_dict = {}
-
-        if not path.startswith(self.app_state_path):
-            # be able to search by comp id, not full path
-            path = os.path.join(self.app_state_path, path[1:])
-
-        logging.info('Retrieving Application Operational Dependency Cache for '
-                     'client {0}'.format(self.request.remote_ip))
+        logging.debug('Retrieving Application Operational Dependency Cache '
+                      'for client {0}'.format(self.request.remote_ip))
         try:
-            # append the service we want opdep for to the array
-            opdep_array.append(path)
-            if path:
-                opdep_array = self._downstream_recursive(path, opdep_array)
-                opdep_dict['opdep'] = opdep_array
-                self.write(opdep_dict)
+            # make sure the dependency graph is loaded
+            self.data_store.load_application_dependency_cache()
+
+            if path in ('', '/'):
+                opdep = self.application_dependency_cache\
+                    .all_operational_dependents()
             else:
-                self.write('Please specify a path for operational '
-                           'dependency lookup')
+                if not path.startswith(self.app_state_path):
+                    # be able to search by comp id, not full path
+                    path = os.path.join(self.app_state_path, path[1:])
+                opdep = self.application_dependency_cache\
+                    .operational_dependents(path)
+
+            self.write({'opdep': opdep})
 
         except Exception as e:
             logging.exception(e)
@@ -64,26 +74,5 @@ class ApplicationOpdepHandler(tornado.web.RequestHandler):
             self.write(json.dumps({'errorText': str(e)}))
 
         self.set_header('Content-Type', 'application/json')
-        logging.info('Done Retrieving Application Operational Dependency Cache')
-
-    def _downstream_recursive(self, parent_path, opdep_array):
-        app_cache = self.data_store.load_application_dependency_cache()
-        item = app_cache.application_dependencies.get(parent_path, {})
-
-        for downstream in item.get("downstream", {}):
-            item = app_cache.application_dependencies.get(downstream, {})
-            for dependency in item.get('dependencies', None):
-                # Checks both HasChildren and HasGrandChildren predicates
-                if dependency.get('path', None) in parent_path:
-                    if dependency.get('operational', None) is True:
-                        # only append elements not in the array
-                        if downstream not in opdep_array:
-                            opdep_array.append(downstream)
-                        # Recursive with the operational downstream path
-                        self._downstream_recursive(downstream, opdep_array)
-                    else:
-                        logging.debug('{0} is not operational '
-                                      'dependency of {1}'
-                                      .format(parent_path, downstream))
-
-        return opdep_array
+        logging.debug('Done Retrieving Application Operational Dependency '
+                      'Cache')
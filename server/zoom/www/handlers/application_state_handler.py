@@ -6,6 +6,8 @@ import os.path
 import tornado.web
 
 from zoom.common.decorators import TimeThis
+from zoom.common.types import MessageEncoding
+from zoom.www.handlers.snapshot_response import write_snapshot
 
 
 class ApplicationStateHandler(tornado.web.RequestHandler):
@@ -34,6 +36,10 @@ class ApplicationStateHandler(tornado.web.RequestHandler):
     def get(self, path):
         """
         @api {get} /api/v1/application/states/[:id] Get Application State
+        @apiParam {String} [encoding=json] 'compact' to send the states as
+            {"fields": [...], "rows": [[...], ...]} groups instead of objects
+        @apiDescription All states are sent with an ETag, so clients can poll
+            with If-None-Match and get 304 Not Modified if nothing changed.
         @apiVersion 1.0.0
         @apiName GetAppState
         @apiGroup ApplicationState
@@ -65,8 +71,15 @@ class ApplicationStateHandler(tornado.web.RequestHandler):
             }
         """
         try:
-            logging.info('Retrieving Application State Cache for client {0}'
-                         .format(self.request.remote_ip))
+            logging.debug('Retrieving Application State Cache for client {0}'
+                          .format(self.request.remote_ip))
+            encoding = self.get_argument('encoding', MessageEncoding.JSON)
+            if not path and encoding == MessageEncoding.JSON:
+                snapshot, version = \
+                    self.data_store.get_application_state_snapshot()
+                write_snapshot(self, snapshot, version)
+                return
+
             result = self.data_store.load_application_state_cache()
             if path:
                 if not path.startswith(self.app_state_path):
@@ -76,7 +89,7 @@ class ApplicationStateHandler(tornado.web.RequestHandler):
                 item = result.application_states.get(path, {})
                 self.write(item)
             else:
-                self.write(result.to_json())
+                self.write(result.to_json(encoding=encoding))
 
         except Exception as e:
             self.set_status(httplib.INTERNAL_SERVER_ERROR)
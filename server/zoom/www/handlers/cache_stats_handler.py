@@ -0,0 +1,118 @@
+import json
+import logging
+import tornado.web
+from httplib import INTERNAL_SERVER_ERROR
+
+from zoom.common.decorators import TimeThis
+
+
+class CacheStatsHandler(tornado.web.RequestHandler):
+    @property
+    def data_store(self):
+        """
+        :rtype: zoom.www.cache.data_store.DataStore
+        """
+        return self.application.data_store
+
+    @TimeThis(__file__)
+    def get(self):
+        """
+        @api {get} /api/v1/cache/stats/ Get cache and watch statistics
+        @apiVersion 1.0.0
+        @apiName GetCacheStats
+        @apiGroup Cache
+        @apiSuccessExample {json} Success-Response:
+            HTTP/1.1 200 OK
+            {
+                "watches": {
+                    "active_watches": 5230,
+                    "active_children_watches": 2800,
+                    "active_data_watches": 2430,
+                    "active_callbacks": 5230,
+                    "registered": 11020,
+                    "deduplicated": 5120,
+                    "fired": 5790,
+                    "coalesced": 310,
+                    "delivered": 5480,
+                    "pending_events": 0,
+                    "coalesce_interval": 0.1
+                },
+                "application_state_walk": {
+                    "events": 5480,
+                    "incremental_events": 5400,
+                    "round_trips": 6100,
+                    "round_trips_saved": 402000,
+                    "indexed_nodes": 5230
+                },
+                "application_state_query": {
+                    "hits": 8800,
+                    "misses": 1200,
+                    "cached_results": 40,
+                    "indexed_paths": 5230
+                },
+                "application_dependency_parse": {
+                    "hits": 2400,
+                    "misses": 30,
+                    "cached_configs": 800
+                },
+                "operational_dependencies": {
+                    "hits": 640,
+                    "misses": 95,
+                    "invalidated": 12,
+                    "cached": 83
+                },
+                "graphite": {
+                    "hits": 51000,
+                    "negative_hits": 120,
+                    "misses": 900,
+                    "expirations": 600,
+                    "evictions": 0,
+                    "refreshes": 4200,
+                    "size": 2400,
+                    "max_size": 10000,
+                    "negative_entries": 12
+                },
+                "delivery": {
+                    "messages": 9100,
+                    "combined": 8400,
+                    "flushes": 700,
+                    "immediate_flushes": 520,
+                    "frames": 2100,
+                    "bytes": 1830000,
+                    "queue_depth": 0,
+                    "max_queue_depth": 3,
+                    "last_flush_latency": 0.002,
+                    "average_flush_latency": 0.21,
+                    "max_flush_latency": 1.02,
+                    "interval": 1.0
+                },
+                "subscriptions": {
+                    "subscriptions": 12,
+                    "routed": 48000,
+                    "cache_hits": 46500,
+                    "cached_routes": 1500
+                },
+                "snapshots": {
+                    "application_states": {
+                        "hits": 91000,
+                        "builds": 6200,
+                        "bytes": 2390000,
+                        "gzipped_bytes": 96000
+                    },
+                    "application_dependencies": {
+                        "hits": 9100,
+                        "builds": 80,
+                        "bytes": 810000,
+                        "gzipped_bytes": 41000
+                    }
+                }
+            }
+        """
+        try:
+            self.write(self.data_store.get_cache_stats())
+        except Exception as e:
+            self.set_status(INTERNAL_SERVER_ERROR)
+            self.write(json.dumps({'errorText': str(e)}))
+            logging.exception(e)
+
+        self.set_header('Content-Type', 'application/json')
@@ -1,10 +1,10 @@
 import logging
 import httplib
 import os.path
-from xml.etree import ElementTree
 from tornado.web import RequestHandler
 
 from zoom.common.decorators import TimeThis
+from zoom.common.sentinel_config import update_components
 
 
 class DisableAppHandler(RequestHandler):
@@ -42,25 +42,27 @@ class DisableAppHandler(RequestHandler):
                          .format(user, component_id, disable))
 
             path = os.path.join(self.agent_config_path, host)
-            update = False
+
+            def _disable(component):
+                cid = component.attrib.get('id')
+                if cid != component_id:
+                    return False
+
+                for action in component.iter('Action'):
+                    aid = action.attrib.get('id')
+                    # we want the app to register/unregister/stop
+                    #   even if it is disabled
+                    if aid not in ('register', 'unregister', 'stop'):
+                        action.attrib['disabled'] = disable
+                        logging.info('{0}abled {1}:{2}'.format(('Dis' if disable else 'En'), cid, aid))
+                return True
 
             if self.zk.exists(path):
                 data, stat = self.zk.get(path)
-                config = ElementTree.fromstring(data)
-                for component in config.iter('Component'):
-                    cid = component.attrib.get('id')
-                    if cid == component_id:
-                        update = True
-                        for action in component.iter('Action'):
-                            aid = action.attrib.get('id')
-                            # we want the app to register/unregister/stop
-                            #   even if it is disabled
-                            if aid not in ('register', 'unregister', 'stop'):
-                                action.attrib['disabled'] = disable
-                                logging.info('{0}abled {1}:{2}'.format(('Dis' if disable else 'En'), cid, aid))
+                config = update_components(data, _disable)
 
-                if update:
-                    self.zk.set(path, ElementTree.tostring(config))
+                if config is not None:
+                    self.zk.set(path, config)
 
             else:
                 self.set_status(httplib.NOT_FOUND)
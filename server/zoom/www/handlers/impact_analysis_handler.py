@@ -0,0 +1,97 @@
+import httplib
+import json
+import logging
+import os.path
+
+import tornado.web
+
+from zoom.common.decorators import TimeThis
+
+
+class ImpactAnalysisHandler(tornado.web.RequestHandler):
+    @property
+    def data_store(self):
+        """
+        :rtype: zoom.www.cache.data_store.DataStore
+        """
+        return self.application.data_store
+
+    @property
+    def app_state_path(self):
+        """
+        :rtype: str
+        """
+        return self.application.configuration.application_state_path
+
+    @TimeThis(__file__)
+    def post(self):
+        """
+        @api {post} /api/v1/application/impact/ Get everything affected by taking down applications or hosts
+        @apiParam {String[]} [applications] Application ids or paths
+        @apiParam {String[]} [hosts] Hosts, whose applications are added
+        @apiParam {Number} [max_depth] How many dependency levels to follow
+        @apiVersion 1.0.0
+        @apiName PostImpact
+        @apiGroup Dependency
+        @apiSuccessExample {json} Success-Response:
+            HTTP/1.1 200 OK
+            {
+                "applications": [
+                    "/spot/software/state/application/foo"
+                ],
+                "unknown": [],
+                "downstream": {
+                    "/spot/software/state/application/bar": 1,
+                    "/spot/software/state/application/baz": 2
+                },
+                "upstream": {
+                    "/spot/software/state/application/qux": 1
+                },
+                "cycles": []
+            }
+        """
+        try:
+            logging.info('Computing impact analysis for client {0}'
+                         .format(self.request.remote_ip))
+            request = json.loads(self.request.body)
+            max_depth = request.get('max_depth', None)
+            if max_depth is not None:
+                max_depth = int(max_depth)
+
+            paths = set()
+            for app in request.get('applications', []):
+                if not app.startswith(self.app_state_path):
+                    # be able to search by comp id, not full path
+                    app = os.path.join(self.app_state_path, app.lstrip('/'))
+                paths.add(app)
+            paths.update(self._host_paths(request.get('hosts', [])))
+
+            self.data_store.load_application_dependency_cache()
+            result = self.data_store.application_dependency_cache.impact(
+                paths, max_depth=max_depth)
+            self.write(result)
+
+        except Exception as e:
+            self.set_status(httplib.INTERNAL_SERVER_ERROR)
+            self.write(json.dumps({'errorText': str(e)}))
+            logging.exception(e)
+
+        self.set_header('Content-Type', 'application/json')
+
+    def _host_paths(self, hosts):
+        """
+        :type hosts: list
+        :rtype: set
+            Paths of the applications registered on the hosts
+        """
+        if not hosts:
+            return set()
+
+        self.data_store.load_application_state_cache()
+        mapping = self.data_store.application_state_cache.host_mapping
+        wanted = set(h.lower() for h in hosts)
+        paths = set()
+        for host, apps in mapping.items():
+            if host is not None and host.lower() in wanted:
+                paths.update(apps)
+        return paths
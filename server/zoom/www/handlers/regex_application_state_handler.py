@@ -2,7 +2,6 @@ import httplib
 import json
 import logging
 import os.path
-import re
 
 import tornado.web
 
@@ -79,10 +78,7 @@ class RegexApplicationStateHandler(tornado.web.RequestHandler):
                     # be able to search by comp id, not full path
                     path = os.path.join(self.app_state_path, path[1:])
 
-                paths = [p for p in result.application_states.keys() if re.match(path, p)]
-                items = [result.application_states[p] for p in paths]
-
-                self.write(json.dumps(items))
+                self.write(self.application_state_cache.query(path))
             else:
                 self.write(result.to_json())
 
@@ -3,10 +3,10 @@ import logging
 import tornado.ioloop
 import tornado.web
 
-from xml.etree import ElementTree
 from kazoo.exceptions import NoNodeError
 
 from zoom.common.decorators import TimeThis
+from zoom.common.sentinel_config import iter_component_attributes
 from zoom.agent.util.helpers import zk_path_join, cap_hostname
 
 
@@ -159,15 +159,14 @@ class SentinelConfigHandler(tornado.web.RequestHandler):
         """
         valid = True
 
-        config = ElementTree.fromstring(xmlstring)
-        for component in config.iter('Component'):
+        for comp_id, reg_path in iter_component_attributes(
+                xmlstring, ['id', 'registrationpath']):
             if not valid:
                 break
             for app in self.app_state_cache.application_states.values():
                 app_host = app.get('application_host')
                 app_name = app.get('application_name')
                 app_reg_path = app.get('configuration_path')
-                reg_path = component.get('registrationpath', None)
 
                 if reg_path is not None:
                     if reg_path == app_reg_path and server != app_host:
@@ -181,7 +180,6 @@ class SentinelConfigHandler(tornado.web.RequestHandler):
                         break
 
                 else:
-                    comp_id = component.get('id')
                     if comp_id == app_name and server != app_host:
                         if self._double_check_config(app_host,
                                                      id_to_find=comp_id):
@@ -209,10 +207,8 @@ class SentinelConfigHandler(tornado.web.RequestHandler):
         else:
             return False
 
-        config = ElementTree.fromstring(xmlstr)
-        for component in config.iter('Component'):
-            comp_id = component.get('id')
-            comp_reg_path = component.get('registrationpath')
+        for comp_id, comp_reg_path in iter_component_attributes(
+                xmlstr, ['id', 'registrationpath']):
             if id_to_find and id_to_find == comp_id:
                 return True
             elif reg_to_find and reg_to_find == comp_reg_path:
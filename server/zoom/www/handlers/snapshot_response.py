@@ -0,0 +1,21 @@
+def write_snapshot(handler, snapshot, version):
+    """
+    Write a cache snapshot, or 304 Not Modified if the client has it.
+    The gzipped copy is sent as is, so Tornado does not compress it again.
+    :type handler: tornado.web.RequestHandler
+    :type snapshot: zoom.www.cache.snapshot.Snapshot
+    :type version: int
+    """
+    handler.set_header('Etag', snapshot.etag(version))
+    handler.set_header('Content-Type', 'application/json')
+    if handler.check_etag_header():
+        handler.set_status(304)
+        return
+
+    request = handler.request
+    gzipped = (request.supports_http_1_1() and
+               'gzip' in request.headers.get('Accept-Encoding', ''))
+    data = snapshot.get(version, gzipped=gzipped)
+    if gzipped:
+        handler.set_header('Content-Encoding', 'gzip')
+    handler.write(data)
@@ -1,10 +1,25 @@
+import json
 import logging
+import time
 import tornado.websocket
+from collections import deque
+
+from tornado.ioloop import IOLoop
 
 from zoom.common.decorators import TimeThis
+from zoom.common.types import MessageEncoding
+from zoom.www.entities.database import Database
+from zoom.www.messages.change_log import ChangeLog
+from zoom.www.messages.subscriptions import SubscriptionFilter
 
 
 class ZoomWSHandler(tornado.websocket.WebSocketHandler):
+    # Whether this client subscribed to the delta protocol
+    delta = False
+    # Encoding of the delta messages, see zoom.common.types.MessageEncoding
+    encoding = MessageEncoding.JSON
+    # Seconds between attempts to flush updates to a busy connection
+    FLUSH_INTERVAL = 0.5
 
     @property
     def socket_clients(self):
@@ -13,20 +28,226 @@ class ZoomWSHandler(tornado.websocket.WebSocketHandler):
         """
         return self.application.data_store.web_socket_clients
 
+    @property
+    def change_log(self):
+        """
+        :rtype: zoom.www.messages.change_log.ChangeLog
+        """
+        return self.application.data_store.change_log
+
+    @property
+    def subscriptions(self):
+        """
+        :rtype: zoom.www.messages.subscriptions.SubscriptionIndex
+        """
+        return self.application.data_store.subscriptions
+
+    @property
+    def buffer_size(self):
+        """
+        :rtype: int
+        """
+        return self.application.configuration.client_buffer_size
+
     @TimeThis(__file__)
     def open(self):
         logging.debug("[WEBSOCKET] Opening")
+        self._pending = deque()
+        self._overflowed = False
+        self._flush_timeout = None
         self.socket_clients.append(self)
         logging.debug('Added websocket client {0}. Total clients: {1}'
                       .format(self.request.remote_ip, len(self.socket_clients)))
 
     @TimeThis(__file__)
     def on_message(self, message):
+        """
+        Clients can subscribe to the delta protocol with
+            {"command": "subscribe", "protocol": "delta",
+             "epoch": "<epoch>", "since": <seq>, "encoding": "compact"}
+        epoch and since are the last ones the client saw, if any. With the
+        optional compact encoding, lists of items are sent as
+        {"fields": [...], "rows": [[...], ...]} groups and the message has
+        "encoding": "compact". Clients that only watch some applications
+        can add
+            "filters": [{"prefix": "<path prefix>"}, {"regex": "<path regex>"},
+                        {"host": "<host>"},
+                        {"filter": "<saved filter>", "loginName": "<user>"}]
+        to only get updates for applications that match any of them. The
+        reply is
+            {"update_type": "subscribed", "epoch": "<epoch>", "seq": <seq>,
+             "resync": <bool>}
+        followed by every message after since. If resync is true, the
+        messages since are gone and the client has to reload all data.
+        """
         logging.debug("[WEBSOCKET] Message: '{0}' for client {1}"
                       .format(message, self.request.remote_ip))
+        try:
+            request = json.loads(message)
+        except ValueError:
+            return
+
+        if not isinstance(request, dict):
+            return
+
+        if (request.get('command') == 'subscribe' and
+                request.get('protocol') == 'delta'):
+            encoding = request.get('encoding', MessageEncoding.JSON)
+            if encoding in (MessageEncoding.JSON, MessageEncoding.COMPACT):
+                self.encoding = encoding
+            self._filter(request.get('filters', None))
+            self._subscribe(request.get('epoch', None),
+                            request.get('since', None))
 
     @TimeThis(__file__)
     def on_close(self):
+        self._pending.clear()
+        if self._flush_timeout is not None:
+            IOLoop.instance().remove_timeout(self._flush_timeout)
+            self._flush_timeout = None
+        self.subscriptions.unsubscribe(self)
         self.socket_clients.remove(self)
         logging.debug("[WEBSOCKET] Closed for client {0}.  Total clients: {1}"
                       .format(self.request.remote_ip, len(self.socket_clients)))
+
+    def _filter(self, specs):
+        """
+        :type specs: list or None
+        """
+        filters = list()
+        for spec in specs or list():
+            try:
+                if 'filter' in spec:
+                    filters.extend(self._saved_filter(spec['filter'],
+                                                      spec.get('loginName')))
+                else:
+                    filters.append(SubscriptionFilter.from_dictionary(spec))
+            except Exception as e:
+                # rather too many updates than too few
+                logging.warning('Ignoring filters of client {0}: {1}'
+                                .format(self.request.remote_ip, e))
+                filters = list()
+                break
+
+        self.subscriptions.subscribe(self, filters)
+
+    def _saved_filter(self, name, login_name):
+        """
+        :type name: str
+        :type login_name: str
+        :rtype: list
+            [SubscriptionFilter or None]
+        """
+        db = Database(self.application.configuration)
+        for custom_filter in db.fetch_all_filters(login_name):
+            if custom_filter.name == name:
+                return [SubscriptionFilter.from_custom_filter(custom_filter)]
+        raise ValueError('No filter {0} for user {1}'
+                         .format(name, login_name))
+
+    def _subscribe(self, epoch, since):
+        """
+        :type epoch: str or None
+        :type since: int or None
+        """
+        # from here on updates are sent as deltas, so nothing is missed
+        # between reading the backlog and the next update.
+        self.delta = True
+        backlog = list()
+        resync = False
+        if since is not None:
+            backlog = self.change_log.since(epoch, since)
+            resync = backlog is None
+
+        self.send_update(self._subscribed(resync))
+        for data in backlog or list():
+            data = self._filter_backlog(data)
+            if data is not None:
+                self.send_update(data)
+
+        logging.debug('Client {0} subscribed to deltas since {1}, resync: {2}'
+                      .format(self.request.remote_ip, since, resync))
+
+    def _filter_backlog(self, data):
+        """
+        Reduce a logged message to the applications this client subscribed
+        to, the same way the MessageThrottle does for new ones.
+        :type data: str
+        :rtype: str or None
+            None if nothing in the message is for this client.
+        """
+        if self not in self.subscriptions.clients:
+            return data
+
+        payload = json.loads(data)
+        field = ChangeLog.KEYED.get(payload.get('update_type'), None)
+        if field is None:
+            return data
+
+        parts = self.subscriptions.split(
+            payload[field], self.change_log.moves(payload['seq']))
+        items = list()
+        for targets, part in parts.iteritems():
+            if self in targets:
+                items.extend(part)
+        if not items:
+            return None
+        elif items == payload[field]:
+            return data
+        return json.dumps(dict(payload, **{field: items}))
+
+    def send_update(self, data):
+        """
+        Queue an update for this client. Must be called on the IOLoop.
+        While the connection is still busy with earlier writes, updates wait
+        in a bounded buffer. If the buffer overflows it is dropped: a delta
+        client is then told to reload everything, any other client is closed.
+        :type data: str
+        """
+        self._pending.append(data)
+        if len(self._pending) > self.buffer_size:
+            logging.warning('Dropping {0} updates for slow client {1}.'
+                            .format(len(self._pending),
+                                    self.request.remote_ip))
+            self._pending.clear()
+            self._overflowed = True
+        self.flush_updates()
+
+    def flush_updates(self):
+        """
+        Write as many buffered updates as the connection takes right now.
+        """
+        if self.ws_connection is None or self.stream.closed():
+            self._pending.clear()
+            return
+
+        if self._overflowed and not self.stream.writing():
+            self._overflowed = False
+            if not self.delta:
+                self.close()
+                return
+            self.write_message(self._subscribed(True))
+
+        while (self._pending and not self._overflowed and
+               not self.stream.writing()):
+            self.write_message(self._pending.popleft())
+
+        if (self._pending or self._overflowed) and self._flush_timeout is None:
+            self._flush_timeout = IOLoop.instance().add_timeout(
+                time.time() + self.FLUSH_INTERVAL, self._on_flush_timeout)
+
+    def _on_flush_timeout(self):
+        self._flush_timeout = None
+        self.flush_updates()
+
+    def _subscribed(self, resync):
+        """
+        :type resync: bool
+        :rtype: str
+        """
+        return json.dumps({
+            'update_type': 'subscribed',
+            'epoch': self.change_log.epoch,
+            'seq': self.change_log.seq,
+            'resync': resync
+        })
@@ -1,7 +1,8 @@
 import json
 import logging
 
-from zoom.common.types import UpdateType
+from zoom.common.types import MessageEncoding, UpdateType
+from zoom.www.messages.compact_encoding import compact_payload
 
 
 class ApplicationStatesMessage(object):
@@ -51,7 +52,12 @@ class ApplicationStatesMessage(object):
     def clear(self):
         self._application_states.clear()
 
-    def to_json(self):
+    def to_json(self, encoding=MessageEncoding.JSON):
+        """
+        :type encoding: str
+            zoom.common.types.MessageEncoding
+        :rtype: str
+        """
         _dict = {}
         _dict.update({
             "update_type": self._message_type,
@@ -59,6 +65,8 @@ class ApplicationStatesMessage(object):
         })
         if self.environment is not None:
             _dict.update({"environment": self._environment})
+        if encoding == MessageEncoding.COMPACT:
+            _dict = compact_payload(_dict)
         return json.dumps(_dict)
 
     def remove_deletes(self):
@@ -0,0 +1,166 @@
+import copy
+import json
+import uuid
+from collections import deque
+from threading import Lock
+
+from zoom.common.types import UpdateType
+
+
+class ChangeLog(object):
+    """
+    Sequence numbers and a bounded history for the delta websocket protocol.
+    Every message sent to clients gets the next sequence number. Keyed
+    messages are reduced to what changed since the last message: application
+    states down to their changed fields, application dependencies down to
+    their changed items. A client that reconnects can ask for everything
+    after the last sequence number it saw, as long as it is still in the log.
+    """
+    # update type: name of the message attribute and JSON field with items
+    KEYED = {
+        UpdateType.APPLICATION_STATE_UPDATE: 'application_states',
+        UpdateType.APPLICATION_DEPENDENCY_UPDATE: 'application_dependencies'
+    }
+    FIELD_DELTAS = (UpdateType.APPLICATION_STATE_UPDATE,)
+    # fields that decide which subscriptions an item goes to
+    ROUTED_FIELDS = ('application_host',)
+
+    def __init__(self, size=1000):
+        """
+        :type size: int
+            Number of messages kept for clients that reconnect.
+        """
+        self._epoch = uuid.uuid4().hex
+        self._seq = 0
+        self._log = deque(maxlen=max(int(size), 1))
+        self._snapshots = dict()  # {update type: {key: last sent item}}
+        self._moves = dict()  # {seq: {path: (item before, item after)}}
+        self._lock = Lock()
+
+    @property
+    def epoch(self):
+        """
+        Sequence numbers are only comparable within the same epoch, i.e. the
+        same server process.
+        :rtype: str
+        """
+        return self._epoch
+
+    @property
+    def seq(self):
+        """
+        :rtype: int
+        """
+        return self._seq
+
+    def record(self, message):
+        """
+        Assign the next sequence number to a message and log its delta.
+        :type message: object
+            One of the zoom.www.messages classes
+        :rtype: str or None
+            The delta as JSON, or None if nothing changed.
+        """
+        update_type = message.message_type
+        field = self.KEYED.get(update_type, None)
+        moves = dict()
+        with self._lock:
+            if field is None:
+                payload = json.loads(message.to_json())
+            else:
+                changes = self._diff(update_type, getattr(message, field),
+                                     moves)
+                if not changes:
+                    return None
+                payload = {'update_type': update_type, field: changes}
+                environment = getattr(message, 'environment', None)
+                if environment is not None:
+                    payload['environment'] = environment
+
+            self._seq += 1
+            payload['seq'] = self._seq
+            payload['delta'] = True
+            data = json.dumps(payload)
+            if len(self._log) == self._log.maxlen:
+                self._moves.pop(self._log[0][0], None)
+            self._log.append((self._seq, data))
+            if moves:
+                self._moves[self._seq] = moves
+            return data
+
+    def moves(self, seq):
+        """
+        Items of a logged field delta whose routed fields changed. Clients
+        that only now match such an item need all of it, not just the
+        changed fields.
+        :type seq: int
+        :rtype: dict
+            {path: (item before, item after)}
+        """
+        with self._lock:
+            return self._moves.get(seq, dict())
+
+    def since(self, epoch, seq):
+        """
+        :type epoch: str
+        :type seq: int
+        :rtype: list or None
+            The logged messages after seq, or None if the client has to
+            reload everything because seq is from another epoch or no longer
+            in the log.
+        """
+        with self._lock:
+            if epoch != self._epoch or seq > self._seq:
+                return None
+            first = self._log[0][0] if self._log else self._seq + 1
+            if seq < first - 1:
+                return None
+            return [data for s, data in self._log if s > seq]
+
+    def snapshot(self, update_type, key):
+        """
+        :type update_type: str
+        :type key: str
+        :rtype: dict or None
+            The item as clients last saw it.
+        """
+        with self._lock:
+            return self._snapshots.get(update_type, {}).get(key, None)
+
+    def _diff(self, update_type, items, moves):
+        """
+        :type update_type: str
+        :type items: dict
+            {key: item}
+        :type moves: dict
+            Filled with {path: (item before, item after)} for field deltas
+            that change a routed field.
+        :rtype: list
+        """
+        snapshots = self._snapshots.setdefault(update_type, dict())
+        changes = list()
+        for key, item in items.iteritems():
+            path = item.get('configuration_path', key)
+            previous = snapshots.get(key, None)
+
+            if item.get('delete', False):
+                snapshots.pop(key, None)
+                changes.append({'configuration_path': path, 'delete': True})
+                continue
+
+            if item == previous:
+                continue
+
+            # copy, as caches update their items in place
+            snapshots[key] = copy.deepcopy(item)
+            if previous is None or update_type not in self.FIELD_DELTAS:
+                changes.append(item)
+            else:
+                delta = dict((k, v) for k, v in item.iteritems()
+                             if previous.get(k, None) != v)
+                delta['configuration_path'] = path
+                changes.append(delta)
+                if any(f in delta for f in self.ROUTED_FIELDS):
+                    moves[path] = (previous, snapshots[key])
+
+        return changes
@@ -0,0 +1,62 @@
+import json
+from collections import OrderedDict
+
+from zoom.common.types import MessageEncoding
+
+# message fields that hold a list of items with the same keys
+PACKED_FIELDS = ('application_states', 'application_dependencies')
+
+
+def pack_items(items):
+    """
+    Group items by their keys, so each key name is sent once per group
+    instead of once per item.
+    :type items: list
+        [{'configuration_path': '/foo', 'application_status': 'running'}]
+    :rtype: list
+        [{'fields': ['application_status', 'configuration_path'],
+          'rows': [['running', '/foo']]}]
+    """
+    groups = OrderedDict()  # {fields: rows}
+    for item in items:
+        fields = tuple(sorted(item))
+        rows = groups.get(fields, None)
+        if rows is None:
+            rows = groups[fields] = list()
+        rows.append([item[field] for field in fields])
+
+    return [{'fields': list(fields), 'rows': rows}
+            for fields, rows in groups.iteritems()]
+
+
+def unpack_items(groups):
+    """
+    Reverse of pack_items.
+    :type groups: list
+    :rtype: list
+    """
+    return [dict(zip(group['fields'], row))
+            for group in groups for row in group['rows']]
+
+
+def compact_payload(payload):
+    """
+    :type payload: dict
+        A decoded message
+    :rtype: dict
+    """
+    result = dict(payload)
+    for field in PACKED_FIELDS:
+        if field in result:
+            result[field] = pack_items(result[field])
+    result['encoding'] = MessageEncoding.COMPACT
+    return result
+
+
+def compact_json(data):
+    """
+    :type data: str
+        A message encoded as JSON
+    :rtype: str
+    """
+    return json.dumps(compact_payload(json.loads(data)))
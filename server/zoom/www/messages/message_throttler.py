@@ -1,59 +1,318 @@
+import json
 import logging
 import time
-from multiprocessing import Lock
-from threading import Thread
+from collections import OrderedDict
+from threading import Condition, Lock, Thread
+
+from tornado.ioloop import IOLoop
+
+from zoom.common.types import MessageEncoding, UpdateType
+from zoom.www.messages.change_log import ChangeLog
+from zoom.www.messages.compact_encoding import compact_json
 
 
 class MessageThrottle(object):
     """
-    Send at most throttle_interval message per second to zoom clients
+    Single delivery scheduler for all messages sent to zoom clients.
+    Messages wait in a queue with one entry per update type, a new message
+    is combined with a pending one of the same type. If nothing was sent for
+    a whole throttle_interval, the queue is flushed right away; under bursts
+    everything that arrives within an interval is coalesced and flushed on
+    the next tick. Each flush encodes every message once, on the throttle
+    thread, and schedules the writes onto the IOLoop. Clients of the delta
+    protocol get all messages of a flush in a single frame, in the encoding
+    they asked for, with only the applications their subscription matches.
     """
-    def __init__(self, configuration, clients):
-        self._interval = configuration.throttle_interval
-        self._lock = Lock()
+    def __init__(self, configuration, clients, change_log=None,
+                 subscriptions=None, clock=time.time):
+        """
+        :type configuration: zoom.www.config.configuration.Configuration
+        :type clients: list
+        :type change_log: zoom.www.messages.change_log.ChangeLog or None
+            If given, clients that subscribed to the delta protocol get only
+            what changed, with a sequence number.
+        :type subscriptions: zoom.www.messages.subscriptions.SubscriptionIndex or None
+        :type clock: types.FunctionType
+        """
+        self._interval = float(configuration.throttle_interval)
         self._clients = clients
-        self._message = None
+        self._change_log = change_log
+        self._subscriptions = subscriptions
+        self._clock = clock
+        self._condition = Condition(Lock())
+        self._pending = OrderedDict()  # {update type: message}
+        self._queued_at = None  # when the oldest pending message arrived
+        self._last_flush = None
+        self._stats_lock = Lock()
+        self._stats = {
+            'messages': 0,
+            'combined': 0,
+            'flushes': 0,
+            'immediate_flushes': 0,
+            'frames': 0,
+            'bytes': 0,
+            'max_queue_depth': 0,
+            'last_flush_latency': 0.0,
+            'max_flush_latency': 0.0,
+            'total_flush_latency': 0.0
+        }
         self._thread = Thread(target=self._run,
                               name='message_throttler')
         self._running = True
 
+    @property
+    def stats(self):
+        """
+        Latencies are in seconds, from the arrival of the oldest message of
+        a flush until it was handed to the clients.
+        :rtype: dict
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total = stats.pop('total_flush_latency')
+        stats['average_flush_latency'] = \
+            total / stats['flushes'] if stats['flushes'] else 0.0
+        stats['queue_depth'] = len(self._pending)
+        stats['interval'] = self._interval
+        return stats
+
     def start(self):
         self._thread.start()
 
     def add_message(self, message):
-        self._lock.acquire()
-        try:
-            if self._message is None:
-                self._message = message
+        """
+        :type message: object
+            One of the zoom.www.messages classes
+        """
+        with self._condition:
+            pending = self._pending.get(message.message_type, None)
+            combined = pending is not None
+            if combined and hasattr(pending, 'combine'):
+                pending.combine(message)
             else:
-                self._message.combine(message)
-        finally:
-            self._lock.release()
+                # a newer message without combine replaces the pending one
+                self._pending[message.message_type] = message
+
+            if self._queued_at is None:
+                self._queued_at = self._clock()
+                # only wake the thread up if it is idle
+                self._condition.notify()
+            depth = len(self._pending)
+
+        with self._stats_lock:
+            self._stats['messages'] += 1
+            if combined:
+                self._stats['combined'] += 1
+            if depth > self._stats['max_queue_depth']:
+                self._stats['max_queue_depth'] = depth
 
     def _run(self):
-    
-        while self._running:
-            self._lock.acquire()
+
+        while True:
+            with self._condition:
+                while self._running:
+                    if not self._pending:
+                        self._condition.wait()
+                        continue
+                    delay = self._next_flush() - self._clock()
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+
+                if not self._running:
+                    return
+
+            self._flush()
+
+    def _next_flush(self):
+        """
+        :rtype: float
+            When the pending messages are due. Call with the lock held.
+        """
+        if self._last_flush is None:
+            return self._queued_at
+        return max(self._queued_at, self._last_flush + self._interval)
+
+    def _flush(self):
+        # take the messages and let producers go on with an empty queue
+        with self._condition:
+            messages = self._pending.values()
+            self._pending.clear()
+            queued_at = self._queued_at
+            self._queued_at = None
+            previous = self._last_flush
+            self._last_flush = self._clock()
+
+        if not messages:
+            return
+
+        # full messages are only for clients that did not subscribe to deltas
+        legacy = self._change_log is None or any(
+            not getattr(client, 'delta', False)
+            for client in list(self._clients))
+        full = list()
+        deltas = list()
+        for message in messages:
             try:
-                if self._message is not None:
-                    logging.debug('Sending message: {0}'
-                                  .format(self._message.to_json()))
-                    for client in self._clients:
-                        try:
-                            client.write_message(self._message.to_json())
-                        except IndexError:
-                            logging.debug('Client closed when trying to send '
-                                          'update.')
-                            continue
-                    self._message = None
-            except AttributeError as e:
-                logging.exception('Exception in MessageThrottle: {0}'.format(e))
-            finally:
-                self._lock.release()
-            
-            time.sleep(float(self._interval))
+                if legacy:
+                    full.append(message.to_json())
+                if self._change_log is not None:
+                    delta = self._change_log.record(message)
+                    if delta is not None:
+                        deltas.append(delta)
+            except Exception as e:
+                logging.exception('Exception in MessageThrottle: {0}'
+                                  .format(e))
+
+        compacted = dict()
+        frames = self._frames(deltas, compacted)
+        routed = dict()
+        if deltas and self._subscriptions is not None:
+            routed = self._route(deltas, compacted)
+        logging.debug('Sending {0} messages of {1} bytes'
+                      .format(len(messages),
+                              sum(len(data) for data in full + deltas)))
+
+        with self._stats_lock:
+            self._stats['flushes'] += 1
+            if previous is None or queued_at - previous >= self._interval:
+                self._stats['immediate_flushes'] += 1
+
+        try:
+            # websocket writes are only safe on the IOLoop thread
+            IOLoop.instance().add_callback(self._deliver, full, frames,
+                                           queued_at, routed)
+        except Exception as e:
+            logging.exception('Exception in MessageThrottle: {0}'.format(e))
+
+    def _wants(self, encoding):
+        """
+        :type encoding: str
+        :rtype: bool
+            Whether any delta client asked for this encoding.
+        """
+        return any(getattr(client, 'encoding', None) == encoding
+                   for client in list(self._clients))
+
+    def _frames(self, deltas, compacted):
+        """
+        :type deltas: list
+            Encoded delta messages
+        :type compacted: dict
+            {delta: compact delta}, shared by the frames of one flush
+        :rtype: dict
+            {encoding: frame or None}
+        """
+        frames = {MessageEncoding.JSON: self._frame(deltas)}
+        if deltas and self._wants(MessageEncoding.COMPACT):
+            packed = list()
+            for delta in deltas:
+                if delta not in compacted:
+                    compacted[delta] = compact_json(delta)
+                packed.append(compacted[delta])
+            frames[MessageEncoding.COMPACT] = self._frame(packed)
+        return frames
+
+    def _route(self, deltas, compacted):
+        """
+        Split the deltas between the clients with a subscription. Each part
+        of a message is encoded once, however many clients it goes to.
+        :type deltas: list
+        :type compacted: dict
+        :rtype: dict
+            {client: {encoding: frame or None}}
+        """
+        clients = self._subscriptions.clients
+        if not clients:
+            return dict()
+
+        updates = dict((client, list()) for client in clients)
+        for delta in deltas:
+            payload = json.loads(delta)
+            field = ChangeLog.KEYED.get(payload.get('update_type'), None)
+            if field is None:
+                for data in updates.itervalues():
+                    data.append(delta)
+                continue
+
+            parts = self._subscriptions.split(
+                payload[field], self._change_log.moves(payload['seq']))
+            for targets, items in parts.iteritems():
+                if items == payload[field]:
+                    data = delta
+                else:
+                    data = json.dumps(dict(payload, **{field: items}))
+                for client in targets:
+                    if client in updates:
+                        updates[client].append(data)
+
+        routed = dict()
+        frames = dict()  # {deltas: frames}, shared by equal subscriptions
+        for client, data in updates.iteritems():
+            key = tuple(data)
+            if key not in frames:
+                frames[key] = self._frames(data, compacted)
+            routed[client] = frames[key]
+        return routed
+
+    def _frame(self, deltas):
+        """
+        :type deltas: list
+            Encoded delta messages
+        :rtype: str or None
+        """
+        if not deltas:
+            return None
+        if len(deltas) == 1:
+            return deltas[0]
+        # the deltas are already JSON, so build the frame around them
+        return '{{"update_type": "{0}", "messages": [{1}]}}'\
+            .format(UpdateType.BATCH_UPDATE, ', '.join(deltas))
+
+    def _deliver(self, full, frames, queued_at, routed=None):
+        """
+        Hand the encoded messages to every client. Runs on the IOLoop.
+        :type full: list
+        :type frames: dict
+            {encoding: all deltas of the flush in one frame, or None if
+             nothing changed}
+        :type queued_at: float
+        :type routed: dict or None
+            {client: frames} for clients with a subscription
+        """
+        sent = 0
+        count = 0
+        for client in list(self._clients):
+            if getattr(client, 'delta', False):
+                client_frames = routed.get(client, frames) if routed \
+                    else frames
+                # a client that subscribed after the flush may not have its
+                # encoding yet, every client can read JSON
+                frame = client_frames.get(getattr(client, 'encoding', None),
+                                          client_frames[MessageEncoding.JSON])
+                updates = [frame] if frame is not None else []
+            else:
+                updates = full
+            for data in updates:
+                try:
+                    client.send_update(data)
+                    count += 1
+                    sent += len(data)
+                except Exception:
+                    logging.exception('Could not send update to client.')
+
+        latency = max(self._clock() - queued_at, 0.0)
+        with self._stats_lock:
+            self._stats['frames'] += count
+            self._stats['bytes'] += sent
+            self._stats['last_flush_latency'] = latency
+            self._stats['total_flush_latency'] += latency
+            if latency > self._stats['max_flush_latency']:
+                self._stats['max_flush_latency'] = latency
 
     def stop(self):
         if self._thread.is_alive():
-            self._running = False
+            with self._condition:
+                self._running = False
+                self._condition.notify()
             self._thread.join()
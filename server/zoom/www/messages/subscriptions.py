@@ -0,0 +1,234 @@
+import logging
+import re
+from collections import defaultdict
+from threading import Lock
+
+from zoom.common.types import UpdateType
+
+
+class SubscriptionFilter(object):
+    """
+    One criterion of a websocket subscription.
+    """
+    PATH = 'path'
+    HOST = 'host'
+
+    PREFIX = 'prefix'
+    REGEX = 'regex'
+    EXACT = 'exact'
+
+    def __init__(self, field, kind, value, flags=0):
+        """
+        :type field: str
+            PATH or HOST
+        :type kind: str
+            PREFIX, REGEX or EXACT
+        :type value: str
+        :type flags: int
+            re flags for REGEX filters
+        """
+        self.field = field
+        self.kind = kind
+        self.value = value
+        self.pattern = None
+        if kind == self.REGEX:
+            # raises re.error for invalid patterns
+            self.pattern = re.compile(value, flags)
+
+    @classmethod
+    def from_dictionary(cls, spec):
+        """
+        :type spec: dict
+            {"prefix": "/spot/software/state/application/foo/"},
+            {"regex": "foo.*bar"} or {"host": "foo.example.com"}
+        :rtype: SubscriptionFilter
+        """
+        if 'prefix' in spec:
+            return cls(cls.PATH, cls.PREFIX, spec['prefix'])
+        elif 'regex' in spec:
+            return cls(cls.PATH, cls.REGEX, spec['regex'])
+        elif 'host' in spec:
+            return cls(cls.HOST, cls.EXACT, spec['host'].lower())
+        raise ValueError('Unknown filter {0}'.format(spec))
+
+    @classmethod
+    def from_custom_filter(cls, custom_filter):
+        """
+        Saved filters match substrings of the path or host. Filters on
+        fields that change with the state of an application, and inversed
+        filters, cannot be used to route updates.
+        :type custom_filter: zoom.www.entities.custom_filter.CustomFilter
+        :rtype: SubscriptionFilter or None
+        """
+        if str(custom_filter.inversed).lower() in ('true', '1'):
+            return None
+
+        term = re.escape(custom_filter.search_term)
+        if custom_filter.parameter == 'configurationPath':
+            return cls(cls.PATH, cls.REGEX, term)
+        elif custom_filter.parameter == 'applicationHost':
+            return cls(cls.HOST, cls.REGEX, term, flags=re.IGNORECASE)
+        return None
+
+
+class SubscriptionIndex(object):
+    """
+    Which websocket clients want which application updates.
+    Clients without a subscription get everything and are not tracked here.
+    Prefix and host filters are looked up in dictionaries, regexes are
+    tried one by one; the clients for a (path, host) pair are cached until
+    the subscriptions change.
+    """
+    def __init__(self, change_log=None):
+        """
+        :type change_log: zoom.www.messages.change_log.ChangeLog or None
+            Used to look up the host of an application when an update does
+            not include it.
+        """
+        self._change_log = change_log
+        self._lock = Lock()
+        self._subscriptions = dict()  # {client: [SubscriptionFilter]}
+        self._prefixes = dict()  # {prefix: set(clients)}
+        self._hosts = dict()  # {host: set(clients)}
+        self._patterns = list()  # [(SubscriptionFilter, client)]
+        self._everything = set()  # clients with filters we cannot route on
+        self._routes = dict()  # {(path, host): frozenset(clients)}
+        self._stats = {'routed': 0, 'cache_hits': 0}
+
+    @property
+    def clients(self):
+        """
+        :rtype: frozenset
+            Clients with a subscription
+        """
+        with self._lock:
+            return frozenset(self._subscriptions)
+
+    @property
+    def stats(self):
+        """
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['subscriptions'] = len(self._subscriptions)
+            stats['cached_routes'] = len(self._routes)
+        return stats
+
+    def subscribe(self, client, filters):
+        """
+        Replace the subscription of a client.
+        :type client: zoom.www.handlers.zoom_ws_handler.ZoomWSHandler
+        :type filters: list
+            [SubscriptionFilter or None], None for a filter that matches
+            every application. An empty list removes the subscription.
+        """
+        self.unsubscribe(client)
+        if not filters:
+            return
+
+        with self._lock:
+            self._subscriptions[client] = filters
+            for f in filters:
+                if f is None:
+                    self._everything.add(client)
+                elif f.kind == SubscriptionFilter.PREFIX:
+                    self._prefixes.setdefault(f.value, set()).add(client)
+                elif f.kind == SubscriptionFilter.EXACT:
+                    self._hosts.setdefault(f.value, set()).add(client)
+                else:
+                    self._patterns.append((f, client))
+            self._routes.clear()
+
+        logging.debug('Client subscribed with {0} filters.'
+                      .format(len(filters)))
+
+    def unsubscribe(self, client):
+        """
+        :type client: zoom.www.handlers.zoom_ws_handler.ZoomWSHandler
+        """
+        with self._lock:
+            if self._subscriptions.pop(client, None) is None:
+                return
+            self._everything.discard(client)
+            for index in (self._prefixes, self._hosts):
+                for key, clients in index.items():
+                    clients.discard(client)
+                    if not clients:
+                        del index[key]
+            self._patterns = [(f, c) for f, c in self._patterns
+                              if c is not client]
+            self._routes.clear()
+
+    def route(self, item):
+        """
+        :type item: dict
+            An application state or dependency
+        :rtype: frozenset
+            The subscribed clients that want this item
+        """
+        path = item.get('configuration_path', None)
+        if path is None or item.get('delete', False):
+            # the host of a deleted application is gone, let clients sort
+            # it out themselves
+            return self.clients
+
+        host = item.get('application_host', None)
+        if host is None and self._change_log is not None:
+            state = self._change_log.snapshot(
+                UpdateType.APPLICATION_STATE_UPDATE, path)
+            if state is not None:
+                host = state.get('application_host', None)
+
+        key = (path, host)
+        with self._lock:
+            self._stats['routed'] += 1
+            clients = self._routes.get(key, None)
+            if clients is not None:
+                self._stats['cache_hits'] += 1
+                return clients
+
+            matched = set(self._everything)
+            for i in xrange(1, len(path) + 1):
+                matched.update(self._prefixes.get(path[:i], ()))
+            if host:
+                matched.update(self._hosts.get(host.lower(), ()))
+            for f, client in self._patterns:
+                value = path if f.field == SubscriptionFilter.PATH else host
+                if value and f.pattern.search(value):
+                    matched.add(client)
+
+            clients = self._routes[key] = frozenset(matched)
+            return clients
+
+    def split(self, items, moves=None):
+        """
+        Group the items of a keyed message by the clients that want them.
+        An application that moved to another host goes in full to the
+        clients that only now match it, and as a delete to the clients that
+        no longer do.
+        :type items: list
+        :type moves: dict or None
+            {path: (item before, item after)}, see ChangeLog.moves
+        :rtype: dict
+            {frozenset(clients): [items]}
+        """
+        parts = defaultdict(list)
+        for item in items:
+            path = item.get('configuration_path', None)
+            move = (moves or dict()).get(path, None)
+            if move is None or item.get('delete', False):
+                parts[self.route(item)].append(item)
+                continue
+
+            before, after = move
+            old = self.route(before)
+            new = self.route(after)
+            if new - old:
+                parts[new - old].append(after)
+            if old - new:
+                parts[old - new].append({'configuration_path': path,
+                                         'delete': True})
+            if new & old:
+                parts[new & old].append(item)
+        return parts
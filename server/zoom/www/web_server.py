@@ -7,8 +7,10 @@ import tornado.websocket
 
 from zoom.www.handlers.application_dependencies_handler import ApplicationDependenciesHandler
 from zoom.www.handlers.application_opdep_handler import ApplicationOpdepHandler
+from zoom.www.handlers.impact_analysis_handler import ImpactAnalysisHandler
 from zoom.www.handlers.application_state_handler import ApplicationStateHandler
 from zoom.www.handlers.regex_application_state_handler import RegexApplicationStateHandler
+from zoom.www.handlers.cache_stats_handler import CacheStatsHandler
 from zoom.www.handlers.application_mapping_handler import (
     ApplicationMappingHandler,
     HostMappingHandler
@@ -59,10 +61,12 @@ class WebServer(tornado.web.Application):
             (r'/api/v2/application/states(?P<path>.*)', RegexApplicationStateHandler),
             (r'/api/v1/application/dependencies(?P<path>.*)', ApplicationDependenciesHandler),
             (r'/api/v1/application/opdep(?P<path>.*)', ApplicationOpdepHandler),
+            (r'/api/v1/application/impact/', ImpactAnalysisHandler),
             (r'/api/v1/application/mapping/app(?P<path>.*)', ApplicationMappingHandler),
             (r'/api/v1/application/mapping/host/(?P<path>.*)', HostMappingHandler),
             (r'/api/v1/agent/', ControlAgentHandler),
             (r'/api/v1/cache/reload/', ReloadCacheHandler),
+            (r'/api/v1/cache/stats/', CacheStatsHandler),
             (r"/api/v1/config/list_servers/", ListServersHandler),
             (r"/api/v1/config/(?P<server>.*)", SentinelConfigHandler),
             (r"/api/v1/delete/", DeletePathHandler),
@@ -0,0 +1,82 @@
+import mox
+
+from unittest import TestCase
+from kazoo.client import KazooClient
+from kazoo.exceptions import NoNodeError
+from kazoo.protocol.states import EventType
+from zoom.www.cache.agent_state_cache import AgentStateCache
+from zoom.www.cache.watch_registry import WatchRegistry
+from test.test_utils import EventMock
+
+
+class AgentStateCacheTest(TestCase):
+
+    def setUp(self):
+        self.mox = mox.Mox()
+        self.zoo_keeper = self.mox.CreateMock(KazooClient)
+        self.zoo_keeper.connected = True
+        self.updated = list()
+        self.cache = AgentStateCache('/agent', self.zoo_keeper,
+                                     WatchRegistry(),
+                                     callback=self.updated.append)
+        self.cache._agents = {'host1': ['foo']}
+        self.cache._loaded = True
+
+    def tearDown(self):
+        self.mox.UnsetStubs()
+
+    def test_lookup(self):
+        self.assertTrue(self.cache.is_up('host1'))
+        self.assertFalse(self.cache.is_up('host2'))
+        self.assertEqual(self.cache.components('host1'), ['foo'])
+        self.assertEqual(self.cache.components('host2'), [])
+
+    def test_agent_up_and_down(self):
+        self.zoo_keeper.get_children('/agent', watch=mox.IgnoreArg())\
+            .AndReturn(['host2'])
+        self.zoo_keeper.get('/agent/host2', watch=mox.IgnoreArg())\
+            .AndReturn(('{"components": ["bar"]}', None))
+        self.mox.ReplayAll()
+
+        self.cache._on_children_update(EventMock())
+
+        self.mox.VerifyAll()
+        self.assertEqual(self.cache.agents, {'host2': ['bar']})
+        self.assertEqual(sorted(self.updated), ['host1', 'host2'])
+
+    def test_components_changed(self):
+        self.zoo_keeper.get('/agent/host1', watch=mox.IgnoreArg())\
+            .AndReturn(('{"components": ["foo"]}', None))
+        self.zoo_keeper.get('/agent/host1', watch=mox.IgnoreArg())\
+            .AndReturn(('{"components": ["foo", "bar"]}', None))
+        self.mox.ReplayAll()
+
+        event = EventMock()
+        event.path = '/agent/host1'
+        event.type = EventType.CHANGED
+        # unchanged components do not fan out
+        self.cache._on_agent_update(event)
+        self.assertEqual(self.updated, [])
+
+        self.cache._on_agent_update(event)
+        self.assertEqual(self.updated, ['host1'])
+        self.assertEqual(self.cache.components('host1'), ['foo', 'bar'])
+
+        self.mox.VerifyAll()
+
+    def test_agent_deleted(self):
+        self.zoo_keeper.get('/agent/host1', watch=mox.IgnoreArg())\
+            .AndRaise(NoNodeError())
+        self.mox.ReplayAll()
+
+        event = EventMock()
+        event.path = '/agent/host1'
+        event.type = EventType.CHANGED
+        self.cache._on_agent_update(event)
+
+        event.type = EventType.DELETED
+        self.cache._on_agent_update(event)
+
+        self.mox.VerifyAll()
+        self.assertFalse(self.cache.is_up('host1'))
+        self.assertEqual(self.updated, ['host1'])
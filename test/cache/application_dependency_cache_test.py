@@ -0,0 +1,142 @@
+import mox
+
+from unittest import TestCase
+from kazoo.client import KazooClient
+from kazoo.exceptions import NoNodeError
+from zoom.www.cache.application_dependency_cache \
+    import ApplicationDependencyCache
+from zoom.www.cache.time_estimate_cache import TimeEstimateCache
+from zoom.www.cache.watch_registry import WatchRegistry
+from zoom.www.messages.application_dependencies \
+    import ApplicationDependenciesMessage
+from zoom.www.messages.message_throttler import MessageThrottle
+from test.test_utils import ConfigurationMock, StatMock
+
+
+class ApplicationDependencyCacheTest(TestCase):
+
+    def setUp(self):
+        self.mox = mox.Mox()
+        self.configuration = ConfigurationMock()
+        self.configuration.application_state_path = '/app'
+        self.zoo_keeper = self.mox.CreateMock(KazooClient)
+        self.zoo_keeper.connected = True
+        self.time_estimate_cache = self.mox.CreateMock(TimeEstimateCache)
+        self.path = '/config/host1'
+        self.data = ('<Application><Automation>'
+                     '<Component id="foo"><Actions><Action id="start">'
+                     '<Dependency><Predicate type="zookeeperhaschildren" '
+                     'path="/app/bar"/></Dependency>'
+                     '</Action></Actions></Component>'
+                     '</Automation></Application>')
+        self.stat = StatMock()
+        self.stat.mzxid = 10
+
+    def tearDown(self):
+        self.mox.UnsetStubs()
+
+    def test_get_application_dependency(self):
+        self.zoo_keeper.get(self.path, watch=mox.IgnoreArg())\
+            .AndReturn((self.data, self.stat))
+        self.mox.ReplayAll()
+
+        result = ApplicationDependenciesMessage()
+        self._create_cache()._get_application_dependency(self.path, result)
+
+        self.assertEqual(result.application_dependencies, {
+            '/app/foo': {
+                'configuration_path': '/app/foo',
+                'dependencies': [{'type': 'zookeeperhaschildren',
+                                  'path': '/app/bar',
+                                  'operational': False}],
+                'downstream': []
+            }
+        })
+        self.mox.VerifyAll()
+
+    def test_get_application_dependency_unchanged(self):
+        self.zoo_keeper.get(self.path, watch=mox.IgnoreArg())\
+            .MultipleTimes().AndReturn((self.data, self.stat))
+        self.mox.ReplayAll()
+
+        cache = self._create_cache()
+        first = ApplicationDependenciesMessage()
+        cache._get_application_dependency(self.path, first)
+        self.mox.StubOutWithMock(cache, '_parse_application_dependency')
+        second = ApplicationDependenciesMessage()
+        cache._get_application_dependency(self.path, second)
+
+        self.assertEqual(second.application_dependencies,
+                         first.application_dependencies)
+        self.assertFalse(second.application_dependencies['/app/foo'] is
+                         first.application_dependencies['/app/foo'])
+        self.assertEqual(cache.parse_stats,
+                         {'hits': 1, 'misses': 1, 'cached_configs': 1})
+        self.mox.VerifyAll()
+
+    def test_get_application_dependency_no_node(self):
+        self.zoo_keeper.get(self.path, watch=mox.IgnoreArg())\
+            .AndRaise(NoNodeError())
+        self.mox.ReplayAll()
+
+        result = ApplicationDependenciesMessage()
+        self._create_cache()._get_application_dependency(self.path, result)
+
+        self.assertEqual(len(result), 0)
+        self.mox.VerifyAll()
+
+    def test_load_tree_prunes_parsed(self):
+        cache = self._create_cache()
+        cache._parsed = {self.path: (9, {}),
+                         '/config/gone': (3, {}),
+                         '/other/host': (4, {})}
+        self.mox.StubOutWithMock(cache._tree_loader, 'walk')
+        cache._tree_loader.walk('/config', watch=mox.IgnoreArg(),
+                                data_watch=mox.IgnoreArg())\
+            .AndReturn({'/config': {'children': ['host1'], 'data': None,
+                                    'stat': None},
+                        self.path: {'children': [], 'data': self.data,
+                                    'stat': self.stat}})
+        self.mox.ReplayAll()
+
+        cache._load_tree('/config', ApplicationDependenciesMessage())
+
+        self.assertEqual(sorted(cache._parsed.keys()),
+                         [self.path, '/other/host'])
+        self.assertEqual(cache._parsed[self.path][0], 10)
+        self.mox.VerifyAll()
+
+    def test_clear_drops_parsed(self):
+        cache = self._create_cache()
+        cache._parsed = {self.path: (10, {})}
+        cache._clear()
+
+        self.assertEqual(cache.parse_stats['cached_configs'], 0)
+
+    def test_impact(self):
+        self.zoo_keeper.get(self.path, watch=mox.IgnoreArg())\
+            .AndReturn((self.data, self.stat))
+        self.mox.ReplayAll()
+
+        cache = self._create_cache()
+        cache._get_application_dependency(self.path, cache._cache)
+        cache._cache.update({'/app/bar': {'configuration_path': '/app/bar',
+                                          'dependencies': [],
+                                          'downstream': []}})
+        cache._update_downstream_dependencies(
+            cache._cache.application_dependencies.keys())
+
+        self.assertEqual(cache.impact(['/app/bar', '/app/nope']), {
+            'applications': ['/app/bar'],
+            'unknown': ['/app/nope'],
+            'downstream': {'/app/foo': 1},
+            'upstream': {},
+            'cycles': []
+        })
+        self.mox.VerifyAll()
+
+    def _create_cache(self):
+        return ApplicationDependencyCache(self.configuration, self.zoo_keeper,
+                                          self.mox.CreateMock(MessageThrottle),
+                                          self.time_estimate_cache,
+                                          WatchRegistry())
@@ -1,10 +1,15 @@
+import json
 import mox
 
 import unittest
 from kazoo.client import KazooClient
+from kazoo.protocol.states import EventType
 from zoom.www.cache.time_estimate_cache import TimeEstimateCache
 from zoom.www.cache.application_state_cache import ApplicationStateCache
+from zoom.www.cache.override_cache import OverrideCache
+from zoom.www.cache.watch_registry import WatchRegistry
 from zoom.www.messages.application_states import ApplicationStatesMessage
+from zoom.www.messages.message_throttler import MessageThrottle
 from zoom.www.entities.application_state import ApplicationState
 from test.test_utils import (
     StatMock,
@@ -18,10 +23,7 @@ class ApplicationStateCacheTest(unittest.TestCase):
     
     def setUp(self):
         self.mox = mox.Mox()
-        self.socket_client1 = self.mox.CreateMockAnything()
-        self.socket_client2 = self.mox.CreateMockAnything()
-
-        self.web_socket_clients = [self.socket_client1, self.socket_client2]
+        self.message_throttle = self.mox.CreateMock(MessageThrottle)
 
         self.configuration = ConfigurationMock()
         self.configuration.environment = "Testing"
@@ -30,6 +32,8 @@ class ApplicationStateCacheTest(unittest.TestCase):
         self.zoo_keeper = self.mox.CreateMock(KazooClient)
 
         self.time_estimate_cache = self.mox.CreateMock(TimeEstimateCache)
+        self.override_cache = self.mox.CreateMock(OverrideCache)
+        self.watch_registry = WatchRegistry()
 
     def tearDown(self):
         self.mox.UnsetStubs()
@@ -37,7 +41,8 @@ class ApplicationStateCacheTest(unittest.TestCase):
     def test_construct(self):
         self.mox.ReplayAll()
         ApplicationStateCache(self.configuration, self.zoo_keeper,
-                              self.web_socket_clients, self.time_estimate_cache)
+                              self.message_throttle, self.time_estimate_cache,
+                              self.override_cache, self.watch_registry)
         self.mox.VerifyAll()
 
     def test_load(self):
@@ -71,10 +76,9 @@ class ApplicationStateCacheTest(unittest.TestCase):
         cache = self._create_app_state_cache()
         cache._cache.update({path: state.to_dictionary()})
 
-        self.zoo_keeper.get(self.configuration.override_node).AndReturn(('{}', None))
-        self.zoo_keeper.set(self.configuration.override_node, '{"/foo": {"application_host": "bar"}}')
-        self.zoo_keeper.get(self.configuration.override_node).AndReturn(('{"/foo": {"application_host": "bar"}}', None))
-        self.time_estimate_cache.get_graphite_data('/foo/bar/head').AndReturn({})
+        self.override_cache.update(path, 'application_host', bar)
+        self.override_cache.get(path, 'application_host').AndReturn(bar)
+        self.message_throttle.add_message(mox.IsA(ApplicationStatesMessage))
         self.mox.ReplayAll()
 
         # test that the state's attribute actually changes
@@ -86,8 +90,11 @@ class ApplicationStateCacheTest(unittest.TestCase):
     def test_walk_no_children(self):
         cache = self._create_app_state_cache()
 
+        stat = StatMock()
+        stat.mzxid = 7
         self.zoo_keeper.connected = True
         self.zoo_keeper.get_children('path1', watch=mox.IgnoreArg()).AndReturn(None)
+        self.zoo_keeper.get('path1', watch=mox.IgnoreArg()).AndReturn(('{}', stat))
 
         app_state = ApplicationStateMock()
         app_state.mock_dict = {'key': 'value'}
@@ -96,7 +103,9 @@ class ApplicationStateCacheTest(unittest.TestCase):
         compare.update({ApplicationStateMock().configuration_path: app_state.to_dictionary()})
 
         self.mox.StubOutWithMock(cache, "_get_application_state")
-        cache._get_application_state('path1').AndReturn(app_state)
+        cache._get_application_state('path1', details=({}, stat),
+                                     parent_details=None,
+                                     watched=False).AndReturn(app_state)
 
         self.mox.ReplayAll()
 
@@ -104,11 +113,14 @@ class ApplicationStateCacheTest(unittest.TestCase):
         self.assertEquals(result, compare)
 
         self.mox.VerifyAll()
+        # the first change event can be checked against it
+        self.assertEqual(cache._index.get('path1')['mzxid'], 7)
 
     def test_walk_children(self):
         cache = ApplicationStateCache(self.configuration, self.zoo_keeper,
-                                      self.web_socket_clients,
-                                      self.time_estimate_cache)
+                                      self.message_throttle,
+                                      self.time_estimate_cache,
+                                      self.override_cache, self.watch_registry)
         app_state1 = ApplicationStateMock()
         app_state1.mock_dict = {'key': 'value'}
         app_state1.configuration_path = "path1/foo"
@@ -125,11 +137,17 @@ class ApplicationStateCacheTest(unittest.TestCase):
         self.zoo_keeper.connected = True
         self.zoo_keeper.get_children('path1', watch=mox.IgnoreArg()).AndReturn(['foo', 'bar'])
         self.zoo_keeper.get_children('path1/foo', watch=mox.IgnoreArg()).AndReturn([])
+        self.zoo_keeper.get('path1/foo', watch=mox.IgnoreArg()).AndReturn(('', StatMock()))
         self.zoo_keeper.get_children('path1/bar', watch=mox.IgnoreArg()).AndReturn([])
+        self.zoo_keeper.get('path1/bar', watch=mox.IgnoreArg()).AndReturn(('', StatMock()))
 
         self.mox.StubOutWithMock(cache, "_get_application_state")
-        cache._get_application_state('path1/foo').AndReturn(app_state2)
-        cache._get_application_state('path1/bar').AndReturn(app_state1)
+        cache._get_application_state('path1/foo', details=mox.IgnoreArg(),
+                                     parent_details=None,
+                                     watched=False).AndReturn(app_state2)
+        cache._get_application_state('path1/bar', details=mox.IgnoreArg(),
+                                     parent_details=None,
+                                     watched=False).AndReturn(app_state1)
 
         self.mox.ReplayAll()
 
@@ -138,10 +156,46 @@ class ApplicationStateCacheTest(unittest.TestCase):
 
         self.mox.VerifyAll()
 
+    def test_load_tree(self):
+        cache = self._create_app_state_cache()
+
+        persistent = StatMock()
+        persistent.ephemeralOwner = 0
+        running = StatMock()
+        running.ephemeralOwner = 1
+        tree = {
+            'path1': {'children': ['foo', 'bar'], 'data': None, 'stat': None},
+            'path1/foo': {'children': [], 'data': '{}', 'stat': persistent},
+            'path1/bar': {'children': ['host'], 'data': None, 'stat': None},
+            'path1/bar/host': {'children': [], 'data': '', 'stat': running},
+        }
+        parent_data = {'path1/bar': ('{"name": "bar"}', persistent)}
+
+        self.zoo_keeper.connected = True
+        self.mox.StubOutWithMock(cache._tree_loader, "walk")
+        self.mox.StubOutWithMock(cache._tree_loader, "get_data")
+        self.mox.StubOutWithMock(cache, "_walk_leaf")
+        cache._tree_loader.walk('path1', watch=mox.IgnoreArg(),
+                                data_watch=mox.IgnoreArg()).AndReturn(tree)
+        cache._tree_loader.get_data(set(['path1/bar']), watch=mox.IgnoreArg())\
+            .AndReturn(parent_data)
+        cache._walk_leaf('path1/foo', mox.IgnoreArg(),
+                         details=({}, persistent),
+                         parent_details=None).InAnyOrder()
+        cache._walk_leaf('path1/bar/host', mox.IgnoreArg(),
+                         details=({}, running),
+                         parent_details=({'name': 'bar'}, persistent)).InAnyOrder()
+
+        self.mox.ReplayAll()
+
+        cache._load_tree('path1', ApplicationStatesMessage())
+
+        self.mox.VerifyAll()
+        self.assertEqual(cache._index.children('path1'), set(['foo', 'bar']))
+
     def test_get_application_state_eph0(self):
 
         path = "/foo/bar/head"
-        test_unknown = '/test/Unknown'
 
         cache = self._create_app_state_cache()
 
@@ -151,9 +205,8 @@ class ApplicationStateCacheTest(unittest.TestCase):
 
         self.zoo_keeper.get(path, watch=mox.IgnoreArg()).InAnyOrder().AndReturn(("{}", stat))
         self.zoo_keeper.get_children(path, watch=mox.IgnoreArg()).InAnyOrder().AndReturn([])
-        self.zoo_keeper.exists(test_unknown, watch=mox.IgnoreArg()).InAnyOrder()
-        self.zoo_keeper.get(self.configuration.override_node).AndReturn(('{}', None))
-        self.zoo_keeper.get(self.configuration.override_node).AndReturn(('{}', None))
+        self.override_cache.get(path, 'pd_disabled').AndReturn(None)
+        self.override_cache.get(path, 'grayed').AndReturn(None)
         self.time_estimate_cache.get_graphite_data('/foo/bar/head').AndReturn({})
 
         self.mox.ReplayAll()
@@ -162,6 +215,31 @@ class ApplicationStateCacheTest(unittest.TestCase):
 
         self.mox.VerifyAll()
 
+    def test_get_application_state_agent_up(self):
+        path = "/foo/bar/head"
+
+        cache = self._create_app_state_cache()
+        cache._agent_state_cache._agents = {'host1': ['head']}
+        cache._agent_state_cache._loaded = True
+
+        stat = StatMock()
+        stat.ephemeralOwner = 0
+        stat.last_modified = 0
+
+        self.zoo_keeper.get(path, watch=mox.IgnoreArg()).InAnyOrder().AndReturn(('{"host": "host1"}', stat))
+        self.zoo_keeper.get_children(path, watch=mox.IgnoreArg()).InAnyOrder().AndReturn([])
+        self.override_cache.get(path, 'pd_disabled').AndReturn(None)
+        self.override_cache.get(path, 'grayed').AndReturn(None)
+        self.time_estimate_cache.get_graphite_data(path).AndReturn({})
+
+        self.mox.ReplayAll()
+
+        state = cache._get_application_state(path)
+
+        self.mox.VerifyAll()
+        self.assertEqual(state.to_dictionary()['error_state'], 'unknown')
+        self.assertEqual(cache.host_mapping, {'host1': {path: True}})
+
     def test_get_application_state_eph1(self):
         foobar = "/foo/bar"
         foobarhead = "/foo/bar/head"
@@ -176,8 +254,8 @@ class ApplicationStateCacheTest(unittest.TestCase):
         self.zoo_keeper.get(foobarhead, watch=mox.IgnoreArg()).InAnyOrder().AndReturn(("{}", stat))
         self.zoo_keeper.get(foobar, watch=mox.IgnoreArg()).InAnyOrder().AndReturn(("{}", stat))
         self.zoo_keeper.get_children(foobar, watch=mox.IgnoreArg()).InAnyOrder()
-        self.zoo_keeper.get(self.configuration.override_node).AndReturn(('{}', None))
-        self.zoo_keeper.get(self.configuration.override_node).AndReturn(('{}', None))
+        self.override_cache.get(foobar, 'pd_disabled').AndReturn(None)
+        self.override_cache.get(foobar, 'grayed').AndReturn(None)
         self.time_estimate_cache.get_graphite_data('/foo/bar').AndReturn({})
 
         self.mox.ReplayAll()
@@ -196,6 +274,7 @@ class ApplicationStateCacheTest(unittest.TestCase):
         event.path = 'path1'
 
         self.time_estimate_cache.update_states(mox.IgnoreArg())
+        self.message_throttle.add_message(mox.IsA(ApplicationStatesMessage))
 
         self.mox.ReplayAll()
          
@@ -203,19 +282,132 @@ class ApplicationStateCacheTest(unittest.TestCase):
 
         self.mox.VerifyAll()
 
+    def test_on_update_children_unchanged(self):
+        cache = self._create_app_state_cache()
+        cache._index.update('path1', children=['foo'], cversion=3, cost=1)
+        cache._index.update('path1/foo', children=[], cost=5)
+
+        stat = StatMock()
+        stat.cversion = 3
+
+        self.zoo_keeper.connected = True
+        self.zoo_keeper.get_children('path1', watch=mox.IgnoreArg(),
+                                     include_data=True).AndReturn((['foo'], stat))
+        self.time_estimate_cache.update_states(mox.IgnoreArg())
+        self.message_throttle.add_message(mox.IsA(ApplicationStatesMessage))
+
+        event = EventMock()
+        event.path = 'path1'
+        event.type = EventType.CHILD
+
+        self.mox.ReplayAll()
+
+        cache._on_update(event)
+
+        self.mox.VerifyAll()
+        self.assertEqual(cache.walk_stats['round_trips'], 1)
+        self.assertEqual(cache.walk_stats['round_trips_saved'], 5)
+
+    def test_on_update_child_added(self):
+        cache = self._create_app_state_cache()
+        cache._index.update('path1', children=['foo'], cversion=1, cost=1)
+        cache._index.update('path1/foo', children=[], cost=5)
+
+        stat = StatMock()
+        stat.cversion = 2
+
+        self.zoo_keeper.connected = True
+        self.zoo_keeper.get_children('path1', watch=mox.IgnoreArg(),
+                                     include_data=True).AndReturn((['foo', 'bar'], stat))
+        self.mox.StubOutWithMock(cache, "_walk")
+        cache._walk('path1/bar', mox.IgnoreArg())
+        self.time_estimate_cache.update_states(mox.IgnoreArg())
+        self.message_throttle.add_message(mox.IsA(ApplicationStatesMessage))
+
+        event = EventMock()
+        event.path = 'path1'
+        event.type = EventType.CHILD
+
+        self.mox.ReplayAll()
+
+        cache._on_update(event)
+
+        self.mox.VerifyAll()
+        self.assertEqual(cache._index.children('path1'), set(['foo', 'bar']))
+
+    def test_on_update_running_data_changed(self):
+        cache = self._create_app_state_cache()
+        cache._index.update('path1', children=['host'], mzxid=1, cost=1)
+        cache._index.update('path1/host', children=[], cost=3)
+
+        parent = StatMock()
+        parent.mzxid = 2
+        parent.ephemeralOwner = 0
+        running = StatMock()
+        running.ephemeralOwner = 1
+
+        self.zoo_keeper.connected = True
+        # the parent is read once, for the event and for the state
+        self.zoo_keeper.get('path1', watch=mox.IgnoreArg())\
+            .AndReturn(('{"name": "foo"}', parent))
+        self.zoo_keeper.get('path1/host', watch=mox.IgnoreArg())\
+            .AndReturn(('', running))
+        app_state = ApplicationStateMock()
+        app_state.mock_dict = {'delete': False}
+        self.mox.StubOutWithMock(cache, "_get_application_state")
+        cache._get_application_state(
+            'path1/host', details=({}, running),
+            parent_details=({'name': 'foo'}, parent),
+            watched=False).AndReturn(app_state)
+        self.time_estimate_cache.update_states(mox.IgnoreArg())
+        self.message_throttle.add_message(mox.IsA(ApplicationStatesMessage))
+
+        event = EventMock()
+        event.path = 'path1'
+        event.type = EventType.CHANGED
+
+        self.mox.ReplayAll()
+
+        cache._on_update(event)
+
+        self.mox.VerifyAll()
+        self.assertEqual(cache._index.get('path1')['mzxid'], 2)
+
+    def test_on_update_deleted(self):
+        cache = self._create_app_state_cache()
+        cache._index.update('path1', children=[], cost=5)
+        state = ApplicationState(configuration_path='path1')
+        cache._cache.update({'path1': state.to_dictionary()})
+
+        self.zoo_keeper.connected = True
+        self.time_estimate_cache.update_states(mox.IgnoreArg())
+        self.message_throttle.add_message(mox.IsA(ApplicationStatesMessage))
+
+        event = EventMock()
+        event.path = 'path1'
+        event.type = EventType.DELETED
+
+        self.mox.ReplayAll()
+
+        cache._on_update(event)
+
+        self.mox.VerifyAll()
+        self.assertFalse('path1' in cache._index)
+        self.assertFalse('path1' in cache._cache.application_states)
+
     def test_on_agent_state_update(self):
         """
-        Simply test that it runs :-/
+        Test that every app on the host gets re-walked
         """
         cache = self._create_app_state_cache()
 
-        event = EventMock()
-        event.path = '/foo/host'
-
         cache._path_to_host_mapping['host'] = {'/path/bar': {}}
 
+        self.mox.StubOutWithMock(cache, "_on_update_path")
+        cache._on_update_path('/path/bar')
+
         self.mox.ReplayAll()
-        cache._on_agent_state_update(event)
+        cache._on_agent_state_update('host')
         self.mox.VerifyAll()
 
     def test_get_last_command(self):
@@ -244,6 +436,28 @@ class ApplicationStateCacheTest(unittest.TestCase):
         result = cache._get_last_command(data4)
         self.assertEqual('', result)
 
+    def test_query(self):
+        cache = self._create_app_state_cache()
+        cache._cache.update({
+            '/app/foo': {'configuration_path': '/app/foo'},
+            '/app/bar': {'configuration_path': '/app/bar'}
+        })
+        cache._changed(paths=True)
+        self.mox.ReplayAll()
+
+        self.assertEqual(json.loads(cache.query('/app/f.*')),
+                         [{'configuration_path': '/app/foo'}])
+        self.assertEqual(json.loads(cache.query('/app/f.*')),
+                         [{'configuration_path': '/app/foo'}])
+        self.assertEqual(cache.query_stats['hits'], 1)
+
+        # a change to the cache invalidates the result
+        cache._cache.update({'/app/fizz': {'configuration_path': '/app/fizz'}})
+        cache._changed(paths=True)
+        self.assertEqual(len(json.loads(cache.query('/app/f.*'))), 2)
+        self.assertEqual(cache.query_stats['misses'], 2)
+        self.mox.VerifyAll()
+
     def test_get_existing_attribute(self):
         """
         Test pulling values from existing application states
@@ -256,6 +470,12 @@ class ApplicationStateCacheTest(unittest.TestCase):
         cache = self._create_app_state_cache()
         cache._cache.update({path: state.to_dictionary()})
 
+        self.override_cache.get(path, 'application_host').AndReturn(None)
+        self.override_cache.get(path, 'foo').AndReturn(None)
+        self.override_cache.get('', 'application_host').AndReturn(None)
+        self.override_cache.get(path, 'application_host').AndReturn(default_val)
+        self.mox.ReplayAll()
+
         # test return of existing attribute
         result = cache._get_existing_attribute(path, 'application_host')
         self.assertEqual(host, result)
@@ -268,7 +488,14 @@ class ApplicationStateCacheTest(unittest.TestCase):
         result = cache._get_existing_attribute('', 'application_host')
         self.assertEqual(None, result)
 
+        # override value wins over the existing state
+        result = cache._get_existing_attribute(path, 'application_host')
+        self.assertEqual(default_val, result)
+
+        self.mox.VerifyAll()
+
     def _create_app_state_cache(self):
         return ApplicationStateCache(self.configuration, self.zoo_keeper,
-                                     self.web_socket_clients,
-                                     self.time_estimate_cache)
\ No newline at end of file
+                                     self.message_throttle,
+                                     self.time_estimate_cache,
+                                     self.override_cache, self.watch_registry)
\ No newline at end of file
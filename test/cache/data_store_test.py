@@ -6,7 +6,49 @@ from zoom.www.entities.task_server import TaskServer
 from zoom.www.cache.data_store import DataStore
 from zoom.www.cache.global_cache import GlobalCache
 from zoom.www.cache.application_state_cache import ApplicationStateCache
-from test.test_utils import ConfigurationMock
+from zoom.www.cache.application_dependency_cache \
+    import ApplicationDependencyCache
+from zoom.www.cache.watch_registry import WatchRegistry
+from test.test_utils import ConfigurationMock, EventMock
+
+
+class WatchingZooKeeper(object):
+    """
+    Like kazoo, keeps one watch per function and node, and keeps them over a
+    suspended connection.
+    """
+    def __init__(self):
+        self.watches = dict()  # {path: set(watch)}
+
+    def get(self, path, watch=None):
+        if watch is not None:
+            self.watches.setdefault(path, set()).add(watch)
+        return '', None
+
+    def change(self, path):
+        event = EventMock()
+        event.path = path
+        for watch in self.watches.pop(path, set()):
+            watch(event)
+
+
+class WatchingCache(object):
+    def __init__(self, zoo_keeper, registry):
+        self._zoo_keeper = zoo_keeper
+        self._registry = registry
+        self.updates = list()
+
+    def reload(self):
+        self._registry.call(self._zoo_keeper.get, '/foo',
+                            WatchRegistry.DATA, self.on_update)
+
+    def on_update(self, event=None):
+        self.updates.append(event.path)
+
+
+class IdleCache(object):
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
 
 
 class DataStoreTest(TestCase):
@@ -55,5 +97,47 @@ class DataStoreTest(TestCase):
         store.load_application_state_cache()
         self.mox.VerifyAll()
         
+    def test_load_raises(self):
+        global_cache = self.mox.CreateMock(GlobalCache)
+        global_cache.on_update()
+        application_state_cache = self.mox.CreateMock(ApplicationStateCache)
+        application_state_cache.load().AndRaise(ValueError('bad state'))
+        dependency_cache = self.mox.CreateMock(ApplicationDependencyCache)
+        dependency_cache.load()
+        self.mox.ReplayAll()
+
+        store = self._create_datastore()
+        store._global_cache = global_cache
+        store._application_state_cache = application_state_cache
+        store._application_dependency_cache = dependency_cache
+        store._load_pagerduty_services = lambda: None
+        # the time estimate cache is not loaded after a failure
+        store._time_estimate_cache = None
+        self.assertRaises(ValueError, store.load)
+        self.mox.VerifyAll()
+
+    def test_reload_after_suspend(self):
+        self.task_server.clear_all_tasks()
+        self.mox.ReplayAll()
+
+        store = self._create_datastore()
+        zoo_keeper = WatchingZooKeeper()
+        cache = WatchingCache(zoo_keeper, store._watch_registry)
+        store._override_cache = cache
+        for name in ('_global_cache', '_application_state_cache',
+                     '_application_dependency_cache', '_time_estimate_cache',
+                     '_alert_manager', '_pd'):
+            setattr(store, name, IdleCache())
+
+        cache.reload()
+        # suspended and connected again: the watch is still set
+        store.reload()
+        self.assertEqual(len(zoo_keeper.watches['/foo']), 1)
+        self.assertEqual(store._watch_registry.stats['registered'], 1)
+
+        zoo_keeper.change('/foo')
+        self.assertEqual(cache.updates, ['/foo'])
+        self.mox.VerifyAll()
+
     def _create_datastore(self):
         return DataStore(self.configuration, self.zoo_keeper, self.task_server)
\ No newline at end of file
@@ -0,0 +1,161 @@
+from unittest import TestCase
+from zoom.common.types import PredicateType
+from zoom.www.cache.dependency_graph import DependencyGraph
+
+
+class DependencyGraphTest(TestCase):
+
+    def setUp(self):
+        self.graph = DependencyGraph()
+        self.deps = {
+            '/app/foo': self._entry('/app/foo', []),
+            '/app/foo/a': self._entry('/app/foo/a', []),
+            '/app/bar': self._entry(
+                '/app/bar',
+                [(PredicateType.ZOOKEEPERHASCHILDREN, '/app/foo/a')]),
+            '/app/baz': self._entry(
+                '/app/baz',
+                [(PredicateType.ZOOKEEPERHASGRANDCHILDREN, '/app/foo'),
+                 (PredicateType.TIMEWINDOW, 'I should be up after: 08:00')])
+        }
+        self.graph.update(self.deps, self.deps.keys())
+
+    def test_update(self):
+        self.assertEqual(self.deps['/app/foo']['downstream'], ['/app/baz'])
+        self.assertEqual(self.deps['/app/foo/a']['downstream'],
+                         ['/app/bar', '/app/baz'])
+        self.assertEqual(self.deps['/app/bar']['downstream'], [])
+        self._assert_matches_full_scan()
+
+    def test_update_changed_dependency(self):
+        self.deps['/app/baz'] = self._entry(
+            '/app/baz', [(PredicateType.ZOOKEEPERHASCHILDREN, '/app/bar')])
+        affected = self.graph.update(self.deps, ['/app/baz'])
+
+        self.assertEqual(affected,
+                         set(['/app/baz', '/app/bar', '/app/foo',
+                              '/app/foo/a']))
+        self.assertEqual(self.deps['/app/foo']['downstream'], [])
+        self.assertEqual(self.deps['/app/bar']['downstream'], ['/app/baz'])
+        self._assert_matches_full_scan()
+
+    def test_update_new_application(self):
+        self.deps['/app/foobar'] = self._entry('/app/foobar', [])
+        affected = self.graph.update(self.deps, ['/app/foobar'])
+
+        self.assertEqual(affected, set(['/app/foobar']))
+        self.assertEqual(self.deps['/app/foobar']['downstream'], ['/app/baz'])
+        self._assert_matches_full_scan()
+
+    def test_clear(self):
+        self.graph.clear()
+        self.assertEqual(self.graph.downstream('/app/foo/a'), [])
+
+    def test_operational_closure(self):
+        graph = DependencyGraph()
+        deps = self._operational_chain()
+        graph.update(deps, deps.keys())
+
+        self.assertEqual(graph.operational_closure('/app/a'),
+                         frozenset(['/app/b', '/app/c']))
+        self.assertEqual(graph.operational_closure('/app/c'), frozenset())
+        # memoized
+        graph.operational_closure('/app/a')
+        self.assertEqual(graph.closure_stats['hits'], 1)
+
+    def test_operational_closure_cycle(self):
+        graph = DependencyGraph()
+        deps = self._operational_chain()
+        deps['/app/a'] = self._entry(
+            '/app/a', [(PredicateType.ZOOKEEPERHASCHILDREN, '/app/c')],
+            operational=True)
+        graph.update(deps, deps.keys())
+
+        self.assertEqual(graph.operational_closure('/app/b'),
+                         frozenset(['/app/a', '/app/c']))
+
+    def test_operational_closure_invalidated(self):
+        graph = DependencyGraph()
+        deps = self._operational_chain()
+        graph.update(deps, deps.keys())
+        graph.operational_closures()
+
+        # d now depends operationally on c
+        deps['/app/d'] = self._entry(
+            '/app/d', [(PredicateType.ZOOKEEPERHASCHILDREN, '/app/c')],
+            operational=True)
+        graph.update(deps, ['/app/d'])
+
+        self.assertEqual(graph.operational_closures(), {
+            '/app/a': frozenset(['/app/b', '/app/c', '/app/d']),
+            '/app/b': frozenset(['/app/c', '/app/d']),
+            '/app/c': frozenset(['/app/d']),
+            '/app/d': frozenset()
+        })
+        # a, b, c and d itself
+        self.assertEqual(graph.closure_stats['invalidated'], 4)
+
+    def test_closure(self):
+        graph = DependencyGraph()
+        deps = self._operational_chain()
+        graph.update(deps, deps.keys())
+
+        self.assertEqual(graph.closure(['/app/a']),
+                         {'/app/b': 1, '/app/c': 2, '/app/d': 3})
+        self.assertEqual(graph.closure(['/app/a'], max_depth=2),
+                         {'/app/b': 1, '/app/c': 2})
+        self.assertEqual(graph.closure(['/app/d', '/app/b'], downstream=False),
+                         {'/app/c': 1, '/app/a': 1})
+
+    def test_cycles(self):
+        graph = DependencyGraph()
+        deps = self._operational_chain()
+        self.assertEqual(graph.cycles(), [])
+
+        deps['/app/a'] = self._entry(
+            '/app/a', [(PredicateType.ZOOKEEPERHASCHILDREN, '/app/c')])
+        deps['/app/e'] = self._entry(
+            '/app/e', [(PredicateType.ZOOKEEPERHASCHILDREN, '/app/e')])
+        graph.update(deps, deps.keys())
+
+        self.assertEqual(graph.cycles(), [['/app/a', '/app/b', '/app/c'],
+                                          ['/app/e']])
+        self.assertEqual(graph.closure(['/app/a']),
+                         {'/app/b': 1, '/app/c': 2, '/app/d': 3})
+
+    def _operational_chain(self):
+        # b and c depend operationally on a, d not operationally on c
+        return {
+            '/app/a': self._entry('/app/a', []),
+            '/app/b': self._entry(
+                '/app/b', [(PredicateType.ZOOKEEPERHASCHILDREN, '/app/a')],
+                operational=True),
+            '/app/c': self._entry(
+                '/app/c',
+                [(PredicateType.ZOOKEEPERHASGRANDCHILDREN, '/app/b')],
+                operational=True),
+            '/app/d': self._entry(
+                '/app/d', [(PredicateType.ZOOKEEPERHASCHILDREN, '/app/c')])
+        }
+
+    def _assert_matches_full_scan(self):
+        for key, value in self.deps.iteritems():
+            expected = list()
+            for path, data in self.deps.iteritems():
+                for dep in data['dependencies']:
+                    if (dep['type'] ==
+                            PredicateType.ZOOKEEPERHASGRANDCHILDREN and
+                            key.startswith(dep['path'])):
+                        expected.append(path)
+                    elif (dep['type'] == PredicateType.ZOOKEEPERHASCHILDREN
+                          and dep['path'] == key):
+                        expected.append(path)
+            self.assertEqual(sorted(value['downstream']), sorted(expected))
+
+    def _entry(self, path, dependencies, operational=False):
+        return {
+            'configuration_path': path,
+            'dependencies': [{'type': t, 'path': p, 'operational': operational}
+                             for t, p in dependencies],
+            'downstream': list()
+        }
@@ -3,6 +3,8 @@ import mox
 from unittest import TestCase
 from kazoo.client import KazooClient
 from zoom.www.cache.global_cache import GlobalCache
+from zoom.www.cache.watch_registry import WatchRegistry
+from zoom.www.messages.message_throttler import MessageThrottle
 from test.test_utils import ConfigurationMock, EventMock, FakeMessage
 
 
@@ -10,10 +12,7 @@ class GlobalCacheTest(TestCase):
     
     def setUp(self):
         self.mox = mox.Mox()
-        self.socket_client1 = self.mox.CreateMockAnything()
-        self.socket_client2 = self.mox.CreateMockAnything()
-
-        self.web_socket_clients = [self.socket_client1, self.socket_client2]
+        self.message_throttle = self.mox.CreateMock(MessageThrottle)
         self.configuration = ConfigurationMock
         self.zoo_keeper = self.mox.CreateMock(KazooClient)
 
@@ -39,11 +38,12 @@ class GlobalCacheTest(TestCase):
     def test_on_update(self):
         event = EventMock()
         cache = self._create_global_cache()
-        self.socket_client1.write_message("globalmodejson")
-        self.socket_client2.write_message("globalmodejson")
+        message = FakeMessage("globalmodejson")
+        message.mode = "auto"
+        self.message_throttle.add_message(message)
 
         self.mox.StubOutWithMock(cache, "get_mode")
-        cache.get_mode().AndReturn(FakeMessage("globalmodejson"))
+        cache.get_mode().AndReturn(message)
 
         self.mox.ReplayAll()
         cache.on_update(event)
@@ -51,4 +51,4 @@ class GlobalCacheTest(TestCase):
 
     def _create_global_cache(self):
         return GlobalCache(self.configuration, self.zoo_keeper,
-                           self.web_socket_clients)
\ No newline at end of file
+                           self.message_throttle, WatchRegistry())
\ No newline at end of file
@@ -0,0 +1,94 @@
+from unittest import TestCase
+from zoom.www.cache.graphite_cache import GraphiteCache
+
+
+class GraphiteCacheTest(TestCase):
+
+    def setUp(self):
+        self.now = 1000
+        self.refreshed = list()
+        self.cache = GraphiteCache(max_size=2, ttl=100, negative_ttl=10,
+                                   refresh=self._refresh,
+                                   clock=lambda: self.now)
+        self.data = {'ave': 1, 'max': 2, 'min': 0}
+
+    def test_get(self):
+        self.assertEqual(self.cache.get('/foo'), None)
+        self.cache.put('/foo', self.data)
+        self.assertEqual(self.cache.get('/foo'), self.data)
+
+        stats = self.cache.stats
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_expire(self):
+        self.cache.put('/foo', self.data)
+        self.cache.put('/bar', self.data, negative=True)
+
+        self.now += 10
+        self.assertEqual(self.cache.get('/bar'), None)
+        self.assertEqual(self.cache.get('/foo'), self.data)
+
+        self.now += 90
+        self.assertEqual(self.cache.get('/foo'), None)
+        self.assertEqual(self.cache.stats['expirations'], 2)
+
+    def test_evict_least_recently_used(self):
+        self.cache.put('/foo', self.data)
+        self.cache.put('/bar', self.data)
+        self.cache.get('/foo')
+        self.cache.put('/baz', self.data)
+
+        self.assertTrue('/foo' in self.cache)
+        self.assertFalse('/bar' in self.cache)
+        self.assertEqual(self.cache.stats['evictions'], 1)
+
+    def test_refresh_ahead(self):
+        self.cache.put('/foo', self.data)
+        self.cache.get('/foo')
+        self.assertEqual(self.refreshed, [])
+
+        self.now += 85
+        self.cache.get('/foo')
+        self.cache.get('/foo')
+        self.assertEqual(self.refreshed, ['/foo'])
+
+        self.cache.put('/foo', self.data)
+        self.assertEqual(self.cache.stats['refreshes'], 1)
+
+    def test_negative_not_refreshed(self):
+        self.cache.put('/foo', self.data, negative=True)
+        self.now += 9
+        self.assertEqual(self.cache.get('/foo'), self.data)
+        self.assertEqual(self.refreshed, [])
+        self.assertEqual(self.cache.stats['negative_hits'], 1)
+
+    def test_failed_refresh(self):
+        def fail(path):
+            self.refreshed.append(path)
+            raise ValueError('queue is gone')
+
+        self.cache._refresh = fail
+        self.cache.put('/foo', self.data)
+        self.now += 85
+        self.assertRaises(ValueError, self.cache.get, '/foo')
+
+        # tried again on the next hit
+        self.cache._refresh = self._refresh
+        self.cache.get('/foo')
+        self.assertEqual(self.refreshed, ['/foo', '/foo'])
+
+        self.cache.refresh_failed('/foo')
+        self.cache.get('/foo')
+        self.assertEqual(self.refreshed, ['/foo', '/foo', '/foo'])
+
+    def test_deadline(self):
+        self.cache.put('/foo', self.data)
+        self.assertEqual(self.cache.deadline('/foo'), 1080)
+        self.now += 85
+        self.cache.get('/foo')
+        self.assertEqual(self.cache.deadline('/foo'), 1100)
+        self.assertEqual(self.cache.deadline('/bar'), None)
+
+    def _refresh(self, path):
+        self.refreshed.append(path)
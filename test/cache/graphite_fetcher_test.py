@@ -0,0 +1,71 @@
+import mox
+import requests
+
+from unittest import TestCase
+from zoom.www.cache.graphite_fetcher import GraphiteFetcher
+
+
+class ResponseMock(object):
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class GraphiteFetcherTest(TestCase):
+
+    def setUp(self):
+        self.mox = mox.Mox()
+        self.fetcher = GraphiteFetcher('graphite', None)
+        self.fetcher._session = self.mox.CreateMock(requests.Session)
+        self.foo = '/spot/software/state/app/foo'
+        self.bar = '/spot/software/state/app/bar'
+
+    def tearDown(self):
+        self.mox.UnsetStubs()
+
+    def test_fetch_batch(self):
+        self.fetcher._session.post('http://graphite/render',
+                                   data=mox.IgnoreArg(),
+                                   timeout=5)\
+            .AndReturn(ResponseMock(200, [
+                {'target': 'app.foo:max', 'datapoints': [[1, 0], [9, 1]]},
+                {'target': 'app.foo:min', 'datapoints': [[2, 0]]},
+                {'target': 'app.foo:avg', 'datapoints': [[5, 0]]},
+                {'target': 'app.bar:max', 'datapoints': []}
+            ]))
+        self.mox.ReplayAll()
+
+        results, failed = self.fetcher.fetch([self.foo, self.bar,
+                                              '/other/path'])
+
+        self.assertEqual(failed, [])
+        self.assertEqual(results, {
+            self.foo: {'ave': 5, 'max': 9, 'min': 2},
+            self.bar: {'ave': 0, 'max': 0, 'min': 0},
+            '/other/path': {'ave': 0, 'max': 0, 'min': 0}
+        })
+        self.mox.VerifyAll()
+
+    def test_fetch_unreachable(self):
+        self.fetcher._session.post('http://graphite/render',
+                                   data=mox.IgnoreArg(),
+                                   timeout=5)\
+            .AndRaise(requests.exceptions.Timeout())
+        self.mox.ReplayAll()
+
+        results, failed = self.fetcher.fetch([self.foo, '/other/path'])
+
+        self.assertEqual(results,
+                         {'/other/path': {'ave': 0, 'max': 0, 'min': 0}})
+        self.assertEqual(failed, [self.foo])
+        self.mox.VerifyAll()
+
+    def test_request_deduplicates(self):
+        self.fetcher.request(self.foo)
+        self.fetcher.request(self.foo)
+        self.fetcher.request(self.bar)
+
+        self.assertEqual(self.fetcher._pending.keys(), [self.foo, self.bar])
@@ -0,0 +1,83 @@
+import mox
+
+from unittest import TestCase
+from kazoo.client import KazooClient
+from kazoo.exceptions import NoNodeError
+from zoom.www.cache.override_cache import OverrideCache
+from zoom.www.cache.watch_registry import WatchRegistry
+from test.test_utils import StatMock
+
+
+class OverrideCacheTest(TestCase):
+
+    def setUp(self):
+        self.mox = mox.Mox()
+        self.node = '/override_foo'
+        self.zoo_keeper = self.mox.CreateMock(KazooClient)
+        self.zoo_keeper.connected = True
+        self.stat = StatMock()
+        self.stat.version = 1
+
+    def tearDown(self):
+        self.mox.UnsetStubs()
+
+    def test_get_reads_once(self):
+        self.zoo_keeper.get(self.node, watch=mox.IgnoreArg())\
+            .AndReturn(('{"/foo": {"pd_disabled": true}}', self.stat))
+        self.mox.ReplayAll()
+
+        cache = OverrideCache(self.node, self.zoo_keeper, WatchRegistry())
+        self.assertTrue(cache.get('/foo', 'pd_disabled'))
+        self.assertEqual(cache.get('/foo', 'grayed'), None)
+        self.assertEqual(cache.get('/bar', 'grayed', False), False)
+
+        self.mox.VerifyAll()
+
+    def test_on_update_same_version(self):
+        self.zoo_keeper.get(self.node, watch=mox.IgnoreArg())\
+            .AndReturn(('{"/foo": {"grayed": true}}', self.stat))
+        self.zoo_keeper.get(self.node, watch=mox.IgnoreArg())\
+            .AndReturn(('{}', self.stat))
+        self.mox.ReplayAll()
+
+        cache = OverrideCache(self.node, self.zoo_keeper, WatchRegistry())
+        cache._on_update()
+        cache._on_update()
+
+        # unchanged version is not parsed again
+        self.assertTrue(cache.get('/foo', 'grayed'))
+        self.mox.VerifyAll()
+
+    def test_missing_node(self):
+        self.zoo_keeper.get(self.node, watch=mox.IgnoreArg())\
+            .AndRaise(NoNodeError())
+        self.zoo_keeper.exists(self.node, watch=mox.IgnoreArg())
+        self.mox.ReplayAll()
+
+        cache = OverrideCache(self.node, self.zoo_keeper, WatchRegistry())
+        self.assertEqual(cache.overrides, {})
+
+        self.mox.VerifyAll()
+
+    def test_update(self):
+        new_stat = StatMock()
+        new_stat.version = 2
+        self.zoo_keeper.get(self.node, watch=mox.IgnoreArg())\
+            .AndReturn(('{}', self.stat))
+        self.zoo_keeper.set(self.node, '{"/foo": {"grayed": true}}')\
+            .AndReturn(new_stat)
+        self.zoo_keeper.get(self.node, watch=mox.IgnoreArg())\
+            .AndReturn(('{"/foo": {"grayed": false}}', self.stat))
+        self.mox.ReplayAll()
+
+        registry = WatchRegistry()
+        cache = OverrideCache(self.node, self.zoo_keeper, registry)
+        cache.update('/foo', 'grayed', True)
+        self.assertTrue(cache.get('/foo', 'grayed'))
+        self.assertEqual(registry.stats['active_watches'], 1)
+
+        # changed directly in zookeeper
+        cache._on_update()
+        self.assertFalse(cache.get('/foo', 'grayed'))
+
+        self.mox.VerifyAll()
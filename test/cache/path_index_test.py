@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from zoom.www.cache.path_index import PathIndex, literal_prefix
+
+
+class PathIndexTest(TestCase):
+
+    def setUp(self):
+        self.index = PathIndex(pattern_cache_size=2)
+        self.index.refresh(['/app/foo/1', '/app/foo/2', '/app/foobar/1',
+                            '/app/bar/1', '/other/foo'], 1)
+
+    def test_literal_prefix(self):
+        self.assertEqual(literal_prefix('/app/foo'), ('/app/foo', True))
+        self.assertEqual(literal_prefix('/app/fo.*'), ('/app/fo', False))
+        self.assertEqual(literal_prefix('/app/foo?'), ('/app/fo', False))
+        self.assertEqual(literal_prefix('/app/foo*'), ('/app/fo', False))
+        self.assertEqual(literal_prefix('/app/foo+'), ('/app/foo', False))
+        self.assertEqual(literal_prefix('/app/foo{2}'), ('/app/fo', False))
+        self.assertEqual(literal_prefix('/app/foo|/other'), ('', False))
+
+    def test_match_prefix(self):
+        self.assertEqual(self.index.match('/app/foo'),
+                         ['/app/foo/1', '/app/foo/2', '/app/foobar/1'])
+
+    def test_match_regex(self):
+        self.assertEqual(self.index.match('/app/foo/[0-9]$'),
+                         ['/app/foo/1', '/app/foo/2'])
+        self.assertEqual(self.index.match('.*/1'),
+                         ['/app/bar/1', '/app/foo/1', '/app/foobar/1'])
+        self.assertEqual(self.index.match('/app/foo|/other'),
+                         ['/app/foo/1', '/app/foo/2', '/app/foobar/1',
+                          '/other/foo'])
+
+    def test_pattern_lru(self):
+        for pattern in ('a.', 'b.', 'a.', 'c.'):
+            self.index.match(pattern)
+
+        self.assertEqual(self.index._patterns.keys(), ['a.', 'c.'])
+
+    def test_refresh_only_on_new_version(self):
+        self.index.refresh(['/new'], 1)
+        self.assertEqual(len(self.index), 5)
+
+        self.index.refresh(['/new'], 2)
+        self.assertEqual(self.index.match('/'), ['/new'])
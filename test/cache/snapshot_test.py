@@ -0,0 +1,40 @@
+import gzip
+from cStringIO import StringIO
+from unittest import TestCase
+
+from zoom.www.cache.snapshot import Snapshot
+
+
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        self.encoded = 0
+        self.snapshot = Snapshot(self._encode)
+
+    def test_encoded_once_per_version(self):
+        self.assertEqual(self.snapshot.get(1), '{"encoded": 1}')
+        self.assertEqual(self.snapshot.get(1), '{"encoded": 1}')
+        self.assertEqual(self.snapshot.get(2), '{"encoded": 2}')
+
+        stats = self.snapshot.stats
+        self.assertEqual(stats['builds'], 2)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_gzipped(self):
+        data = self.snapshot.get(1, gzipped=True)
+
+        self.assertEqual(gzip.GzipFile(fileobj=StringIO(data)).read(),
+                         '{"encoded": 1}')
+        self.assertTrue(self.snapshot.get(1, gzipped=True) is data)
+        self.assertEqual(self.encoded, 1)
+
+    def test_etag(self):
+        self.assertEqual(self.snapshot.etag(1), self.snapshot.etag(1))
+        self.assertNotEqual(self.snapshot.etag(1), self.snapshot.etag(2))
+        # another process starts counting from scratch
+        self.assertNotEqual(self.snapshot.etag(1),
+                            Snapshot(self._encode).etag(1))
+
+    def _encode(self):
+        self.encoded += 1
+        return '{{"encoded": {0}}}'.format(self.encoded)
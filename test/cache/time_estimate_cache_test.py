@@ -0,0 +1,179 @@
+import mox
+
+from unittest import TestCase
+from zoom.common.types import PredicateType
+from zoom.www.cache.graphite_cache import GraphiteCache
+from zoom.www.cache.time_estimate_cache import TimeEstimateCache
+from zoom.www.messages.message_throttler import MessageThrottle
+from test.test_utils import ConfigurationMock
+
+
+class GraphiteAvailabilityMock(object):
+    available = True
+
+
+class TimeEstimateCacheTest(TestCase):
+
+    def setUp(self):
+        self.mox = mox.Mox()
+        self.cache = TimeEstimateCache(ConfigurationMock(),
+                                       self.mox.CreateMock(MessageThrottle))
+        self.cache.graphite = GraphiteAvailabilityMock()
+        for path, seconds in (('/app/a', 10), ('/app/b', 20),
+                              ('/app/c/1', 30), ('/app/c/2', 5)):
+            self.cache.graphite_cache.put(path, {'ave': seconds,
+                                                 'max': seconds,
+                                                 'min': seconds})
+        self.calls = list()
+        self.cache.get_graphite_data = self._get_graphite_data
+
+        self.cache.states = {
+            '/app/a': {'application_status': 'stopped'},
+            '/app/b': {'application_status': 'stopped'},
+            '/app/c/1': {'application_status': 'running'},
+            '/app/c/2': {'application_status': 'running'}
+        }
+
+    def tearDown(self):
+        self.mox.UnsetStubs()
+
+    def test_update_dependencies(self):
+        self.cache._message_throttle.add_message(mox.IgnoreArg())
+        self.mox.ReplayAll()
+
+        self._load_dependencies()
+        message = self.cache.load()
+
+        # b waits on a, a waits on all of /app/c
+        self.assertEqual(message.contents['maxtime'], 30)
+        self.assertEqual(message.contents['maxpath'], '/app/b')
+        self.mox.VerifyAll()
+
+    def test_update_states_only_recomputes_downstream(self):
+        self.cache._message_throttle.add_message(mox.IgnoreArg())\
+            .MultipleTimes()
+        self.mox.ReplayAll()
+
+        self._load_dependencies()
+        del self.calls[:]
+
+        self.cache.update_states(
+            {'/app/c/1': {'application_status': 'stopped'}})
+
+        message = self.cache.load()
+        self.assertEqual(message.contents['maxtime'], 60)
+        # c/2 and its unchanged cost were not touched
+        self.assertEqual(sorted(self.calls), ['/app/a', '/app/b', '/app/c/1'])
+        self.mox.VerifyAll()
+
+    def test_update_states_unchanged(self):
+        self.cache._message_throttle.add_message(mox.IgnoreArg())
+        self.mox.ReplayAll()
+
+        self._load_dependencies()
+        del self.calls[:]
+
+        self.cache.update_states(
+            {'/app/c/1': {'application_status': 'running', 'foo': 'bar'}})
+
+        self.assertEqual(self.calls, [])
+        self.mox.VerifyAll()
+
+    def test_new_grandchild(self):
+        self.cache._message_throttle.add_message(mox.IgnoreArg())\
+            .MultipleTimes()
+        self.mox.ReplayAll()
+
+        self._load_dependencies()
+        self.cache.graphite_cache.put('/app/c/3', {'ave': 50, 'max': 50,
+                                                   'min': 50})
+        self.cache.states['/app/c/3'] = {'application_status': 'stopped'}
+        self.cache.update_dependencies({'/app/c/3': self._deps([])})
+
+        self.assertEqual(self.cache.load().contents['maxtime'], 80)
+        self.mox.VerifyAll()
+
+    def test_on_graphite_data(self):
+        self.cache._message_throttle.add_message(mox.IgnoreArg())\
+            .MultipleTimes()
+        self.mox.ReplayAll()
+
+        self._load_dependencies()
+        self.cache._on_graphite_data({'/app/a': {'ave': 40, 'max': 40,
+                                                 'min': 40}}, [])
+
+        self.assertEqual(self.cache.load().contents['maxtime'], 60)
+        self.mox.VerifyAll()
+
+    def test_circular_dependency(self):
+        self.cache._message_throttle.add_message(mox.IgnoreArg())\
+            .MultipleTimes()
+        self.mox.ReplayAll()
+
+        self._load_dependencies()
+        self.cache.update_dependencies({
+            '/app/c/1': self._deps(
+                [(PredicateType.ZOOKEEPERHASCHILDREN, '/app/b')])})
+        message = self.cache.load()
+        self.assertTrue(message.contents['error_msg']
+                        .startswith('Circular dependency on /app/'))
+
+        # the error is kept until a dependency changes
+        del self.calls[:]
+        self.cache.update_states(
+            {'/app/c/2': {'application_status': 'running', 'foo': 'bar'}})
+        self.assertTrue(self.cache.load() is message)
+        self.assertEqual(self.calls, [])
+
+        self.cache.update_dependencies({'/app/c/1': self._deps([])})
+        self.assertEqual(self.cache.load().contents['maxtime'], 30)
+        self.mox.VerifyAll()
+
+    def test_graphite_expiry(self):
+        self.cache._message_throttle.add_message(mox.IgnoreArg())\
+            .MultipleTimes()
+        self.mox.ReplayAll()
+
+        now = [1000]
+        refreshed = list()
+        self.cache._clock = lambda: now[0]
+        self.cache.graphite_cache = GraphiteCache(
+            ttl=100, refresh=refreshed.append, clock=lambda: now[0])
+        for path, seconds in (('/app/a', 10), ('/app/b', 20)):
+            self.cache.graphite_cache.put(path, {'ave': seconds,
+                                                 'max': seconds,
+                                                 'min': seconds})
+        self.cache._fetcher.request = lambda path: None
+        del self.cache.get_graphite_data  # use the real lookup
+
+        self._load_dependencies()
+        self.assertEqual(self.cache.load().contents['maxtime'], 30)
+        self.assertEqual(refreshed, [])
+
+        # past refresh-ahead, the memoized estimate reads graphite again
+        now[0] += 85
+        self.assertEqual(self.cache.load().contents['maxtime'], 30)
+        self.assertEqual(sorted(refreshed), ['/app/a', '/app/b'])
+
+        # expired, and not refreshed in time
+        now[0] += 20
+        self.assertEqual(self.cache.load().contents['maxtime'], 0)
+        self.mox.VerifyAll()
+
+    def _load_dependencies(self):
+        self.cache.update_dependencies({
+            '/app/a': self._deps(
+                [(PredicateType.ZOOKEEPERHASGRANDCHILDREN, '/app/c')]),
+            '/app/b': self._deps(
+                [(PredicateType.ZOOKEEPERHASCHILDREN, '/app/a')]),
+            '/app/c/1': self._deps([]),
+            '/app/c/2': self._deps([])
+        })
+
+    def _deps(self, dependencies):
+        return {'dependencies': [{'type': t, 'path': p}
+                                 for t, p in dependencies]}
+
+    def _get_graphite_data(self, path):
+        self.calls.append(path)
+        return self.cache.graphite_cache.peek(path)
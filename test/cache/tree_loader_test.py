@@ -0,0 +1,63 @@
+import mox
+
+from unittest import TestCase
+from kazoo.client import KazooClient
+from kazoo.exceptions import NoNodeError
+from zoom.www.cache.tree_loader import TreeLoader
+from test.test_utils import StatMock
+
+
+class AsyncResultMock:
+    def __init__(self, value=None, exception=None):
+        self.value = value
+        self.exception = exception
+
+    def get(self):
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+
+class TreeLoaderTest(TestCase):
+
+    def setUp(self):
+        self.mox = mox.Mox()
+        self.zoo_keeper = self.mox.CreateMock(KazooClient)
+
+    def tearDown(self):
+        self.mox.UnsetStubs()
+
+    def test_walk(self):
+        stat = StatMock()
+        self.zoo_keeper.get_children_async('/root', watch=None)\
+            .AndReturn(AsyncResultMock(['foo', 'bar']))
+        self.zoo_keeper.get_children_async('/root/foo', watch=None)\
+            .AndReturn(AsyncResultMock([]))
+        self.zoo_keeper.get_children_async('/root/bar', watch=None)\
+            .AndReturn(AsyncResultMock(exception=NoNodeError()))
+        self.zoo_keeper.get_async('/root/foo', watch=None)\
+            .AndReturn(AsyncResultMock(('data', stat)))
+        self.mox.ReplayAll()
+
+        loader = TreeLoader(self.zoo_keeper, window=2)
+        tree = loader.walk('/root')
+
+        self.mox.VerifyAll()
+        self.assertEqual(set(tree.keys()), set(['/root', '/root/foo']))
+        self.assertEqual(tree['/root/foo']['data'], 'data')
+        self.assertEqual(tree['/root/foo']['stat'], stat)
+        self.assertEqual(loader.requests, 4)
+
+    def test_get_data(self):
+        stat = StatMock()
+        self.zoo_keeper.get_async('/foo', watch=None)\
+            .AndReturn(AsyncResultMock(('foo', stat)))
+        self.zoo_keeper.get_async('/bar', watch=None)\
+            .AndReturn(AsyncResultMock(exception=NoNodeError()))
+        self.mox.ReplayAll()
+
+        loader = TreeLoader(self.zoo_keeper)
+        data = loader.get_data(['/foo', '/bar'])
+
+        self.mox.VerifyAll()
+        self.assertEqual(data, {'/foo': ('foo', stat)})
@@ -0,0 +1,89 @@
+from unittest import TestCase
+from kazoo.protocol.states import EventType
+from zoom.www.cache.watch_registry import WatchRegistry
+from test.test_utils import EventMock
+
+
+class WatchRegistryTest(TestCase):
+
+    def setUp(self):
+        self.events = list()
+        self.registry = WatchRegistry()
+
+    def tearDown(self):
+        self.registry.stop()
+
+    def test_deduplicate(self):
+        first = self.registry.watcher('/foo', WatchRegistry.CHILDREN,
+                                      self._callback)
+        second = self.registry.watcher('/foo', WatchRegistry.CHILDREN,
+                                       self._callback)
+        other_kind = self.registry.watcher('/foo', WatchRegistry.DATA,
+                                           self._callback)
+
+        self.assertTrue(first is not None)
+        self.assertEqual(second, None)
+        self.assertTrue(other_kind is not None)
+
+        stats = self.registry.stats
+        self.assertEqual(stats['active_watches'], 2)
+        self.assertEqual(stats['deduplicated'], 1)
+
+    def test_fire_rearms(self):
+        watch = self.registry.watcher('/foo', WatchRegistry.DATA,
+                                      self._callback)
+        event = self._event('/foo', EventType.CHANGED)
+        watch(event)
+
+        self.assertEqual(self.events, [event])
+        self.assertEqual(self.registry.stats['active_watches'], 0)
+        # once fired, a new watcher is handed out
+        self.assertTrue(self.registry.watcher('/foo', WatchRegistry.DATA,
+                                              self._callback) is not None)
+
+    def test_clear_ignores_stale_watchers(self):
+        old = self.registry.watcher('/foo', WatchRegistry.DATA,
+                                    self._callback)
+        self.registry.clear()
+        new = self.registry.watcher('/foo', WatchRegistry.DATA,
+                                    self._callback)
+        event = self._event('/foo', EventType.CHANGED)
+        old(event)
+        self.assertEqual(self.registry.stats['active_watches'], 1)
+        new(event)
+
+        self.assertEqual(self.events, [event])
+        self.assertEqual(self.registry.stats['stale'], 1)
+        self.assertEqual(self.registry.stats['active_watches'], 0)
+
+    def test_call_disarms_on_error(self):
+        def _raise(path, watch=None):
+            raise ValueError(path)
+
+        self.assertRaises(ValueError, self.registry.call, _raise, '/foo',
+                          WatchRegistry.DATA, self._callback)
+        self.assertEqual(self.registry.stats['active_watches'], 0)
+
+    def test_coalesce(self):
+        registry = WatchRegistry(coalesce_interval=10)
+        registry._running = True
+        event = self._event('/foo', EventType.CHILD)
+        for _ in range(3):
+            registry.watcher('/foo', WatchRegistry.CHILDREN,
+                             self._callback)(event)
+
+        self.assertEqual(self.events, [])
+        registry._flush()
+
+        self.assertEqual(self.events, [event])
+        self.assertEqual(registry.stats['fired'], 3)
+        self.assertEqual(registry.stats['coalesced'], 2)
+
+    def _callback(self, event):
+        self.events.append(event)
+
+    def _event(self, path, event_type):
+        event = EventMock()
+        event.path = path
+        event.type = event_type
+        return event
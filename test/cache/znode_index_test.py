@@ -0,0 +1,34 @@
+from unittest import TestCase
+from zoom.www.cache.znode_index import ZnodeIndex
+
+
+class ZnodeIndexTest(TestCase):
+
+    def setUp(self):
+        self.index = ZnodeIndex()
+        self.index.update('/foo', children=['bar', 'baz'], cversion=2, cost=1)
+        self.index.update('/foo/bar', children=[], mzxid=10, cost=5)
+        self.index.update('/foo/baz', children=['host'], cost=1)
+        self.index.update('/foo/baz/host', children=[], cost=4)
+
+    def test_update(self):
+        self.index.update('/foo', cversion=3)
+        entry = self.index.get('/foo')
+        self.assertEqual(entry['cversion'], 3)
+        self.assertEqual(entry['children'], set(['bar', 'baz']))
+
+    def test_is_leaf(self):
+        self.assertTrue(self.index.is_leaf('/foo/bar'))
+        self.assertFalse(self.index.is_leaf('/foo'))
+        self.assertFalse(self.index.is_leaf('/missing'))
+
+    def test_subtree_cost(self):
+        self.assertEqual(self.index.subtree_cost('/foo'), 11)
+        self.assertEqual(self.index.subtree_cost('/foo/baz'), 5)
+        self.assertEqual(self.index.subtree_cost('/missing'), 0)
+
+    def test_remove(self):
+        removed = self.index.remove('/foo/baz')
+        self.assertEqual(set(removed), set(['/foo/baz', '/foo/baz/host']))
+        self.assertEqual(len(self.index), 2)
+        self.assertFalse('/foo/baz/host' in self.index)
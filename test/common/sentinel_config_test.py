@@ -0,0 +1,75 @@
+from unittest import TestCase
+from xml.etree import ElementTree
+from xml.etree.ElementTree import ParseError
+from zoom.common.sentinel_config import (
+    iter_components,
+    iter_component_attributes,
+    update_components
+)
+
+
+class SentinelConfigTest(TestCase):
+
+    def setUp(self):
+        self.config = ('<Application><Automation>'
+                       '<Component id="foo" registrationpath="/app/foo">'
+                       '<Actions><Action id="start"/><Action id="stop"/>'
+                       '</Actions></Component>'
+                       '<Component id="bar"/>'
+                       '</Automation><Component id="baz"/></Application>')
+
+    def test_iter_components(self):
+        ids = [c.get('id') for c in iter_components(self.config)]
+        self.assertEqual(ids, ['foo', 'bar', 'baz'])
+
+    def test_iter_components_parent_tag(self):
+        ids = [c.get('id') for c in
+               iter_components(self.config, parent_tag='Automation')]
+        self.assertEqual(ids, ['foo', 'bar'])
+
+    def test_iter_components_nested_parent_tag(self):
+        config = ('<Application><Automation><Component id="foo"/>'
+                  '</Automation><Template><Automation>'
+                  '<Component id="bar"/></Automation></Template>'
+                  '</Application>')
+        ids = [c.get('id') for c in
+               iter_components(config, parent_tag='Automation')]
+        # same as findall('Automation/Component')
+        self.assertEqual(ids, ['foo'])
+        self.assertEqual(
+            [c.get('id') for c in
+             ElementTree.fromstring(config).findall('Automation/Component')],
+            ids)
+
+    def test_iter_components_clear(self):
+        kept = list(iter_components(self.config, clear=False))
+        cleared = list(iter_components(self.config))
+        self.assertEqual(len(kept[0].findall('Actions/Action')), 2)
+        self.assertEqual(len(cleared[0]), 0)
+
+    def test_iter_component_attributes(self):
+        self.assertEqual(
+            list(iter_component_attributes(self.config,
+                                           ['id', 'registrationpath'])),
+            [('foo', '/app/foo'), ('bar', None), ('baz', None)])
+
+    def test_iter_components_invalid(self):
+        self.assertRaises(ParseError, list,
+                          iter_components('<Application><Component>'))
+
+    def test_update_components(self):
+        def _update(component):
+            if component.get('id') != 'bar':
+                return False
+            component.set('disabled', 'True')
+            return True
+
+        config = ElementTree.fromstring(
+            update_components(self.config, _update))
+        self.assertEqual(config.find('Automation/Component[@id="bar"]')
+                         .get('disabled'), 'True')
+        self.assertEqual(len(config.findall('.//Component')), 3)
+
+    def test_update_components_unchanged(self):
+        self.assertEqual(update_components(self.config, lambda c: False),
+                         None)
@@ -0,0 +1,48 @@
+import mox
+from threading import Event
+from unittest import TestCase
+from xml.etree import ElementTree
+
+from zoom.agent.entities.child_process import ChildProcess
+from zoom.agent.entities.executor import Executor
+from zoom.agent.entities.work_manager import WorkManager
+from zoom.agent.task.task import Task
+
+
+class ChildProcessTest(TestCase):
+
+    def setUp(self):
+        self.mox = mox.Mox()
+        self.mox.StubOutWithMock(ChildProcess, '_create_process')
+        ChildProcess._create_process().AndReturn(None)
+        self.mox.ReplayAll()
+        config = ElementTree.fromstring(
+            '<Component id="foo" type="application"/>')
+        self.child = ChildProcess(config, 'Linux', {}, None, None, None)
+        self.mox.VerifyAll()
+        self.executor = Executor(size=1)
+        self.executor.start()
+
+    def tearDown(self):
+        self.executor.stop()
+        self.mox.UnsetStubs()
+
+    def test_last_command_wins(self):
+        state = list()
+        done = Event()
+
+        def stop():
+            state.append('stopped')
+            done.set()
+
+        self.child.add_work(Task('start'))
+        self.child.add_work(Task('stop'))
+        manager = WorkManager('foo', self.child._action_queue,
+                              {'start': lambda: state.append('running'),
+                               'stop': stop},
+                              self.executor)
+        manager.start()
+        self.assertTrue(done.wait(5))
+        manager.stop()
+
+        self.assertEqual(state, ['running', 'stopped'])
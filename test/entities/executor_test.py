@@ -0,0 +1,102 @@
+import time
+from threading import Event
+from unittest import TestCase
+
+from zoom.agent.entities.executor import Executor
+
+
+class ExecutorTest(TestCase):
+
+    def setUp(self):
+        self.executor = Executor(size=2)
+        self.executor.start()
+
+    def tearDown(self):
+        self.executor.stop()
+
+    def test_submit(self):
+        done = Event()
+        self.executor.submit(done.set)
+        self.assertTrue(done.wait(5))
+
+    def test_bounded(self):
+        release = Event()
+        started = list()
+
+        def job(i):
+            started.append(i)
+            release.wait()
+
+        for i in xrange(4):
+            self.executor.submit(job, i)
+        self.assertEqual(self.executor.stats['threads'], 2)
+        self.assertTrue(self.executor.stats['max_queue_depth'] >= 2)
+        release.set()
+
+    def test_failed_job(self):
+        done = Event()
+
+        def fail():
+            raise ValueError('failed')
+
+        self.executor.submit(fail)
+        self.executor.submit(done.set)
+        self.assertTrue(done.wait(5))
+        self.executor.stop()
+        self.assertEqual(self.executor.stats['failed'], 1)
+        self.assertEqual(self.executor.stats['completed'], 1)
+
+    def test_resize(self):
+        self.executor.resize(4)
+        self.assertEqual(self.executor.stats['threads'], 4)
+        self.executor.resize(1)
+        done = Event()
+        self.executor.submit(done.set)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(self.executor.stats['size'], 1)
+
+    def test_growable(self):
+        executor = Executor(size=1, name='step', growable=True)
+        executor.start()
+        release = Event()
+        started = list()
+
+        def job(i):
+            started.append(i)
+            release.wait()
+
+        for i in xrange(3):
+            executor.submit(job, i)
+        done = Event()
+        executor.submit(done.set)
+        # nothing waits for the blocked jobs
+        self.assertTrue(done.wait(5))
+        self.assertEqual(executor.stats['peak_threads'], 4)
+
+        release.set()
+        executor.stop()
+        self.assertEqual(sorted(started), [0, 1, 2])
+
+    def test_growable_cap(self):
+        executor = Executor(size=1, name='step', growable=True, max_size=3)
+        executor.start()
+        release = Event()
+        done = list()
+
+        def job(i):
+            release.wait()
+            done.append(i)
+
+        for i in xrange(20):
+            executor.submit(job, i)
+        stats = executor.stats
+        self.assertEqual(stats['threads'], 3)
+        self.assertEqual(stats['max_size'], 3)
+        self.assertTrue(stats['queue_depth'] >= 17)
+
+        release.set()
+        while executor.stats['completed'] < 20:
+            time.sleep(0.01)
+        executor.stop()
+        self.assertEqual(sorted(done), range(20))
+        self.assertEqual(executor.stats['peak_threads'], 3)
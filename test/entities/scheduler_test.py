@@ -0,0 +1,112 @@
+import time
+from threading import Event
+from unittest import TestCase
+
+from zoom.agent.entities.executor import Executor
+from zoom.agent.entities.scheduler import Scheduler, get_default_scheduler
+
+
+class SchedulerTest(TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+        self.runs = 0
+        self.ran = Event()
+        self.done = Event()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_runs_every_interval(self):
+        self.scheduler.start()
+        job = self.scheduler.schedule(self._run, 0.01, delay=0)
+        self.assertTrue(self.done.wait(5))
+        job.cancel()
+        runs = self.runs
+        time.sleep(0.05)
+
+        self.assertEqual(self.runs, runs)
+        self.assertEqual(self.scheduler.stats['jobs'], 0)
+
+    def test_jitter(self):
+        scheduler = Scheduler(jitter=1.0, clock=lambda: 100.0)
+        for interval in (0.5, 10):
+            scheduler.schedule(self._run, interval)
+        dues = sorted(entry[0] for entry in scheduler._heap)
+
+        self.assertTrue(100.0 <= dues[0] <= 101.0)
+        self.assertTrue(100.0 <= dues[1] <= 101.0)
+
+    def test_timeout(self):
+        release = Event()
+        timed_out = Event()
+
+        def hang():
+            release.wait()
+
+        def on_timeout():
+            timed_out.set()
+            release.set()
+
+        self.scheduler = Scheduler(executor=Executor(size=1))
+        self.scheduler._executor.start()
+        self.scheduler.start()
+        job = self.scheduler.schedule(hang, 60, timeout=0.05,
+                                      on_timeout=on_timeout, delay=0)
+        self.assertTrue(timed_out.wait(5))
+        self.scheduler._executor.stop()
+
+        self.assertEqual(job.timeouts, 1)
+        self.assertEqual(self.scheduler.stats['timeouts'], 1)
+
+    def test_timeout_from_start(self):
+        release = Event()
+        executor = Executor(size=1)
+        executor.start()
+        self.scheduler = Scheduler(executor=executor)
+        self.scheduler.start()
+        # the only worker is busy for longer than the timeout
+        executor.submit(release.wait, 5)
+        job = self.scheduler.schedule(self._run, 60, timeout=0.05, delay=0)
+        time.sleep(0.1)
+        release.set()
+        self.assertTrue(self.ran.wait(5))
+        time.sleep(0.1)
+        executor.stop()
+
+        self.assertEqual(job.timeouts, 0)
+        # the timeout of the finished run is gone, the next run is left
+        self.assertEqual([run for _, _, _, run in self.scheduler._heap],
+                         [None])
+
+    def test_default_scheduler(self):
+        release = Event()
+        timed_out = Event()
+        scheduler = get_default_scheduler()
+        self.assertTrue(scheduler is get_default_scheduler())
+
+        # a hung poll holds neither the other polls nor its timeout back
+        hung = scheduler.schedule(release.wait, 60, timeout=0.05,
+                                  on_timeout=timed_out.set, delay=0)
+        job = scheduler.schedule(self._run, 0.01, delay=0)
+        self.assertTrue(self.done.wait(5))
+        self.assertTrue(timed_out.wait(5))
+        release.set()
+        job.cancel()
+        hung.cancel()
+
+    def test_stop(self):
+        self.scheduler.start()
+        job = self.scheduler.schedule(self._run, 60, delay=0)
+        self.assertTrue(self.ran.wait(5))
+
+        start = time.time()
+        self.scheduler.stop()
+        self.assertTrue(time.time() - start < 1)
+        self.assertTrue(job.cancelled)
+
+    def _run(self):
+        self.runs += 1
+        self.ran.set()
+        if self.runs >= 3:
+            self.done.set()
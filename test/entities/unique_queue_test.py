@@ -0,0 +1,81 @@
+from unittest import TestCase
+
+from zoom.agent.entities.unique_queue import UniqueQueue
+from zoom.agent.task.task import Task
+from zoom.common.constants import SENTINEL_METHODS
+
+
+class UniqueQueueTest(TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        self.queue = UniqueQueue(clock=lambda: self.now)
+
+    def test_append_unique(self):
+        self.assertTrue(self.queue.append_unique(Task('start')))
+        self.assertFalse(self.queue.append_unique(Task('start')))
+        self.assertTrue(self.queue.append_unique(Task('stop'), first=True))
+        self.assertEqual([t.name for t in self.queue], ['stop', 'start'])
+
+    def test_enqueued_at(self):
+        task = Task('start')
+        self.queue.append_unique(task)
+        self.assertEqual(self.queue.enqueued_at(task), 100.0)
+
+        self.queue.remove(Task('start'))
+        self.assertEqual(self.queue.enqueued_at(task), None)
+        self.assertRaises(ValueError, self.queue.remove, task)
+
+    def test_listener(self):
+        lengths = list()
+
+        def listener():
+            lengths.append(len(self.queue))
+
+        self.queue.add_listener(listener)
+        self.queue.append_unique(Task('start'))
+        self.queue.append_unique(Task('start'))
+        self.queue.remove(Task('start'))
+        self.queue.remove_listener(listener)
+        self.queue.append_unique(Task('stop'))
+        self.assertEqual(lengths, [1, 0])
+
+
+class PriorityQueueTest(TestCase):
+
+    def setUp(self):
+        self.queue = UniqueQueue(priorities=SENTINEL_METHODS)
+
+    def test_priority(self):
+        for name in ('start', 'react', 'register', 'stop', 'start_if_ready'):
+            self.queue.append(Task(name))
+        self.queue.append_unique(Task('terminate'), first=True)
+        self.queue.append_unique(Task('unregister'))
+
+        self.assertEqual([t.name for t in self.queue],
+                         ['terminate', 'stop', 'unregister', 'start',
+                          'register', 'react', 'start_if_ready'])
+        self.assertEqual(self.queue[0].name, 'terminate')
+        self.assertEqual(self.queue[-1].name, 'start_if_ready')
+
+    def test_remove_keeps_order(self):
+        self.queue.append_unique(Task('start', target='foo'))
+        self.queue.append_unique(Task('start', target='bar'))
+        self.queue.remove(Task('start', target='bar'))
+        self.queue.append_unique(Task('stop'))
+        self.queue.append_unique(Task('start', target='baz'))
+
+        self.assertEqual([(t.name, t.target) for t in self.queue],
+                         [('stop', None), ('start', 'foo'), ('start', 'baz')])
+        self.assertTrue(Task('start', target='baz') in self.queue)
+        self.assertFalse(Task('start', target='bar') in self.queue)
+
+    def test_clear_keep(self):
+        for name in ('stop', 'unregister', 'start', 'register'):
+            self.queue.append_unique(Task(name))
+
+        removed = self.queue.clear(keep=('register', 'unregister'))
+        self.assertEqual([t.name for t in removed], ['stop', 'start'])
+        self.assertEqual([t.name for t in self.queue],
+                         ['unregister', 'register'])
+        self.assertEqual(len(self.queue), 2)
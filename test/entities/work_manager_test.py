@@ -0,0 +1,140 @@
+from threading import Event
+from unittest import TestCase
+
+from zoom.agent.entities.executor import Executor
+from zoom.agent.entities.stagger_lock import StaggerLock
+from zoom.agent.entities.thread_safe_object import ThreadSafeObject
+from zoom.agent.entities.unique_queue import UniqueQueue
+from zoom.agent.entities.work_manager import WorkManager
+from zoom.agent.task.task import Task
+
+
+class ZkLockMock(object):
+    def __init__(self, gate):
+        self._gate = gate
+
+    def acquire(self, blocking=True, timeout=None):
+        return self._gate.wait(0.1)
+
+    def release(self):
+        pass
+
+    def cancel(self):
+        pass
+
+
+class SessionMock(object):
+    connected = True
+
+    def __init__(self, gate):
+        self._gate = gate
+        self.listeners = list()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def Lock(self, path, identifier=None):
+        return ZkLockMock(self._gate)
+
+
+class WorkManagerTest(TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        self.queue = UniqueQueue(clock=lambda: self.now)
+        self.done = Event()
+        self.order = list()
+        self.executor = Executor(size=2)
+        self.executor.start()
+        self.manager = WorkManager('foo', self.queue,
+                                   {'start': self._start,
+                                    'stop': self._stop},
+                                   self.executor,
+                                   clock=lambda: self.now)
+
+    def tearDown(self):
+        self.executor.stop()
+
+    def test_runs_work(self):
+        self.manager.start()
+        self.queue.append_unique(Task('start'))
+        self.assertTrue(self.done.wait(5))
+        self.manager.stop()
+
+        self.assertEqual(len(self.queue), 0)
+
+    def test_in_order(self):
+        self.queue.append_unique(Task('stop', block=True))
+        self.queue.append_unique(Task('start', block=True))
+        self.manager.start()
+        self.assertTrue(self.done.wait(5))
+        self.manager.stop()
+
+        self.assertEqual(self.order, ['stop', 'start'])
+
+    def test_latency(self):
+        self.queue.append_unique(Task('start'))
+        self.now = 100.25
+        self.manager.start()
+        self.assertTrue(self.done.wait(5))
+        self.manager.stop()
+
+        latency = self.manager.latency['start']
+        self.assertEqual(latency['count'], 1)
+        self.assertEqual(latency['max'], 0.25)
+        self.assertEqual(latency['buckets']['<=0.5'], 1)
+
+    def test_stop_idle(self):
+        self.manager.start()
+        self.manager.stop()
+        self.queue.append_unique(Task('start'))
+        self.assertEqual(self.executor.stats['submitted'], 0)
+
+    def test_stagger_does_not_starve(self):
+        # the stagger lock is held by someone else until the gate opens
+        gate = Event()
+        steps = Executor(size=1, name='step', growable=True)
+        steps.start()
+        managers = list()
+        for i in xrange(16):
+            session = SessionMock(gate)
+            lock = StaggerLock('/stagger', 0, parent='app{0}'.format(i),
+                               acquire_lock=ThreadSafeObject(True),
+                               app_state=ThreadSafeObject(None),
+                               zkclient=session)
+
+            def start(lock=lock):
+                lock.start()
+                lock.join()
+
+            queue = UniqueQueue()
+            manager = WorkManager('app{0}'.format(i), queue,
+                                  {'start': start}, self.executor,
+                                  step_executor=steps)
+            managers.append((manager, session))
+            manager.start()
+            queue.append_unique(Task('start', block=True))
+
+        self.manager = WorkManager('foo', self.queue, {'start': self._start},
+                                   self.executor, step_executor=steps)
+        self.manager.start()
+        self.queue.append_unique(Task('start', block=True))
+        self.assertTrue(self.done.wait(5))
+        self.manager.stop()
+
+        gate.set()
+        for manager, session in managers:
+            manager.stop()
+            self.assertEqual(session.listeners, [])
+        steps.stop()
+        self.assertEqual(self.executor.stats['submitted'], 0)
+
+    def _start(self):
+        self.order.append('start')
+        self.done.set()
+
+    def _stop(self):
+        self.order.append('stop')
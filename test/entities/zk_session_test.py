@@ -0,0 +1,179 @@
+from unittest import TestCase
+
+from kazoo.client import KazooState
+from zoom.agent.entities.zk_session import SessionPool, SharedSession
+
+
+class ClientMock(object):
+    def __init__(self):
+        self.connected = False
+        self.listeners = list()
+        self.watches = list()
+        self.deleted = list()
+        self.starts = 0
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def start(self):
+        self.starts += 1
+        self.set_state(KazooState.CONNECTED)
+
+    def set_state(self, state):
+        self.connected = state == KazooState.CONNECTED
+        for listener in self.listeners:
+            listener(state)
+
+    def get(self, path, watch=None):
+        self.watches.append(watch)
+        return '', None
+
+    def create(self, path, value='', acl=None, ephemeral=False,
+               sequence=False, makepath=False):
+        return path
+
+    def delete(self, path, version=-1, recursive=False):
+        self.deleted.append(path)
+
+    def Lock(self, path, identifier=None):
+        return LockMock(path)
+
+
+class LockMock(object):
+    def __init__(self, path):
+        self.path = path
+        self.is_acquired = False
+        self.cancelled = False
+
+    def acquire(self, blocking=True, timeout=None):
+        self.is_acquired = not self.path.endswith('busy')
+        return self.is_acquired
+
+    def release(self):
+        self.is_acquired = False
+        return True
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class SharedSessionTest(TestCase):
+
+    def setUp(self):
+        self.client = ClientMock()
+        self.session = SharedSession(client=self.client)
+        self.foo = self.session.view('foo')
+        self.bar = self.session.view('bar')
+        self.states = {'foo': list(), 'bar': list()}
+        self.foo.add_listener(self.states['foo'].append)
+        self.bar.add_listener(self.states['bar'].append)
+
+    def test_start_once(self):
+        self.foo.start()
+        self.assertEqual(self.states, {'foo': [KazooState.CONNECTED],
+                                       'bar': []})
+
+        # already connected, told right away
+        self.bar.start()
+        self.assertEqual(self.states['bar'], [KazooState.CONNECTED])
+        self.assertEqual(self.client.starts, 1)
+
+        self.client.set_state(KazooState.SUSPENDED)
+        self.assertEqual(self.states['foo'][-1], KazooState.SUSPENDED)
+        self.assertEqual(self.states['bar'][-1], KazooState.SUSPENDED)
+
+    def test_watches(self):
+        events = list()
+
+        def watch(event):
+            events.append(event)
+
+        self.foo.start()
+        self.foo.get('/foo', watch=watch)
+        self.foo.get('/foo', watch=watch)
+
+        # same callback, same watcher
+        self.assertTrue(self.client.watches[0] is self.client.watches[1])
+        self.assertEqual(self.foo.watches, 1)
+
+        # another node gets a watcher of its own
+        self.foo.get('/bar', watch=watch)
+        self.assertTrue(self.client.watches[2] is not self.client.watches[0])
+        self.assertEqual(self.foo.watches, 2)
+
+        # a fired watch is forgotten, the next one is a new watcher
+        self.client.watches[0]('event')
+        self.assertEqual(self.foo.watches, 1)
+        self.foo.get('/foo', watch=watch)
+        self.assertTrue(self.client.watches[3] is not self.client.watches[0])
+
+        self.foo.stop()
+        self.client.watches[3]('event')
+        self.assertEqual(events, ['event'])
+        self.assertEqual(self.foo.watches, 0)
+
+    def test_watches_after_restart(self):
+        events = list()
+
+        def watch(event):
+            events.append(event)
+
+        self.foo.start()
+        self.foo.get('/foo', watch=watch)
+        self.foo.stop()
+        self.foo.start()
+        self.foo.get('/foo', watch=watch)
+
+        # the watch from before the stop is still set on the node
+        self.client.watches[0]('old')
+        self.client.watches[1]('new')
+        self.assertEqual(events, ['new'])
+        self.assertEqual(self.foo.watches, 0)
+
+    def test_stop(self):
+        self.foo.start()
+        self.bar.start()
+        self.foo.create('/state/foo', ephemeral=True)
+        self.foo.create('/state/foo/config')
+        self.foo.create('/state/foo/gone', ephemeral=True)
+        self.foo.delete('/state/foo/gone')
+        self.foo.close()
+
+        self.assertEqual(self.client.deleted,
+                         ['/state/foo/gone', '/state/foo'])
+        self.assertEqual(self.session.views, [self.bar])
+
+        self.client.set_state(KazooState.LOST)
+        self.assertEqual(self.states['foo'], [KazooState.CONNECTED])
+        self.assertTrue(self.client.connected is False)
+
+    def test_stop_releases_locks(self):
+        self.foo.start()
+        held = self.foo.Lock('/stagger/held')
+        released = self.foo.Lock('/stagger/released')
+        busy = self.foo.Lock('/stagger/busy')
+        self.assertTrue(held.acquire())
+        self.assertTrue(released.acquire())
+        released.release()
+        self.assertFalse(busy.acquire(timeout=1))
+        self.assertEqual(self.foo._locks, set([held]))
+
+        self.foo.stop()
+        self.assertFalse(held.is_acquired)
+        self.assertTrue(held.cancelled)
+        self.assertFalse(released.cancelled)
+        self.assertEqual(self.foo._locks, set())
+
+
+class SessionPoolTest(TestCase):
+
+    def test_view(self):
+        pool = SessionPool(size=2, hosts='localhost:2181')
+        views = [pool.view('app{0}'.format(i)) for i in xrange(5)]
+
+        self.assertEqual(pool.stats['sessions'], 2)
+        self.assertEqual(sorted(pool.stats['components']), [2, 3])
+        views[0].close()
+        views[2].close()
+        pool.view('app5')
+        self.assertEqual(pool.stats['components'], [2, 2])
@@ -0,0 +1,109 @@
+import json
+from unittest import TestCase
+
+from zoom.www.messages.application_dependencies \
+    import ApplicationDependenciesMessage
+from zoom.www.messages.application_states import ApplicationStatesMessage
+from zoom.www.messages.change_log import ChangeLog
+from zoom.www.messages.timing_estimate import TimeEstimateMessage
+
+
+class ChangeLogTest(TestCase):
+
+    def setUp(self):
+        self.log = ChangeLog(size=3)
+
+    def test_first_message_is_complete(self):
+        data = json.loads(self.log.record(self._state('/foo', 'running')))
+
+        self.assertEqual(data['seq'], 1)
+        self.assertTrue(data['delta'])
+        self.assertEqual(data['environment'], 'Staging')
+        self.assertEqual(data['application_states'],
+                         [{'configuration_path': '/foo',
+                           'application_status': 'running',
+                           'application_host': 'host1'}])
+
+    def test_changed_fields_only(self):
+        self.log.record(self._state('/foo', 'running'))
+        data = json.loads(self.log.record(self._state('/foo', 'stopped')))
+
+        self.assertEqual(data['seq'], 2)
+        self.assertEqual(data['application_states'],
+                         [{'configuration_path': '/foo',
+                           'application_status': 'stopped'}])
+
+    def test_unchanged_is_not_sent(self):
+        self.log.record(self._state('/foo', 'running'))
+        self.assertEqual(self.log.record(self._state('/foo', 'running')),
+                         None)
+        self.assertEqual(self.log.seq, 1)
+
+    def test_in_place_update_is_detected(self):
+        message = ApplicationDependenciesMessage()
+        item = {'configuration_path': '/foo', 'dependencies': [],
+                'downstream': []}
+        message.update({'/foo': item})
+        self.log.record(message)
+
+        item['downstream'].append('/bar')
+        data = json.loads(self.log.record(message))
+
+        # dependency items are always sent whole
+        self.assertEqual(data['application_dependencies'], [item])
+
+    def test_delete(self):
+        self.log.record(self._state('/foo', 'running'))
+        message = self._state('/foo', 'running')
+        message.application_states['/foo']['delete'] = True
+        data = json.loads(self.log.record(message))
+
+        self.assertEqual(data['application_states'],
+                         [{'configuration_path': '/foo', 'delete': True}])
+
+    def test_unkeyed_message(self):
+        message = TimeEstimateMessage()
+        message.update({'maxtime': 5})
+        data = json.loads(self.log.record(message))
+
+        self.assertEqual(data['maxtime'], 5)
+        self.assertEqual(data['seq'], 1)
+
+    def test_since(self):
+        for status in ('running', 'stopped', 'starting', 'running'):
+            self.log.record(self._state('/foo', status))
+
+        epoch = self.log.epoch
+        self.assertEqual(
+            [json.loads(d)['seq'] for d in self.log.since(epoch, 2)], [3, 4])
+        self.assertEqual(self.log.since(epoch, 4), [])
+        # seq 2 has been dropped from the log
+        self.assertEqual(self.log.since(epoch, 0), None)
+        self.assertEqual(self.log.since(epoch, 5), None)
+        self.assertEqual(self.log.since('other', 3), None)
+
+    def test_moves(self):
+        self.log.record(self._state('/foo', 'running'))
+        self.log.record(self._state('/foo', 'stopped'))
+        self.log.record(self._state('/foo', 'stopped', host='host2'))
+
+        self.assertEqual(self.log.moves(2), {})
+        before, after = self.log.moves(3)['/foo']
+        self.assertEqual(before['application_host'], 'host1')
+        self.assertEqual(after, {'configuration_path': '/foo',
+                                 'application_status': 'stopped',
+                                 'application_host': 'host2'})
+
+        # moves leave with their messages
+        for status in ('starting', 'running', 'stopped'):
+            self.log.record(self._state('/foo', status, host='host2'))
+        self.assertEqual(self.log.moves(3), {})
+        self.assertEqual(self.log._moves, {})
+
+    def _state(self, path, status, host='host1'):
+        message = ApplicationStatesMessage()
+        message.set_environment('Staging')
+        message.update({path: {'configuration_path': path,
+                               'application_status': status,
+                               'application_host': host}})
+        return message
@@ -0,0 +1,54 @@
+import json
+from unittest import TestCase
+
+from zoom.www.messages.application_states import ApplicationStatesMessage
+from zoom.www.messages.compact_encoding import (
+    compact_json,
+    pack_items,
+    unpack_items
+)
+
+
+class CompactEncodingTest(TestCase):
+
+    def test_pack_groups_by_fields(self):
+        items = [
+            {'configuration_path': '/foo', 'application_status': 'running'},
+            {'configuration_path': '/bar', 'delete': True},
+            {'configuration_path': '/baz', 'application_status': 'stopped'}
+        ]
+        groups = pack_items(items)
+
+        self.assertEqual(groups, [
+            {'fields': ['application_status', 'configuration_path'],
+             'rows': [['running', '/foo'], ['stopped', '/baz']]},
+            {'fields': ['configuration_path', 'delete'],
+             'rows': [['/bar', True]]}
+        ])
+        self.assertEqual(sorted(unpack_items(groups)), sorted(items))
+
+    def test_compact_json(self):
+        data = compact_json(json.dumps({
+            'update_type': 'application_state',
+            'seq': 3,
+            'application_states': [{'configuration_path': '/foo'}]
+        }))
+
+        self.assertEqual(json.loads(data), {
+            'update_type': 'application_state',
+            'seq': 3,
+            'encoding': 'compact',
+            'application_states': [{'fields': ['configuration_path'],
+                                    'rows': [['/foo']]}]
+        })
+
+    def test_message_to_json(self):
+        message = ApplicationStatesMessage()
+        message.set_environment('Staging')
+        message.update({'/foo': {'configuration_path': '/foo',
+                                 'application_status': 'running'}})
+
+        data = json.loads(message.to_json(encoding='compact'))
+        self.assertEqual(data['environment'], 'Staging')
+        self.assertEqual(unpack_items(data['application_states']),
+                         json.loads(message.to_json())['application_states'])
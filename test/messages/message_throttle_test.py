@@ -0,0 +1,268 @@
+import json
+import mox
+
+from unittest import TestCase
+from tornado.ioloop import IOLoop
+from zoom.www.messages.application_states import ApplicationStatesMessage
+from zoom.www.messages.change_log import ChangeLog
+from zoom.www.messages.global_mode_message import GlobalModeMessage
+from zoom.www.messages.message_throttler import MessageThrottle
+from zoom.www.messages.subscriptions import (
+    SubscriptionFilter,
+    SubscriptionIndex
+)
+from test.test_utils import ConfigurationMock
+
+
+class ClockMock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class ClientMock(object):
+    delta = True
+    encoding = 'json'
+
+    def __init__(self):
+        self.updates = list()
+
+    def send_update(self, data):
+        self.updates.append(data)
+
+
+class MessageThrottleTest(TestCase):
+
+    def setUp(self):
+        self.mox = mox.Mox()
+        self.full_client = self.mox.CreateMockAnything()
+        self.full_client.delta = False
+        self.full_client.encoding = 'json'
+        self.delta_client = self.mox.CreateMockAnything()
+        self.delta_client.delta = True
+        self.delta_client.encoding = 'json'
+        self.compact_client = self.mox.CreateMockAnything()
+        self.compact_client.delta = True
+        self.compact_client.encoding = 'compact'
+        self.change_log = ChangeLog()
+        self.clock = ClockMock()
+        self.throttle = MessageThrottle(ConfigurationMock(),
+                                        [self.full_client, self.delta_client,
+                                         self.compact_client],
+                                        change_log=self.change_log,
+                                        clock=self.clock)
+
+    def tearDown(self):
+        self.mox.UnsetStubs()
+
+    def test_add_message_combines_types(self):
+        self.throttle.add_message(self._state('/foo', 'running'))
+        self.throttle.add_message(self._state('/bar', 'stopped'))
+        self.throttle.add_message(GlobalModeMessage('{"mode":"auto"}'))
+        self.throttle.add_message(GlobalModeMessage('{"mode":"manual"}'))
+
+        pending = self.throttle._pending.values()
+        self.assertEqual(len(pending), 2)
+        self.assertEqual(sorted(pending[0].application_states.keys()),
+                         ['/bar', '/foo'])
+        self.assertEqual(pending[1].mode, '{"mode":"manual"}')
+
+        stats = self.throttle.stats
+        self.assertEqual(stats['messages'], 4)
+        self.assertEqual(stats['combined'], 2)
+        self.assertEqual(stats['queue_depth'], 2)
+        self.assertEqual(stats['max_queue_depth'], 2)
+
+    def test_adaptive_tick(self):
+        # idle: due as soon as it arrives
+        self.throttle.add_message(self._state('/foo', 'running'))
+        self.assertEqual(self.throttle._next_flush(), 100.0)
+
+        # burst: coalesced until an interval after the last flush
+        self.throttle._pending.clear()
+        self.throttle._queued_at = None
+        self.throttle._last_flush = 100.0
+        self.clock.now = 100.5
+        self.throttle.add_message(self._state('/foo', 'stopped'))
+        self.assertEqual(self.throttle._next_flush(), 101.0)
+
+    def test_flush_encodes_once(self):
+        ioloop = self.mox.CreateMock(IOLoop)
+        self.mox.StubOutWithMock(IOLoop, 'instance')
+        IOLoop.instance().AndReturn(ioloop)
+        ioloop.add_callback(self.throttle._deliver, mox.IsA(list),
+                            mox.IsA(dict), 100.0, {})
+
+        message = self.mox.CreateMock(ApplicationStatesMessage)
+        message.message_type = 'application_state'
+        message.application_states = {'/foo': {'configuration_path': '/foo'}}
+        message.environment = None
+        message.to_json().AndReturn('{}')
+        self.mox.ReplayAll()
+
+        self.throttle.add_message(message)
+        self.throttle._flush()
+        # nothing left to send
+        self.throttle._flush()
+
+        self.assertEqual(self.change_log.seq, 1)
+        self.assertEqual(self.throttle.stats['flushes'], 1)
+        self.mox.VerifyAll()
+
+    def test_flush_batches_deltas(self):
+        frames = list()
+        ioloop = self.mox.CreateMock(IOLoop)
+        self.mox.StubOutWithMock(IOLoop, 'instance')
+        IOLoop.instance().AndReturn(ioloop)
+        ioloop.add_callback(self.throttle._deliver, mox.IsA(list),
+                            mox.IsA(dict), 100.0, {})\
+            .WithSideEffects(lambda *args: frames.append(args))
+        self.mox.ReplayAll()
+
+        self.throttle.add_message(self._state('/foo', 'running'))
+        self.throttle.add_message(GlobalModeMessage('{"mode":"auto"}'))
+        self.throttle._flush()
+
+        full, encoded = frames[0][1], frames[0][2]
+        self.assertEqual(len(full), 2)
+        data = json.loads(encoded['json'])
+        self.assertEqual(data['update_type'], 'batch')
+        self.assertEqual([m['seq'] for m in data['messages']], [1, 2])
+
+        compact = json.loads(encoded['compact'])
+        self.assertEqual(compact['messages'][0]['encoding'], 'compact')
+        self.assertEqual(compact['messages'][0]['application_states'],
+                         [{'fields': ['application_status',
+                                      'configuration_path'],
+                           'rows': [['running', '/foo']]}])
+        self.mox.VerifyAll()
+
+    def test_deliver(self):
+        self.full_client.send_update('full1')
+        self.full_client.send_update('full2')
+        self.delta_client.send_update('frame')
+        self.compact_client.send_update('packed')
+        self.mox.ReplayAll()
+
+        self.clock.now = 100.25
+        self.throttle._deliver(['full1', 'full2'],
+                               {'json': 'frame', 'compact': 'packed'}, 100.0)
+
+        stats = self.throttle.stats
+        self.assertEqual(stats['frames'], 4)
+        self.assertEqual(stats['bytes'], 21)
+        self.assertEqual(stats['last_flush_latency'], 0.25)
+        self.mox.VerifyAll()
+
+    def test_deliver_unchanged(self):
+        self.full_client.send_update('full')
+        self.mox.ReplayAll()
+
+        self.throttle._deliver(['full'], {'json': None}, 100.0)
+        self.mox.VerifyAll()
+
+    def test_deliver_compact_fallback(self):
+        # the compact client subscribed after the flush was encoded
+        self.full_client.send_update('full')
+        self.delta_client.send_update('frame')
+        self.compact_client.send_update('frame')
+        self.mox.ReplayAll()
+
+        self.throttle._deliver(['full'], {'json': 'frame'}, 100.0)
+        self.mox.VerifyAll()
+
+    def test_route(self):
+        foo = ClientMock()
+        bar = ClientMock()
+        everything = ClientMock()
+        subscriptions = SubscriptionIndex(self.change_log)
+        subscriptions.subscribe(foo, [SubscriptionFilter.from_dictionary(
+            {'prefix': '/foo'})])
+        subscriptions.subscribe(bar, [SubscriptionFilter.from_dictionary(
+            {'prefix': '/bar'})])
+        throttle = MessageThrottle(ConfigurationMock(), [foo, bar, everything],
+                                   change_log=self.change_log,
+                                   subscriptions=subscriptions,
+                                   clock=self.clock)
+
+        message = self._state('/foo', 'running')
+        message.combine(self._state('/bar', 'stopped'))
+        throttle.add_message(message)
+        throttle.add_message(GlobalModeMessage('{"mode":"auto"}'))
+
+        self.mox.StubOutWithMock(IOLoop, 'instance')
+        IOLoop.instance().AndReturn(self)
+        self.mox.ReplayAll()
+        throttle._flush()
+        self.mox.VerifyAll()
+
+        # nothing to encode for legacy clients
+        self.assertEqual(self.calls[0][0], [])
+
+        frames = dict()
+        for client in (foo, bar, everything):
+            frame = json.loads(client.updates[0])
+            frames[client] = [
+                (m['update_type'],
+                 [s['configuration_path']
+                  for s in m.get('application_states', [])])
+                for m in frame['messages']]
+        self.assertEqual(frames[foo], [('application_state', ['/foo']),
+                                       ('global_mode', [])])
+        self.assertEqual(frames[bar], [('application_state', ['/bar']),
+                                       ('global_mode', [])])
+        self.assertEqual(sorted(frames[everything][0][1]), ['/bar', '/foo'])
+
+    def test_route_host_move(self):
+        old_host = ClientMock()
+        new_host = ClientMock()
+        subscriptions = SubscriptionIndex(self.change_log)
+        subscriptions.subscribe(old_host, [SubscriptionFilter.from_dictionary(
+            {'host': 'host1'})])
+        subscriptions.subscribe(new_host, [SubscriptionFilter.from_dictionary(
+            {'host': 'host2'})])
+        throttle = MessageThrottle(ConfigurationMock(), [old_host, new_host],
+                                   change_log=self.change_log,
+                                   subscriptions=subscriptions,
+                                   clock=self.clock)
+
+        self.mox.StubOutWithMock(IOLoop, 'instance')
+        IOLoop.instance().MultipleTimes().AndReturn(self)
+        self.mox.ReplayAll()
+        throttle.add_message(self._state('/foo', 'running', host='host1'))
+        throttle._flush()
+        throttle.add_message(self._state('/foo', 'running', host='host2'))
+        throttle._flush()
+        self.mox.VerifyAll()
+
+        def states(client):
+            return json.loads(client.updates[-1])['application_states']
+
+        # only the host changed, but the new subscriber needs everything
+        self.assertEqual(states(new_host),
+                         [{'configuration_path': '/foo',
+                           'application_status': 'running',
+                           'application_host': 'host2'}])
+        self.assertEqual(states(old_host),
+                         [{'configuration_path': '/foo', 'delete': True}])
+        self.assertEqual(len(new_host.updates), 1)
+
+    def add_callback(self, callback, *args):
+        # stands in for the IOLoop
+        self.calls = [args]
+        callback(*args)
+
+    def test_start_stop(self):
+        self.throttle.start()
+        self.throttle.stop()
+        self.assertFalse(self.throttle._thread.is_alive())
+
+    def _state(self, path, status, host=None):
+        message = ApplicationStatesMessage()
+        item = {'configuration_path': path, 'application_status': status}
+        if host is not None:
+            item['application_host'] = host
+        message.update({path: item})
+        return message
@@ -0,0 +1,111 @@
+from unittest import TestCase
+
+from zoom.www.entities.custom_filter import CustomFilter
+from zoom.www.messages.application_states import ApplicationStatesMessage
+from zoom.www.messages.change_log import ChangeLog
+from zoom.www.messages.subscriptions import (
+    SubscriptionFilter,
+    SubscriptionIndex
+)
+
+
+class SubscriptionIndexTest(TestCase):
+
+    def setUp(self):
+        self.change_log = ChangeLog()
+        self.index = SubscriptionIndex(self.change_log)
+        self.foo = '/spot/software/state/application/foo/app1'
+        self.bar = '/spot/software/state/application/bar/app2'
+
+    def test_prefix(self):
+        self.index.subscribe('client1', [self._filter(
+            prefix='/spot/software/state/application/foo')])
+
+        self.assertEqual(self.index.route(self._item(self.foo)),
+                         frozenset(['client1']))
+        self.assertEqual(self.index.route(self._item(self.bar)),
+                         frozenset())
+
+    def test_regex_and_host(self):
+        self.index.subscribe('client1', [self._filter(regex='app[0-9]$')])
+        self.index.subscribe('client2', [self._filter(host='HOST2')])
+
+        self.assertEqual(self.index.route(self._item(self.foo, 'host1')),
+                         frozenset(['client1']))
+        self.assertEqual(self.index.route(self._item(self.bar, 'host2')),
+                         frozenset(['client1', 'client2']))
+
+    def test_host_from_change_log(self):
+        message = ApplicationStatesMessage()
+        message.update({self.bar: self._item(self.bar, 'host2')})
+        self.change_log.record(message)
+        self.index.subscribe('client1', [self._filter(host='host2')])
+
+        # deltas only carry the fields that changed
+        self.assertEqual(
+            self.index.route({'configuration_path': self.bar,
+                              'application_status': 'stopped'}),
+            frozenset(['client1']))
+
+    def test_delete_goes_to_everyone(self):
+        self.index.subscribe('client1', [self._filter(regex='nomatch')])
+
+        self.assertEqual(
+            self.index.route({'configuration_path': self.foo,
+                              'delete': True}),
+            frozenset(['client1']))
+
+    def test_unsubscribe(self):
+        self.index.subscribe('client1', [self._filter(prefix='/spot')])
+        self.assertEqual(self.index.route(self._item(self.foo)),
+                         frozenset(['client1']))
+
+        self.index.unsubscribe('client1')
+        self.assertEqual(self.index.route(self._item(self.foo)), frozenset())
+        self.assertEqual(self.index.clients, frozenset())
+
+    def test_routes_are_cached(self):
+        self.index.subscribe('client1', [self._filter(regex='foo')])
+        self.index.route(self._item(self.foo))
+        self.index.route(self._item(self.foo))
+
+        self.assertEqual(self.index.stats['cache_hits'], 1)
+
+    def test_custom_filter(self):
+        f = SubscriptionFilter.from_custom_filter(
+            CustomFilter('name', 'user', 'applicationHost', 'host1', 'false'))
+        self.index.subscribe('client1', [f])
+        self.assertEqual(self.index.route(self._item(self.foo, 'HOST1')),
+                         frozenset(['client1']))
+
+        # inversed and state filters cannot be routed
+        self.assertEqual(SubscriptionFilter.from_custom_filter(
+            CustomFilter('name', 'user', 'applicationHost', 'host1', 'true')),
+            None)
+        self.assertEqual(SubscriptionFilter.from_custom_filter(
+            CustomFilter('name', 'user', 'errorState', 'error', 'false')),
+            None)
+
+    def test_split_host_move(self):
+        self.index.subscribe('client1', [self._filter(host='host1')])
+        self.index.subscribe('client2', [self._filter(host='host2')])
+        self.index.subscribe('client3', [self._filter(regex='app1')])
+        before = dict(self._item(self.foo, 'host1'), application_status='up')
+        after = dict(before, application_host='host2')
+        delta = {'configuration_path': self.foo,
+                 'application_host': 'host2'}
+
+        parts = self.index.split([delta], {self.foo: (before, after)})
+
+        self.assertEqual(parts, {
+            frozenset(['client2']): [after],
+            frozenset(['client1']): [{'configuration_path': self.foo,
+                                      'delete': True}],
+            frozenset(['client3']): [delta]
+        })
+
+    def _filter(self, **spec):
+        return SubscriptionFilter.from_dictionary(spec)
+
+    def _item(self, path, host='host1'):
+        return {'configuration_path': path, 'application_host': host}
@@ -2,11 +2,14 @@ class StatMock:
     def __init__(self):
         self.ephemeralOwner = None
         self.started = None
+        self.cversion = None
+        self.mzxid = None
 
 
 class EventMock:
     def __init__(self):
         self.path = None
+        self.type = None
 
 
 class ConfigurationMock:
@@ -16,6 +19,8 @@ class ConfigurationMock:
         self.agent_state_path = None
         self.environment = None
         self.throttle_interval = 1
+        self.change_log_size = 1000
+        self.client_buffer_size = 100
         self.pagerduty_subdomain = "sub"
         self.pagerduty_api_token = "token"
         self.pagerduty_default_svc_key = "key"
@@ -24,6 +29,14 @@ class ConfigurationMock:
         self.override_node = "/override_foo"
         self.graphite_host = 'graphite_host'
         self.graphite_recheck = '5m'
+        self.graphite_batch_size = 50
+        self.graphite_timeout = 5
+        self.graphite_cache_size = 10000
+        self.graphite_cache_ttl = 3600
+        self.graphite_negative_ttl = 60
+        self.incremental_walk = True
+        self.tree_loader_window = 100
+        self.watch_coalesce_interval = 0
 
 
 class ApplicationStateMock: